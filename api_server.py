@@ -1,46 +1,58 @@
-from fastapi import FastAPI, HTTPException, Response, UploadFile, File, Depends, Cookie
+from fastapi import FastAPI, HTTPException, Request, Response, UploadFile, File, Depends, Cookie
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, StreamingResponse
 from pydantic import BaseModel
+import asyncio
+import codecs
+import csv
+import io
+import json
 import threading
 import uvicorn
 import os
 import time
 import uuid
+import zlib
+from collections import deque
 from typing import List, Optional
 
-from ttd_bot import TTDBookingBot
+from selenium.common.exceptions import TimeoutException
+from ttd_bot import TTDBookingBot, DRIVER_NORMAL, DRIVER_BACKGROUND
+from metrics import REGISTRY
+
+try:
+    import openpyxl
+except Exception:
+    openpyxl = None
 
 app = FastAPI(title="TTD Bot API", version="1.0")
 
 # Optional outbound notifications (webhooks)
 NOTIFY_WEBHOOK_URL = os.getenv("NOTIFY_WEBHOOK_URL") or os.getenv("WEBHOOK_URL")
 
-# Simple counters for metrics
-_METRICS = {
-    "bot_runs_total": 0,
-    "bot_completed_total": 0,
-    "last_run_duration_seconds": 0.0,
-    "notifications_sent_total": 0,
-    "notifications_failed_total": 0,
-}
+# Prometheus metrics (bot internals register themselves in ttd_bot.py)
+BOT_RUNS = REGISTRY.counter("bot_runs_total", "Runs started via the API")
+BOT_COMPLETED = REGISTRY.counter("bot_completed_total", "Runs stopped via the API with a measured duration")
+LAST_RUN_SECONDS = REGISTRY.gauge("last_run_duration_seconds", "Fill duration of the last stopped run")
+NOTIFY_SENT = REGISTRY.counter("notifications_sent_total", "Webhook notifications delivered")
+NOTIFY_FAILED = REGISTRY.counter("notifications_failed_total", "Webhook notifications that failed")
+NOTIFY_SECONDS = REGISTRY.histogram("notification_duration_seconds", "Webhook delivery latency",
+                                    ("event", "outcome"), buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5))
+HTTP_REQUESTS = REGISTRY.counter("http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+HTTP_SECONDS = REGISTRY.histogram("http_request_duration_seconds", "HTTP request latency by route", ("method", "route"))
 
 def _notify(event: str, payload: dict | None = None):
     url = NOTIFY_WEBHOOK_URL
     # Try to read from config if not set via env
     if not url:
         try:
-            import json as _json
-            if os.path.exists("srivari_group_data.json"):
-                with open("srivari_group_data.json", "r", encoding="utf-8") as f:
-                    cfg = _json.load(f) or {}
-                    g = (cfg.get("general") or {})
-                    url = g.get("webhook_url")
+            url = bot.config_store.get().general.get("webhook_url")
         except Exception:
             url = None
     if not url:
         return
+    t0 = time.perf_counter()
     try:
         import json as _json
         import urllib.request
@@ -80,9 +92,11 @@ def _notify(event: str, payload: dict | None = None):
         req = urllib.request.Request(url, data=data_bytes, headers=headers, method="POST")
         with urllib.request.urlopen(req, timeout=5) as _:
             pass
-        _METRICS["notifications_sent_total"] += 1
+        NOTIFY_SENT.inc()
+        NOTIFY_SECONDS.observe(time.perf_counter() - t0, event=event, outcome="sent")
     except Exception:
-        _METRICS["notifications_failed_total"] += 1
+        NOTIFY_FAILED.inc()
+        NOTIFY_SECONDS.observe(time.perf_counter() - t0, event=event, outcome="failed")
         # swallow errors to not break API
         return
 
@@ -127,16 +141,22 @@ def healthz():
 
 @app.get("/metrics")
 def metrics():
-    # Prometheus-style minimal text
-    lines = []
-    def add(name, value):
-        lines.append(f"{name} {value}")
-    add("bot_runs_total", _METRICS.get("bot_runs_total", 0))
-    add("bot_completed_total", _METRICS.get("bot_completed_total", 0))
-    add("notifications_sent_total", _METRICS.get("notifications_sent_total", 0))
-    add("notifications_failed_total", _METRICS.get("notifications_failed_total", 0))
-    add("last_run_duration_seconds", _METRICS.get("last_run_duration_seconds", 0.0))
-    return Response(content="\n".join(str(x) for x in lines) + "\n", media_type="text/plain")
+    # Prometheus text exposition (HELP/TYPE, labels, histograms) from the shared registry
+    return Response(content=REGISTRY.expose(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.middleware("http")
+async def _http_metrics(request: Request, call_next):
+    # Per-route latency and status; the route template keeps label cardinality bounded
+    t0 = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = getattr(request.scope.get("route"), "path", None) or "unmatched"
+        HTTP_SECONDS.observe(time.perf_counter() - t0, method=request.method, route=route)
+        HTTP_REQUESTS.inc(method=request.method, route=route, status=status)
 
 # Ensure uploads directory exists
 UPLOAD_DIR = os.path.join(os.getcwd(), "uploads")
@@ -156,24 +176,41 @@ app.add_middleware(
     allow_origins=allow_origins,
     allow_credentials=True,  # needed so browser sends cookies
     allow_methods=["GET", "POST"],
-    allow_headers=["Content-Type"],
+    allow_headers=["Content-Type", "If-None-Match"],
+    expose_headers=["ETag", "X-Config-Version"],
 )
 
 # Single bot instance (headless)
 bot = TTDBookingBot(root=None)
 
 # Load persisted general flags into bot on startup
+def _apply_general(g):
+    # Behavior flags from the config "general" section -> running bot
+    try:
+        bot.respect_existing = bool(g.get("respect_existing", True))
+        v = int(g.get("aadhaar_autofill_wait_seconds", 6))
+        bot.aadhaar_autofill_wait_seconds = max(1, min(v, 30))
+        bot.batch_fill = bool(g.get("batch_fill", True))
+        bot.event_waits = bool(g.get("event_waits", True))
+        bot.logs.set_level(g.get("log_level") or os.getenv("TTD_LOG_LEVEL") or "info")
+        bot.logs.jsonl_path = g.get("log_file") or os.getenv("TTD_LOG_JSONL") or None
+        bot.screens.configure(g.get("screenshot_interval"), g.get("screenshot_max_width"),
+                              g.get("screenshot_format"), g.get("screenshot_quality"))
+    except Exception:
+        pass
+
+def _on_config_reload(snap):
+    # Hot reload: the watcher (or a write) published a new version that parsed cleanly
+    _apply_general(snap.general)
+    bot.log_message("Config reloaded (version %d).", snap.version, event="config.reload")
+
 try:
-    import json
-    # Prefer env-provided config path if present
-    _cfg_path = os.getenv("TTD_CONFIG_PATH") or "srivari_group_data.json"
-    if os.path.exists(_cfg_path):
-        with open(_cfg_path, "r", encoding="utf-8") as f:
-            cfg = json.load(f) or {}
-            g = (cfg.get("general") or {})
-            bot.respect_existing = bool(g.get("respect_existing", True))
-            v = int(g.get("aadhaar_autofill_wait_seconds", 6))
-            bot.aadhaar_autofill_wait_seconds = max(1, min(v, 30))
+    # Config store honours TTD_CONFIG_PATH; this parse is shared with every later reader
+    _snap = bot.config_store.get()
+    if _snap.source:
+        _apply_general(_snap.general)
+    bot.config_store.add_listener(_on_config_reload)
+    bot.start_config_watch()
 except Exception:
     pass
 
@@ -181,19 +218,20 @@ except Exception:
 TIMER = {
     "start": None,   # float epoch seconds
     "end": None,     # float epoch seconds
-    "last_seq": 0,   # last processed log seq
 }
 
+# Per-phase duration histograms across runs (fed by the bot's RunPhases events); the last
+# 1000 samples per phase are kept for p50/p95/p99
+PHASE_BUCKETS = (0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300, 600)
+PHASE_SECONDS = REGISTRY.histogram("bot_phase_duration_seconds", "Run phase durations", ("phase",), buckets=PHASE_BUCKETS)
+_PHASE_HIST: dict = {}
+_PHASE_LOCK = threading.Lock()  # the bot thread writes _PHASE_HIST while API threads read it
+
 
 def _timer_start():
     # Start immediately when API /start is called
     TIMER["start"] = time.time()
     TIMER["end"] = None
-    # Reset last processed sequence so we can detect final-save from fresh
-    try:
-        TIMER["last_seq"] = bot._log_buffer[-1]["seq"] if bot._log_buffer else 0
-    except Exception:
-        TIMER["last_seq"] = 0
 
 
 def _timer_finish():
@@ -201,26 +239,60 @@ def _timer_finish():
         TIMER["end"] = time.time()
 
 
-def _timer_check_logs_for_completion():
-    # Detect the start (first fill) and completion (final reset) from logs
+def _observe_phase(rec):
+    v = float(rec["seconds"])
+    PHASE_SECONDS.observe(v, phase=rec["phase"])
+    with _PHASE_LOCK:
+        h = _PHASE_HIST.get(rec["phase"])
+        if h is None:
+            h = _PHASE_HIST[rec["phase"]] = {"count": 0, "sum": 0.0, "samples": deque(maxlen=1000)}
+        h["count"] += 1
+        h["sum"] += v
+        h["samples"].append(v)
+
+
+def _phase_hist_copy():
+    # [(phase, count, sum, samples)] copied under the lock; readers sort/iterate the copies
+    with _PHASE_LOCK:
+        return [(phase, h["count"], h["sum"], list(h["samples"])) for phase, h in _PHASE_HIST.items()]
+
+
+def _phase_quantiles(samples, qs=(0.5, 0.95, 0.99)):
+    vals = sorted(samples)
+    if not vals:
+        return {q: None for q in qs}
+    return {q: vals[min(len(vals) - 1, int(round(q * (len(vals) - 1))))] for q in qs}
+
+
+def _on_phase(ev):
+    # Typed phase events from the bot thread: feed histograms and drive the run timer
     try:
-        last_seq = TIMER.get("last_seq", 0)
-        for item in list(bot._log_buffer):
-            seq = item.get("seq", 0)
-            if seq <= last_seq:
-                continue
-            msg = (item.get("msg") or "").lower()
-            # Start timer when we begin filling team leader
-            if TIMER.get("start") is None and ("filling team leader" in msg or "srivari seva form detected" in msg):
-                TIMER["start"] = time.time()
-            # Finish timer when final reset detected
-            if "detected final form reset" in msg:
-                _timer_finish()
-            TIMER["last_seq"] = max(TIMER.get("last_seq", 0), seq)
+        if ev.get("prev"):
+            _observe_phase(ev["prev"])
+        if ev["phase"] == "leader_fill" and TIMER.get("start") is None:
+            TIMER["start"] = time.time()
+        if ev["phase"] == "continue" and ev["attrs"].get("final_saved"):
+            _timer_finish()
     except Exception:
         pass
 
 
+bot.phases.add_listener(_on_phase)
+
+
+def _phase_quantile_samples():
+    out = {}
+    for phase, _count, _sum, samples in _phase_hist_copy():
+        for q, v in _phase_quantiles(samples).items():
+            if v is not None:
+                out[(phase, q)] = v
+    return out
+
+
+REGISTRY.gauge("bot_phase_duration_quantile_seconds", "Run phase duration percentiles (last 1000 per phase)",
+               ("phase", "quantile"), fn=_phase_quantile_samples)
+
+
 class StartPayload(BaseModel):
     open_browser: bool = True
 
@@ -254,6 +326,15 @@ class General(BaseModel):
     auto_download_ticket: Optional[bool] = None
     respect_existing: Optional[bool] = True
     aadhaar_autofill_wait_seconds: Optional[int] = 6
+    batch_fill: Optional[bool] = True
+    event_waits: Optional[bool] = True
+    log_level: Optional[str] = "info"   # debug | info | warning | error
+    log_file: Optional[str] = None      # optional JSON-lines log output
+    gui_log_max_lines: Optional[int] = 2000  # desktop GUI log scrollback
+    screenshot_interval: Optional[float] = 1.0   # min seconds between browser captures
+    screenshot_max_width: Optional[int] = 960
+    screenshot_format: Optional[str] = "jpeg"    # jpeg | webp | png
+    screenshot_quality: Optional[int] = 60
 
 class ConfigPayload(BaseModel):
     general: General
@@ -261,39 +342,15 @@ class ConfigPayload(BaseModel):
 
 @app.get("/status")
 def status():
-    # Update timer by scanning recent logs for the final-save message
-    _timer_check_logs_for_completion()
-    url = None
-    try:
-        if bot.driver:
-            url = bot.driver.current_url
-    except Exception:
-        url = None
-    now = time.time()
-    elapsed = None
-    if TIMER.get("start"):
-        if TIMER.get("end"):
-            elapsed = max(0.0, TIMER["end"] - TIMER["start"]) 
-        else:
-            elapsed = max(0.0, now - TIMER["start"]) 
-    return {
-        "running": bot.is_running,
-        "browser_open": bot.is_browser_open,
-        "has_driver": bot.driver is not None,
-        "url": url,
-        "timer": {
-            "started": bool(TIMER.get("start")),
-            "ended": bool(TIMER.get("end")),
-            "start": TIMER.get("start"),
-            "end": TIMER.get("end"),
-            "elapsed_seconds": elapsed,
-        },
-    }
+    # Browser fields come from the background probe's snapshot; never a WebDriver call here
+    browser = bot.browser_state.snapshot() if bot.driver else None
+    return {**_run_state(), "url": (browser or {}).get("url"), "browser": browser, "timer": _timer_state()}
 
 @app.get("/timer")
 def get_timer():
-    # On demand, also try to auto-finish if final-save was logged
-    _timer_check_logs_for_completion()
+    return _timer_state()
+
+def _timer_state():
     now = time.time()
     elapsed = None
     if TIMER.get("start"):
@@ -309,6 +366,81 @@ def get_timer():
         "elapsed_seconds": elapsed,
     }
 
+def _run_state():
+    # Flags only; no WebDriver calls so it is safe to evaluate on every stream wake-up
+    return {
+        "running": bot.is_running,
+        "browser_open": bot.is_browser_open,
+        "has_driver": bot.driver is not None,
+        "run_id": bot.tracer.current_run_id,
+        "phase": bot.phases.phase,
+    }
+
+def _sse(event, data, id=None):
+    head = f"id: {id}\n" if id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+@app.get("/stream")
+async def stream(request: Request, since: Optional[int] = None, _: bool = Depends(require_auth)):
+    # Server-sent events replacing the /logs, /status and /timer polls:
+    #   log   - one per log entry, id = seq (EventSource resumes via Last-Event-ID on reconnect)
+    #   gap   - entries were overwritten in the ring before this client read them
+    #   state - running / browser_open / run_id transitions
+    #   timer - on start/end and once a second while running
+    try:
+        seq = int(request.headers.get("last-event-id") or since or 0)
+    except ValueError:
+        seq = int(since or 0)
+    loop = asyncio.get_running_loop()
+    wake = asyncio.Event()
+
+    def notify(_item):
+        loop.call_soon_threadsafe(wake.set)
+
+    async def events():
+        nonlocal seq
+        last_state = last_timer = None
+        last_sent = time.time()
+        bot._log_buffer.subscribe(notify)
+        try:
+            yield "retry: 2000\n\n"
+            while not await request.is_disconnected():
+                wake.clear()
+                page = bot._log_buffer.since(seq, limit=200)
+                out = []
+                if page["dropped"]:
+                    out.append(_sse("gap", {"dropped": page["dropped"], "oldest": page["oldest"]}))
+                out.extend(_sse("log", item, id=item["seq"]) for item in page["items"])
+                seq = page["latest"]
+                state = _run_state()
+                if state != last_state:
+                    out.append(_sse("state", state))
+                    last_state = state
+                timer = _timer_state()
+                key = (timer["started"], timer["ended"], int(timer["elapsed_seconds"] or 0))
+                if key != last_timer:
+                    out.append(_sse("timer", timer))
+                    last_timer = key
+                now = time.time()
+                if out:
+                    yield "".join(out)
+                    last_sent = now
+                elif now - last_sent >= 15:
+                    yield ": keepalive\n\n"
+                    last_sent = now
+                if page["more"]:
+                    continue
+                try:
+                    # State flags and the timer are re-read at least once a second
+                    await asyncio.wait_for(wake.wait(), timeout=1.0)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            bot._log_buffer.unsubscribe(notify)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @app.post("/open-browser")
 def open_browser(_: bool = Depends(require_auth)):
     threading.Thread(target=bot.open_browser, daemon=True).start()
@@ -322,7 +454,7 @@ def start(payload: StartPayload | None = None, _: bool = Depends(require_auth)):
     if not bot.is_running:
         _timer_start()
         bot.start_bot()
-        _METRICS["bot_runs_total"] += 1
+        BOT_RUNS.inc()
         _notify("bot.started", {"at": TIMER.get("start")})
     return {"ok": True}
 
@@ -386,19 +518,20 @@ def stop(_: bool = Depends(require_auth)):
     _timer_finish()
     try:
         if TIMER.get("start") and TIMER.get("end"):
-            _METRICS["last_run_duration_seconds"] = max(0.0, TIMER["end"] - TIMER["start"])
-            _METRICS["bot_completed_total"] += 1
+            LAST_RUN_SECONDS.set(max(0.0, TIMER["end"] - TIMER["start"]))
+            BOT_COMPLETED.inc()
     except Exception:
         pass
-    _notify("bot.stopped", {"duration": _METRICS.get("last_run_duration_seconds")})
+    _notify("bot.stopped", {"duration": LAST_RUN_SECONDS.get()})
     return {"ok": True}
 
 @app.post("/close-browser")
-def close_browser(_: bool = Depends(require_auth)):
+async def close_browser(_: bool = Depends(require_auth)):
     try:
-        if bot.driver:
+        drv = bot.driver
+        if drv:
             try:
-                bot.driver.quit()
+                await bot.webdriver.run(drv.quit, priority=DRIVER_NORMAL, timeout=20)
             except Exception:
                 pass
         bot.driver = None
@@ -410,48 +543,140 @@ def close_browser(_: bool = Depends(require_auth)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+async def _screen_frame():
+    # At most one capture per screenshot interval; queued behind fill commands on the WebDriver owner thread
+    frame = bot.screens.fresh()
+    if frame is None:
+        drv = bot.driver
+        if not drv:
+            raise HTTPException(status_code=409, detail="Driver not available")
+        frame = await bot.webdriver.run(lambda: bot.screens.capture(drv), priority=DRIVER_BACKGROUND)
+    return frame
+
 @app.get("/screenshot")
-def screenshot(_: bool = Depends(require_auth)):
+async def screenshot(request: Request, _: bool = Depends(require_auth)):
     try:
         if not bot.driver:
             raise HTTPException(status_code=409, detail="Driver not available")
-        data = bot.driver.get_screenshot_as_png()
-        return Response(content=data, media_type="image/png")
+        frame = await _screen_frame()
+        headers = {"ETag": frame["etag"], "Cache-Control": "no-cache"}
+        if request.headers.get("if-none-match") == frame["etag"]:
+            return Response(status_code=304, headers=headers)
+        return Response(content=frame["data"], media_type=frame["mime"], headers=headers)
     except HTTPException:
         raise
+    except TimeoutException:
+        # Browser busy: serve the last frame rather than failing the preview
+        frame = bot.screens.latest()
+        if frame is None:
+            raise HTTPException(status_code=503, detail="Browser busy; screenshot timed out")
+        return Response(content=frame["data"], media_type=frame["mime"], headers={"ETag": frame["etag"]})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/screenshot/stream")
+async def screenshot_stream(request: Request, _: bool = Depends(require_auth)):
+    # MJPEG-style multipart stream: a part is sent only when the frame changes (plus every 10 s
+    # so proxies keep the connection), never faster than the screenshot interval
+    boundary = "frame"
+
+    async def parts():
+        last_etag, last_sent = None, 0.0
+        while not await request.is_disconnected():
+            try:
+                frame = await _screen_frame() if bot.driver else None
+            except Exception:
+                frame = None
+            now = time.time()
+            if frame and (frame["etag"] != last_etag or now - last_sent >= 10):
+                head = f"--{boundary}\r\nContent-Type: {frame['mime']}\r\nContent-Length: {len(frame['data'])}\r\n\r\n"
+                yield head.encode() + frame["data"] + b"\r\n"
+                last_etag, last_sent = frame["etag"], now
+            await asyncio.sleep(bot.screens.interval)
+
+    return StreamingResponse(parts(), media_type=f"multipart/x-mixed-replace; boundary={boundary}",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @app.get("/current-url")
 def current_url(_: bool = Depends(require_auth)):
-    try:
-        if not bot.driver:
-            return {"url": None}
-        return {"url": bot.driver.current_url}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    if not bot.driver:
+        return {"url": None}
+    snap = bot.browser_state.snapshot()
+    return {"url": snap.get("url"), "title": snap.get("title"), "alive": snap.get("alive"), "age_seconds": snap.get("age_seconds")}
 
 @app.get("/logs")
-def logs(since: int = 0, _: bool = Depends(require_auth)):
-    # Return buffered logs newer than sequence 'since' and also update timer state if final-save seen
-    items = []
-    latest = since
+def logs(since: int = 0, limit: int = 500, _: bool = Depends(require_auth)):
+    # Return buffered logs newer than sequence 'since'.
+    # 'more' means another page is ready; 'dropped' counts entries lost to the ring before this client caught up.
     try:
-        for item in list(bot._log_buffer):
-            seq = item.get("seq", 0)
-            if seq > since:
-                items.append(item)
-                latest = max(latest, seq)
+        page = bot._log_buffer.since(since, limit=max(1, min(limit, bot._log_buffer.capacity)))
     except Exception:
-        pass
-    # Update timer by checking any new logs since last check
-    _timer_check_logs_for_completion()
-    return {"items": items, "latest": latest}
+        page = {"items": [], "latest": since, "oldest": None, "dropped": 0, "more": False}
+    return {k: page[k] for k in ("items", "latest", "oldest", "dropped", "more")}
+
+@app.get("/runs")
+def runs(limit: int = 20, _: bool = Depends(require_auth)):
+    # Recent runs with per-phase durations, the current phase, and per-phase percentiles across runs
+    history = list(bot.phases.history)[-max(1, min(limit, 50)):]
+    stats = {}
+    for phase, count, total, samples in _phase_hist_copy():
+        q = _phase_quantiles(samples)
+        stats[phase] = {
+            "count": count,
+            "mean": round(total / count, 4) if count else None,
+            "p50": q[0.5], "p95": q[0.95], "p99": q[0.99],
+        }
+    return {"current": bot.phases.current(), "runs": list(reversed(history)), "phases": stats}
+
+@app.get("/runs/journal")
+def run_journal(_: bool = Depends(require_auth)):
+    # Replayed crash-recovery journal: progress of the latest group run and where a restart resumes
+    st = bot.journal.state()
+    resume = bot.journal.resume_point(st["key"]) if st else None
+    return {"run": st, "resume": resume, "path": bot.journal.path, "stats": dict(bot.journal.stats)}
+
+@app.get("/runs/{run_id}/trace")
+def run_trace(run_id: str, format: str = "json", _: bool = Depends(require_auth)):
+    # Per-member / per-field spans for a run; format=chrome gives trace-event JSON for chrome://tracing
+    if format == "chrome":
+        data = bot.tracer.to_chrome(run_id)
+    else:
+        data = bot.tracer.get(run_id)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+    if format == "chrome":
+        import json as _json
+        return Response(content=_json.dumps(data), media_type="application/json",
+                        headers={"Content-Disposition": f"attachment; filename=trace_{run_id}.json"})
+    return data
+
+@app.get("/tuning/delays")
+def tuning_delays(_: bool = Depends(require_auth)):
+    # Current self-tuned UI delays (open / post_select / key) and recent adjustments
+    return bot.delays.snapshot()
+
+@app.get("/dropdown-timings")
+def dropdown_timings(limit: int = 50, _: bool = Depends(require_auth)):
+    # Most recent per-selection dropdown timings (open / snapshot / select phases)
+    items = list(bot.dropdown_timings)[-max(1, min(limit, 200)):]
+    return {"items": items}
 
 @app.get("/config")
-def get_config(_: bool = Depends(require_auth)):
-    cfg = bot.load_srivari_source()
-    return cfg
+def get_config(request: Request, _: bool = Depends(require_auth)):
+    # Serialized and hashed once per config version; the content-hash ETag lets pollers send
+    # If-None-Match, and a cached tag from before an API restart cannot match different content
+    snap, text, etag = bot.config_store.tagged()
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=text, media_type="application/json",
+                    headers={"ETag": etag, "X-Config-Version": str(snap.version)})
+
+@app.get("/config/version")
+def get_config_version(_: bool = Depends(require_auth)):
+    snap = bot.config_store.get()
+    return {"version": snap.version, "path": snap.path, "source": snap.source,
+            "loaded_at": snap.loaded_at, "error": snap.error,
+            "watch": {"mode": bot.config_watch.mode, **bot.config_watch.stats}}
 
 @app.post("/config/path")
 def set_config_path(path: str, _: bool = Depends(require_auth)):
@@ -465,12 +690,8 @@ def set_config_path(path: str, _: bool = Depends(require_auth)):
         if not _os.path.exists(resolved):
             raise HTTPException(status_code=400, detail="Config file not found")
         _os.environ["TTD_CONFIG_PATH"] = resolved
-        # Trigger immediate reload for any watchers
-        try:
-            bot._members_file = resolved
-            bot._members_mtime = _os.path.getmtime(resolved)
-        except Exception:
-            pass
+        # Re-read on the next access; watchers see the version bump if the content differs
+        bot.config_store.invalidate()
         bot.log_message(f"Config path updated to: {resolved}")
         return {"ok": True, "path": resolved}
     except HTTPException:
@@ -485,22 +706,12 @@ def set_config(payload: ConfigPayload, _: bool = Depends(require_auth)):
         "members": [m.model_dump(exclude_none=True) for m in (payload.members or [])],
     }
     try:
-        # Write to configured path if provided
-        import os
-        cfg_path = os.getenv("TTD_CONFIG_PATH") or os.path.join(os.getcwd(), "srivari_group_data.json")
-        with open(cfg_path, "w", encoding="utf-8") as f:
-            import json
-            json.dump(data, f, indent=2)
+        # Write to configured path (atomic; the store swaps its snapshot without re-reading)
+        cfg_path = os.path.abspath(bot.config_store.write(data))
         # Apply behavior flags immediately to running bot
-        try:
-            g = data.get("general", {})
-            bot.respect_existing = bool(g.get("respect_existing", True))
-            v = int(g.get("aadhaar_autofill_wait_seconds", 6))
-            bot.aadhaar_autofill_wait_seconds = max(1, min(v, 30))
-        except Exception:
-            pass
+        _apply_general(data.get("general", {}))
         bot.log_message("Configuration updated via API.")
-        return {"ok": True, "path": cfg_path}
+        return {"ok": True, "path": cfg_path, "version": bot.config_store.version}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -524,79 +735,322 @@ async def upload_photo(file: UploadFile = File(...)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/import-csv")
-async def import_csv(file: UploadFile = File(...), _: bool = Depends(require_auth)):
+# Roster import: CSV / XLSX / JSON lines, read row by row from the (disk-spooled) upload
+IMPORT_FIELDS = ("name","dob","age","blood_group","gender","id_proof_type","id_number","mobile","email","state","district","city","street","doorno","pincode","nearest_ttd_temple","photo")
+IMPORT_MAX_PAGE = 1000
+IMPORT_MAX_ERRORS = 200
+_IMPORT_ALIASES = {
+    "idproof": "id_proof_type", "idprooftype": "id_proof_type", "idtype": "id_proof_type",
+    "aadhaar": "id_number", "aadhar": "id_number", "aadharno": "id_number", "aadhar_number": "id_number", "aadhaarno": "id_number",
+    "doorno": "doorno", "doornumber": "doorno", "door_no": "doorno",
+    "bloodgroup": "blood_group", "blood_grp": "blood_group",
+    "nearestattdtemple": "nearest_ttd_temple", "nearestttdtemple": "nearest_ttd_temple",
+    "mailid": "email", "pin": "pincode",
+}
+_IMPORT_GENDERS = {"male": "Male", "m": "Male", "female": "Female", "f": "Female", "other": "Other"}
+_IMPORT_BLOOD = ("O+","O-","A+","A-","B+","B-","AB+","AB-")
+
+def _import_keynorm(k) -> str:
+    k = ("" if k is None else str(k)).strip().lower()
+    return k.replace(" ", "").replace("-", "").replace("_", "")
+
+# Canonical names in keynorm form ("ID Number", "Pin Code") plus the aliases above
+_IMPORT_HEADERS = {**{_import_keynorm(f): f for f in IMPORT_FIELDS}, **_IMPORT_ALIASES}
+
+def _import_field(k):
+    nk = _IMPORT_HEADERS.get(_import_keynorm(k))
+    if not nk:
+        ck = ("" if k is None else str(k)).lower().strip()
+        nk = ck if ck in IMPORT_FIELDS else None
+    return nk
+
+def _import_value(v) -> str:
+    # XLSX cells arrive typed: whole floats (phone/Aadhaar numbers) and dates need text forms
+    if v is None:
+        return ""
+    if isinstance(v, float) and v.is_integer():
+        v = int(v)
+    elif hasattr(v, "strftime"):
+        v = v.strftime("%Y-%m-%d")
+    return str(v).strip()
+
+def _import_lines(f, chunk_size=64 * 1024):
+    # Incremental UTF-8 (BOM-tolerant) decode; yields lines with their "\n" for csv.reader
+    dec = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    tail = ""
+    while True:
+        chunk = f.read(chunk_size)
+        text = tail + dec.decode(chunk or b"", final=not chunk)
+        parts = text.split("\n")
+        tail = parts.pop()
+        for p in parts:
+            yield p + "\n"
+        if not chunk:
+            if tail:
+                yield tail
+            return
+
+def _import_csv_rows(f):
+    reader = csv.reader(_import_lines(f))
+    header = next(reader, None) or []
+    cols = {i: k for i, k in ((i, _import_field(h)) for i, h in enumerate(header)) if k}
+    for row in reader:
+        item = {}
+        for i, v in enumerate(row):
+            k = cols.get(i)
+            if k:
+                v = _import_value(v)
+                if v != "":
+                    item[k] = v
+        yield reader.line_num, item, None
+
+def _import_jsonl_rows(f):
+    keys = {}
+    for n, line in enumerate(_import_lines(f), start=1):
+        if not line.strip():
+            continue
+        try:
+            obj = json.loads(line)
+            if not isinstance(obj, dict):
+                raise ValueError("expected a JSON object")
+        except Exception as e:
+            yield n, {}, [f"invalid JSON: {e}"]
+            continue
+        item = {}
+        for k, v in obj.items():
+            if k not in keys:
+                keys[k] = _import_field(k)
+            if keys[k]:
+                v = _import_value(v)
+                if v != "":
+                    item[keys[k]] = v
+        yield n, item, None
+
+def _import_xlsx_rows(f):
+    if openpyxl is None:
+        raise HTTPException(status_code=400, detail="XLSX import needs openpyxl (pip install openpyxl)")
+    wb = openpyxl.load_workbook(f, read_only=True, data_only=True)
     try:
-        import csv, io
-        raw = await file.read()
-        text = raw.decode("utf-8-sig", errors="replace")
-        reader = csv.DictReader(io.StringIO(text))
-        def norm(s: str) -> str:
-            return "" if s is None else str(s).strip()
-        # header normalization map
-        def keynorm(k: str) -> str:
-            k = (k or "").strip().lower()
-            k = k.replace(" ", "").replace("-", "").replace("_", "")
-            return k
-        aliases = {
-            "idproof": "id_proof_type", "idprooftype": "id_proof_type", "idtype": "id_proof_type",
-            "aadhaar": "id_number", "aadhar": "id_number", "aadharno": "id_number", "aadhar_number": "id_number", "aadhaarno": "id_number",
-            "doorno": "doorno", "doornumber": "doorno", "door_no": "doorno",
-            "bloodgroup": "blood_group", "blood_grp": "blood_group",
-            "nearestattdtemple": "nearest_ttd_temple", "nearestttdtemple": "nearest_ttd_temple",
-        }
-        allowed = {"name","dob","age","blood_group","gender","id_proof_type","id_number","mobile","email","state","district","city","street","doorno","pincode","nearest_ttd_temple","photo"}
-        members = []
-        for row in reader:
+        rows = wb.active.iter_rows(values_only=True)
+        header = next(rows, None) or ()
+        cols = {i: k for i, k in ((i, _import_field(h)) for i, h in enumerate(header)) if k}
+        for n, row in enumerate(rows, start=2):
             item = {}
-            for k, v in (row or {}).items():
-                nk = aliases.get(keynorm(k), None)
-                if not nk:
-                    # map exact canonical if already valid
-                    ck = k.lower().strip()
-                    if ck in allowed:
-                        nk = ck
-                if nk in allowed:
-                    val = norm(v)
-                    if val != "":
-                        item[nk] = val
-            if item:
-                members.append(item)
-            if len(members) >= 100:  # server-side limit
-                break
-        return {"ok": True, "members": members}
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"CSV parse error: {e}")
+            for i, v in enumerate(row):
+                k = cols.get(i)
+                if k:
+                    v = _import_value(v)
+                    if v != "":
+                        item[k] = v
+            yield n, item, None
+    finally:
+        wb.close()
 
-@app.get("/export/csv")
-def export_csv(_: bool = Depends(require_auth)):
+_IMPORT_READERS = {"csv": _import_csv_rows, "jsonl": _import_jsonl_rows, "xlsx": _import_xlsx_rows}
+
+def _import_kind(filename, content_type):
+    name = (filename or "").lower()
+    ctype = (content_type or "").lower()
+    if name.endswith((".xlsx", ".xlsm")) or "spreadsheetml" in ctype:
+        return "xlsx"
+    if name.endswith((".jsonl", ".ndjson")) or "ndjson" in ctype or "jsonl" in ctype:
+        return "jsonl"
+    return "csv"
+
+def _validate_member(item):
+    # Light checks matching what the form accepts; fixes casing, reports everything else
+    errors = []
+    if not item.get("name"):
+        errors.append("name is required")
+    g = item.get("gender")
+    if g:
+        if g.lower() in _IMPORT_GENDERS:
+            item["gender"] = _IMPORT_GENDERS[g.lower()]
+        else:
+            errors.append(f"gender '{g}' not one of Male/Female/Other")
+    bg = item.get("blood_group")
+    if bg:
+        bg = bg.upper().replace(" ", "").replace("POSITIVE", "+").replace("NEGATIVE", "-").replace("VE", "")
+        if bg in _IMPORT_BLOOD:
+            item["blood_group"] = bg
+        else:
+            errors.append(f"blood_group '{item['blood_group']}' not recognised")
+    id_no = item.get("id_number")
+    if id_no and (item.get("id_proof_type") or "Aadhaar").lower().startswith("aadha"):
+        digits = "".join(ch for ch in id_no if ch.isdigit())
+        if len(digits) != 12 or len(digits) != len(id_no.replace(" ", "").replace("-", "")):
+            errors.append("id_number is not a 12-digit Aadhaar number")
+    mobile = item.get("mobile")
+    if mobile:
+        digits = "".join(ch for ch in mobile if ch.isdigit())
+        if len(digits) == 12 and digits.startswith("91"):
+            digits = digits[2:]
+        if len(digits) == 10:
+            item["mobile"] = digits  # the form takes the bare number: no +91, spaces or dashes
+        else:
+            errors.append("mobile is not a 10-digit number")
+    if item.get("email") and "@" not in item["email"]:
+        errors.append("email is not an address")
+    pin = item.get("pincode")
+    if pin and not (pin.isdigit() and len(pin) == 6):
+        errors.append("pincode is not 6 digits")
+    return errors
+
+@app.post("/import-csv")
+def import_csv(file: UploadFile = File(...), offset: int = 0, limit: int = 100, _: bool = Depends(require_auth)):
+    # Parses the upload row by row (Starlette spools large uploads to disk); only one page of
+    # rows [offset, offset + limit) is kept, while the counts cover the whole file
+    offset = max(0, offset)
+    limit = max(1, min(limit, IMPORT_MAX_PAGE))
+    kind = _import_kind(file.filename, file.content_type)
+    members, errors = [], []
+    rows = valid = invalid = 0
     try:
-        import csv, io
-        cfg = bot.load_srivari_source() or {}
-        members = cfg.get("members", []) or []
-        headers = ["name","dob","age","blood_group","gender","id_proof_type","id_number","mobile","email","state","district","city","street","doorno","pincode","nearest_ttd_temple","photo"]
-        buf = io.StringIO()
-        writer = csv.DictWriter(buf, fieldnames=headers, extrasaction="ignore")
-        writer.writeheader()
-        for m in members:
-            try:
-                writer.writerow({h: (m.get(h) or "") for h in headers})
-            except Exception:
-                pass
-        data = buf.getvalue()
-        return Response(content=data, media_type="text/csv", headers={"Content-Disposition": "attachment; filename=srivari_members.csv"})
+        for line, item, row_errors in _IMPORT_READERS[kind](file.file):
+            if not item and not row_errors:
+                continue
+            idx = rows
+            rows += 1
+            row_errors = row_errors or _validate_member(item)
+            if row_errors:
+                invalid += 1
+            else:
+                valid += 1
+            if offset <= idx < offset + limit:
+                if row_errors:
+                    if len(errors) < IMPORT_MAX_ERRORS:
+                        # The parsed row comes back with its errors so the editor can offer it for fixing
+                        errors.append({"row": line, "index": idx, "name": item.get("name"), "errors": row_errors,
+                                       "member": item})
+                else:
+                    members.append(item)
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=400, detail=f"{kind.upper()} parse error: {e}")
+    return {
+        "ok": True, "format": kind, "members": members, "errors": errors,
+        "offset": offset, "limit": limit, "next_offset": offset + limit if rows > offset + limit else None,
+        "total_rows": rows, "valid": valid, "invalid": invalid,
+    }
 
-@app.get("/export/json")
-def export_json(_: bool = Depends(require_auth)):
+# Exports: streamed from the cached config snapshot, optionally gzipped, projected and filtered
+EXPORT_CHUNK = 64 * 1024
+EXPORT_STATUSES = ("pending", "in_progress", "filled", "saved")
+
+def _export_members(snap, group=None, status=None):
+    # (member, group, status) in order; group = consecutive chunks of general.group_size (max 10),
+    # status = progress of the current run from the crash-recovery journal
+    members = snap.members
     try:
-        import json as _json
-        cfg = bot.load_srivari_source() or {}
-        data = _json.dumps(cfg, indent=2)
-        return Response(content=data, media_type="application/json", headers={"Content-Disposition": "attachment; filename=srivari_config.json"})
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        size = max(1, min(int(snap.general.get("group_size") or 10), 10))
+    except Exception:
+        size = 10
+    progress = {}
+    try:
+        st = bot.journal.state()
+        if st and not st["finished"] and st["key"] == bot._journal_key(members):
+            progress = st["members"]
+    except Exception:
+        progress = {}
+    for i, m in enumerate(members):
+        g = i // size + 1
+        if group is not None and g != group:
+            continue
+        p = progress.get(i + 1)
+        s = "pending" if not p else "saved" if p["saved"] else "filled" if p["filled"] else "in_progress"
+        if status and s not in status:
+            continue
+        yield m, g, s
+
+def _export_stream(pieces, gzip=False):
+    # Coalesce small pieces into ~64 KB chunks; gzip incrementally when asked
+    z = zlib.compressobj(6, zlib.DEFLATED, 31) if gzip else None
+    buf, size = [], 0
+    for piece in pieces:
+        buf.append(piece)
+        size += len(piece)
+        if size >= EXPORT_CHUNK:
+            data = "".join(buf).encode("utf-8")
+            buf, size = [], 0
+            data = z.compress(data) if z else data
+            if data:
+                yield data
+    data = "".join(buf).encode("utf-8")
+    if z:
+        data = z.compress(data) + z.flush()
+    if data:
+        yield data
+
+def _export_params(fields, status, default_fields):
+    cols = [f.strip() for f in fields.split(",") if f.strip()] if fields else list(default_fields)
+    statuses = {s.strip() for s in status.split(",") if s.strip()} if status else None
+    bad = [s for s in statuses or () if s not in EXPORT_STATUSES]
+    if bad:
+        raise HTTPException(status_code=400, detail=f"Unknown status {bad}; use {', '.join(EXPORT_STATUSES)}")
+    return cols, statuses
+
+def _export_response(body, media_type, filename, gzip):
+    if gzip:
+        media_type, filename = "application/gzip", filename + ".gz"
+    return StreamingResponse(body, media_type=media_type, headers={
+        "Content-Disposition": f"attachment; filename={filename}",
+        "X-Config-Version": str(bot.config_store.version),
+    })
+
+@app.get("/export/csv")
+def export_csv(fields: Optional[str] = None, group: Optional[int] = None, status: Optional[str] = None,
+               gzip: bool = False, _: bool = Depends(require_auth)):
+    # fields: comma list of member keys (plus "group"/"status"); status: comma list of EXPORT_STATUSES
+    cols, statuses = _export_params(fields, status, IMPORT_FIELDS)
+    unknown = [c for c in cols if c not in IMPORT_FIELDS and c not in ("group", "status")]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields {unknown}")
+    snap = bot.config_store.get()
+
+    def rows():
+        out = io.StringIO()
+        writer = csv.writer(out)
+        writer.writerow(cols)
+        for m, g, s in _export_members(snap, group, statuses):
+            extra = {"group": g, "status": s}
+            writer.writerow([extra[c] if c in extra else (m.get(c) or "") for c in cols])
+            yield out.getvalue()
+            out.seek(0)
+            out.truncate()
+        yield out.getvalue()
+
+    return _export_response(_export_stream(rows(), gzip), "text/csv", "srivari_members.csv", gzip)
+
+@app.get("/export/json")
+def export_json(fields: Optional[str] = None, group: Optional[int] = None, status: Optional[str] = None,
+                gzip: bool = False, _: bool = Depends(require_auth)):
+    # Same document as before ({"general", "members", ...}), written member by member
+    cols, statuses = _export_params(fields, status, ())
+    snap = bot.config_store.get()
+
+    def members():
+        yield "["
+        first = True
+        for m, g, s in _export_members(snap, group, statuses):
+            if cols:
+                extra = {"group": g, "status": s}
+                m = {c: extra[c] if c in extra else m.get(c) for c in cols if c in extra or c in m}
+            yield ("\n    " if first else ",\n    ") + json.dumps(m, indent=2).replace("\n", "\n    ")
+            first = False
+        yield "]" if first else "\n  ]"
+
+    def pieces():
+        # Keys in file order; only the members array is written incrementally
+        for i, (k, v) in enumerate(snap.data.items()):
+            yield ("{\n  " if i == 0 else ",\n  ") + json.dumps(k) + ": "
+            if k == "members":
+                yield from members()
+            else:
+                yield json.dumps(v, indent=2).replace("\n", "\n  ")
+        yield "\n}"
+
+    return _export_response(_export_stream(pieces(), gzip), "application/json", "srivari_config.json", gzip)
 
 if __name__ == "__main__":
     # Run API server
@@ -0,0 +1,248 @@
+"""End-to-end fill benchmark against the local mock Srivari form.
+
+Starts bench/mock_srivari_server.py, drives TTDBookingBot.run_srivari_group_flow
+with headless Chrome over a synthetic group, and writes per-member / per-field
+timings and WebDriver round-trip counts to a JSON file:
+
+    python bench/fill_benchmark.py --members 10 --option-latency 300
+    python bench/fill_benchmark.py --baseline bench/results/fill_20261017_101500.json
+
+Each run uses a fresh temporary working directory (config, gazetteer, tuning and
+the run journal) unless --state-dir is given, in which case learned state is
+kept between runs so warm-cache behaviour can be measured.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, HERE)
+
+import mock_srivari_server  # noqa: E402
+
+
+def synthetic_members(n, seed=7, photo=None):
+    # Members drawn from the mock gazetteer, with some casing/spelling noise so
+    # the substring and fuzzy dropdown paths are exercised too
+    rnd = random.Random(seed)
+    india = mock_srivari_server.GAZETTEER["India"]
+    first = ["Rama", "Sita", "Lakshmi", "Venkata", "Srinivas", "Padma", "Anusha", "Prasad", "Kavya", "Ravi"]
+    last = ["Kumar", "Devi", "Reddy", "Naidu", "Rao", "Sharma", "Chowdary", "Varma"]
+    members = []
+    for i in range(n):
+        state = rnd.choice(sorted(india))
+        district = rnd.choice(india[state])
+        if i % 3 == 1:
+            state = state.upper()
+        if i % 4 == 2 and len(district) > 6:
+            k = rnd.randrange(2, len(district) - 2)
+            district = district[:k] + district[k + 1:]  # drop one letter
+        m = {
+            "name": f"{rnd.choice(first)} {rnd.choice(last)}",
+            "dob": f"{rnd.randint(1960, 2004)}-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}",
+            "gender": rnd.choice(["Male", "Female"]),
+            "id_proof_type": "Aadhaar",
+            "id_number": "".join(str(rnd.randint(0, 9)) for _ in range(12)),
+            "mobile": "9" + "".join(str(rnd.randint(0, 9)) for _ in range(9)),
+            "email": f"sevak{i + 1}@example.com",
+            "state": state,
+            "district": district,
+            "city": district.split()[0],
+            "street": f"{rnd.randint(1, 40)} Temple Street",
+            "doorno": f"{rnd.randint(1, 20)}-{rnd.randint(1, 99)}",
+            "pincode": str(rnd.randint(500001, 533999)),
+            "nearest_ttd_temple": rnd.choice(mock_srivari_server.TEMPLES),
+        }
+        if photo:
+            m["photo"] = photo
+        members.append(m)
+    return members
+
+
+def make_driver(headless=True, chromedriver=None):
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
+    options = Options()
+    if headless:
+        options.add_argument("--headless=new")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--window-size=1400,1000")
+    service = Service(chromedriver) if chromedriver else Service()
+    return webdriver.Chrome(service=service, options=options)
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except Exception:
+        return None
+
+
+def summarize(trace, bot, wall, saved):
+    fields = {}
+    for name, f in (trace.get("fields") or {}).items():
+        fields[name] = {
+            "count": f["count"],
+            "total_ms": round(f["seconds"] * 1000, 1),
+            "mean_ms": round(f["seconds"] * 1000 / max(1, f["count"]), 1),
+            "round_trips": f["round_trips"],
+        }
+    members = {k: {"ms": round(v["seconds"] * 1000, 1), "round_trips": v["round_trips"]}
+               for k, v in (trace.get("members") or {}).items()}
+    commands = {k: {"count": v["count"], "mean_ms": round(v["seconds"] * 1000 / max(1, v["count"]), 2)}
+                for k, v in sorted(bot.tracer.commands.items(), key=lambda kv: -kv[1]["count"])}
+    return {
+        "wall_seconds": round(wall, 3),
+        "saved_members": len(saved or []),
+        "member_fill_ms_mean": round(sum(m["ms"] for m in members.values()) / max(1, len(members)), 1),
+        "round_trips_total": sum(v["count"] for v in bot.tracer.commands.values()),
+        "members": members,
+        "fields": fields,
+        "commands": commands,
+        "dropdown_timings": list(bot.dropdown_timings),
+        "delays": bot.delays.snapshot(),
+        "element_cache": {k: v for k, v in bot.element_cache_stats().items() if k != "strategies"},
+        "webdriver": bot.webdriver.snapshot(),
+    }
+
+
+def print_report(result, baseline=None):
+    s = result["summary"]
+    print(f"wall {s['wall_seconds']:.2f}s  saved {s['saved_members']}  "
+          f"member fill mean {s['member_fill_ms_mean']:.0f} ms  round trips {s['round_trips_total']}")
+    base_fields = ((baseline or {}).get("summary") or {}).get("fields") or {}
+    print(f"{'field':28s} {'count':>5s} {'mean ms':>9s} {'rt':>6s}" + ("  delta ms" if base_fields else ""))
+    for name, f in sorted(s["fields"].items(), key=lambda kv: -kv[1]["total_ms"]):
+        line = f"{name:28s} {f['count']:5d} {f['mean_ms']:9.1f} {f['round_trips']:6d}"
+        if name in base_fields:
+            line += f"  {f['mean_ms'] - base_fields[name]['mean_ms']:+9.1f}"
+        print(line)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark run_srivari_group_flow against the local mock form")
+    ap.add_argument("--members", type=int, default=10)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--latency", type=int, default=mock_srivari_server.DEFAULTS["latency"], help="ms before a dropdown panel renders")
+    ap.add_argument("--option-latency", type=int, default=mock_srivari_server.DEFAULTS["option_latency"], help="ms before dependent lists load")
+    ap.add_argument("--autofill", action="store_true", help="simulate Aadhaar autofill of name/mobile")
+    ap.add_argument("--autofill-ms", type=int, default=mock_srivari_server.DEFAULTS["autofill_ms"])
+    ap.add_argument("--autosave-ms", type=int, default=mock_srivari_server.DEFAULTS["autosave_ms"], help="simulated operator Save click delay")
+    ap.add_argument("--autofill-wait", type=float, default=None, help="override bot.aadhaar_autofill_wait_seconds")
+    ap.add_argument("--no-batch-fill", action="store_true")
+    ap.add_argument("--no-event-waits", action="store_true")
+    ap.add_argument("--photo", action="store_true", help="upload images/1.jpg for every member")
+    ap.add_argument("--headful", action="store_true")
+    ap.add_argument("--chromedriver", default=None)
+    ap.add_argument("--state-dir", default=None, help="keep config/gazetteer/tuning here between runs")
+    ap.add_argument("--out", default=None, help="results JSON (default bench/results/fill_<ts>.json)")
+    ap.add_argument("--chrome-trace", action="store_true", help="also write the Chrome trace-event JSON")
+    ap.add_argument("--baseline", default=None, help="previous results JSON to compare against")
+    args = ap.parse_args()
+
+    out = args.out or os.path.join(HERE, "results", time.strftime("fill_%Y%m%d_%H%M%S.json"))
+    out = os.path.abspath(out)
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    workdir = os.path.abspath(args.state_dir) if args.state_dir else tempfile.mkdtemp(prefix="ttd_bench_")
+    os.makedirs(workdir, exist_ok=True)
+    photo = os.path.join(ROOT, "images", "1.jpg") if args.photo else None
+
+    cfg_path = os.path.join(workdir, "srivari_group_data.json")
+    with open(cfg_path, "w", encoding="utf-8") as f:
+        json.dump({"general": {"group_size": args.members},
+                   "members": synthetic_members(args.members, seed=args.seed, photo=photo)}, f, indent=2)
+    os.environ["TTD_CONFIG_PATH"] = cfg_path
+    # Fresh journal per run: a crashed earlier run in --state-dir must not be resumed here
+    os.environ["TTD_JOURNAL_PATH"] = os.path.join(tempfile.mkdtemp(prefix="ttd_bench_journal_"), "run_journal.jsonl")
+    os.chdir(workdir)  # crash-recovery journal stays out of the repo
+
+    server, url = mock_srivari_server.start_server(
+        latency=args.latency, option_latency=args.option_latency, autofill=int(args.autofill),
+        autofill_ms=args.autofill_ms, autosave_ms=args.autosave_ms, group_size=args.members,
+    )
+
+    from ttd_bot import TTDBookingBot, DRIVER_FILL
+    bot = TTDBookingBot(root=None)
+    bot.webdriver.set_priority(DRIVER_FILL)
+    if args.autofill_wait is not None:
+        bot.aadhaar_autofill_wait_seconds = args.autofill_wait
+    bot.batch_fill = not args.no_batch_fill
+    bot.event_waits = not args.no_event_waits
+
+    driver = make_driver(headless=not args.headful, chromedriver=args.chromedriver)
+    saved = []
+    try:
+        bot.driver = driver
+        bot.is_browser_open = True
+        bot._instrument_driver()
+        driver.get(url)
+        run_id = bot.tracer.start_run(bench=True, members=args.members)
+        bot.phases.start(run_id)
+        t0 = time.time()
+        try:
+            with bot.trace_span("wait_for_page", cat="wait"):
+                bot.wait_for_srivari_page()
+            with bot.trace_span("group_flow", cat="run"):
+                bot.run_srivari_group_flow()
+        finally:
+            bot.tracer.end_run(run_id)
+            phases = bot.phases.finish("done")
+        wall = time.time() - t0
+        try:
+            saved = driver.execute_script("return (window.__mock && window.__mock.saved) || [];")
+        except Exception:
+            saved = []
+        trace = bot.tracer.get(run_id)
+    finally:
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        server.shutdown()
+
+    result = {
+        "meta": {
+            "ts": time.time(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "args": vars(args),
+            "mock_url": url,
+        },
+        "summary": summarize(trace, bot, wall, saved),
+        "phases": phases["phases"] if phases else [],
+        "saved": saved,
+    }
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    if args.chrome_trace:
+        with open(out.replace(".json", ".trace.json"), "w", encoding="utf-8") as f:
+            json.dump(bot.tracer.to_chrome(run_id), f)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+    print(f"Results written to {out}")
+    if len(saved) < args.members:
+        print("Not every member was saved; last log lines:")
+        bot.logs.flush()
+        for item in list(bot._log_buffer)[-15:]:
+            print(f"  {item.get('ts')} {item.get('msg')}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,332 @@
+"""Local stand-in for the Srivari Seva Team Leader / Sevak form.
+
+Mirrors the element IDs and XPaths in TTDBookingBot.get_srivari_xpaths() so the
+fill pipeline can be exercised and benchmarked without the live portal.
+
+    python bench/mock_srivari_server.py --port 8765 --option-latency 300
+
+Page behaviour is configured through query parameters (or the CLI defaults):
+latency (ms before a dropdown panel renders), option_latency (ms before a
+dependent State/District list loads), autofill / autofill_ms (Aadhaar autofill
+of name, DOB and mobile), autosave_ms (simulated operator click on "Save and Add
+Sevak" once the required fields are complete; -1 disables), group_size, and
+server_latency (ms added to every HTTP response).
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+DEFAULTS = {
+    "latency": 40,
+    "option_latency": 250,
+    "autofill": 0,
+    "autofill_ms": 600,
+    "autosave_ms": 300,
+    "group_size": 10,
+    "server_latency": 0,
+}
+
+GAZETTEER = {
+    "India": {
+        "Andhra Pradesh": ["Anantapur", "Chittoor", "East Godavari", "Guntur", "Krishna", "Kurnool",
+                           "Nellore", "Prakasam", "Srikakulam", "Visakhapatnam", "Vizianagaram",
+                           "West Godavari", "Y.S.R. Kadapa", "Tirupati"],
+        "Telangana": ["Adilabad", "Hyderabad", "Karimnagar", "Khammam", "Mahabubnagar",
+                      "Medchal Malkajgiri", "Nalgonda", "Nizamabad", "Rangareddy", "Sangareddy",
+                      "Warangal"],
+        "Karnataka": ["Bagalkot", "Ballari", "Belagavi", "Bengaluru Rural", "Bengaluru Urban",
+                      "Kolar", "Mysuru", "Tumakuru"],
+        "Tamil Nadu": ["Chennai", "Coimbatore", "Madurai", "Salem", "Tiruchirappalli", "Vellore"],
+    },
+    "Nepal": {
+        "Bagmati": ["Kathmandu", "Lalitpur"],
+    },
+}
+
+TEMPLES = [
+    "SV Temple, Jubilee Hills, Hyderabad",
+    "SV Temple, Himayatnagar, Hyderabad",
+    "SV Temple, T Nagar, Chennai",
+    "SV Temple, Vyalikaval, Bengaluru",
+    "SV Temple, Amaravati",
+    "SV Temple, Visakhapatnam",
+    "Sri Padmavathi Ammavari Temple, Tiruchanoor",
+]
+
+ID_TYPES = ["Aadhaar", "PAN", "Driving License", "Voter ID", "Passport"]
+
+PAGE = """<!doctype html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Srivari Seva - Team Leader (mock)</title>
+<style>
+  body { font-family: sans-serif; font-size: 13px; }
+  .row { margin: 4px 0; }
+  .dd { position: relative; display: inline-block; }
+  .dd ul { position: absolute; top: 100%; left: 0; z-index: 10; background: #fff; border: 1px solid #999;
+           max-height: 220px; overflow: auto; margin: 0; padding: 0; list-style: none; min-width: 260px; }
+  .dd li { padding: 2px 6px; cursor: pointer; }
+  .dd li.active { background: #def; }
+  #photoFile { position: absolute; opacity: 0; width: 1px; height: 1px; }
+  #photoImg { width: 48px; height: 48px; background: #ccc; display: block; }
+</style>
+</head>
+<body>
+<div id="__next"><div><main>
+<div><div>
+  <div>
+    <div>
+      <div><div><div>
+        <img id="photoImg" alt="photo" src="data:image/gif;base64,R0lGODlhAQABAAAAACw=">
+        <div class="gender">
+          <label><input type="radio" name="gender" value="Male"> Male</label>
+          <label><input type="radio" name="gender" value="Female"> Female</label>
+        </div>
+      </div></div></div>
+      <input type="file" id="photoFile" accept="image/*">
+      <h2>Team Leader Details</h2>
+      <div class="row"><span class="dd"><input id="idType" readonly placeholder="ID Proof"></span>
+        <input id="idNumber" placeholder="ID Number"></div>
+      <div class="row"><input id="sevakName" placeholder="Name">
+        <input id="dob" placeholder="DD/MM/YYYY" maxlength="10">
+        <input id="age" placeholder="Age"></div>
+      <div class="row"><input id="mobileNo" placeholder="Mobile"> <input id="email" placeholder="E-mail"></div>
+      <div id="fitness"><div>
+        <label><input type="checkbox" id="mentally"> I am mentally fit</label>
+        <label><input type="checkbox" id="physically"> I am physically fit</label>
+      </div></div>
+      <h3>Address</h3>
+      <div class="row"><span class="dd"><input id="country" readonly placeholder="Country"></span>
+        <span class="dd"><input id="state" readonly placeholder="State"></span>
+        <span class="dd"><input id="district" readonly placeholder="District"></span></div>
+      <div class="row"><input id="city" placeholder="City"> <input id="street" placeholder="Street">
+        <input id="doorNo" placeholder="Door No"> <input id="pincode" placeholder="Pincode"></div>
+      <div class="row"><span class="dd"><input id="nearestTtdTemple" readonly placeholder="Nearest TTD Temple"></span></div>
+    </div>
+    <div><button id="saveAdd" type="button"><span>Save and Add Sevak</span></button> <span id="savedCount">0</span> saved</div>
+  </div>
+  <button id="continueBtn" type="button" disabled>Continue</button>
+</div></div>
+</main></div></div>
+<script>
+const CFG = __CONFIG__;
+const DATA = __DATA__;
+window.__mock = {saved: [], events: [], cfg: CFG};
+const $ = (id) => document.getElementById(id);
+const textIds = ['idNumber', 'sevakName', 'dob', 'age', 'mobileNo', 'email', 'city', 'street', 'doorNo', 'pincode'];
+const ddIds = ['idType', 'country', 'state', 'district', 'nearestTtdTemple'];
+const required = ['idType', 'idNumber', 'sevakName', 'dob', 'mobileNo', 'email', 'country', 'state', 'district', 'nearestTtdTemple'];
+const loaded = {state: false, district: false};
+let loadTimers = {};
+
+function setValue(el, v) {
+  el.value = v;
+  el.dispatchEvent(new Event('input', {bubbles: true}));
+  el.dispatchEvent(new Event('change', {bubbles: true}));
+}
+
+function optionsFor(id) {
+  if (id === 'idType') return DATA.id_types;
+  if (id === 'country') return Object.keys(DATA.gazetteer);
+  if (id === 'state') return loaded.state ? Object.keys(DATA.gazetteer[$('country').value] || {}) : [];
+  if (id === 'district') return loaded.district ? ((DATA.gazetteer[$('country').value] || {})[$('state').value] || []) : [];
+  if (id === 'nearestTtdTemple') return DATA.temples;
+  return [];
+}
+
+function scheduleLoad(id) {
+  loaded[id] = false;
+  clearTimeout(loadTimers[id]);
+  loadTimers[id] = setTimeout(() => { loaded[id] = true; if (openDd && openDd.id === id) openDd.render(); }, CFG.option_latency);
+}
+
+let openDd = null;
+function makeDropdown(id) {
+  const inp = $(id);
+  const ul = document.createElement('ul');
+  ul.setAttribute('role', 'listbox');
+  ul.className = 'options';
+  ul.style.display = 'none';
+  inp.parentElement.appendChild(ul);
+  let active = -1;
+  const dd = {id: id, inp: inp, ul: ul};
+  dd.render = () => {
+    ul.innerHTML = '';
+    optionsFor(id).forEach((t, i) => {
+      const li = document.createElement('li');
+      li.setAttribute('role', 'option');
+      li.textContent = t;
+      if (i === active) li.className = 'active';
+      li.addEventListener('click', () => dd.pick(t));
+      ul.appendChild(li);
+    });
+  };
+  dd.open = () => {
+    if (openDd && openDd !== dd) openDd.close();
+    openDd = dd;
+    active = -1;
+    ul.innerHTML = '';
+    ul.style.display = 'block';
+    setTimeout(() => { if (openDd === dd) dd.render(); }, CFG.latency);
+  };
+  dd.close = () => { ul.style.display = 'none'; if (openDd === dd) openDd = null; };
+  dd.pick = (t) => {
+    setValue(inp, t);
+    dd.close();
+    if (id === 'country') { setValue($('state'), ''); setValue($('district'), ''); scheduleLoad('state'); }
+    if (id === 'state') { setValue($('district'), ''); scheduleLoad('district'); }
+  };
+  inp.addEventListener('click', () => { if (ul.style.display === 'none') dd.open(); else dd.close(); });
+  inp.addEventListener('keydown', (e) => {
+    const opts = optionsFor(id);
+    if (e.key === 'ArrowDown') {
+      if (ul.style.display === 'none') dd.open();
+      active = Math.min(opts.length - 1, active + 1);
+      dd.render();
+      e.preventDefault();
+    } else if (e.key === 'Enter') {
+      if (active >= 0 && opts[active]) dd.pick(opts[active]);
+      e.preventDefault();
+    } else if (e.key === 'Escape') {
+      dd.close();
+    }
+  });
+  return dd;
+}
+const dropdowns = {};
+ddIds.forEach((id) => { dropdowns[id] = makeDropdown(id); });
+document.addEventListener('mousedown', (e) => {
+  if (openDd && !openDd.inp.parentElement.contains(e.target)) openDd.close();
+});
+
+// DOB input mask: digits only, slashes inserted as you type
+$('dob').addEventListener('input', () => {
+  const el = $('dob');
+  const d = (el.value || '').replace(/\\D/g, '').slice(0, 8);
+  let out = d.slice(0, 2);
+  if (d.length > 2) out += '/' + d.slice(2, 4);
+  if (d.length > 4) out += '/' + d.slice(4);
+  if (el.value !== out) el.value = out;
+});
+
+// Optional Aadhaar-driven autofill
+let autofillTimer = null;
+$('idNumber').addEventListener('input', () => {
+  const v = ($('idNumber').value || '').replace(/\\D/g, '');
+  clearTimeout(autofillTimer);
+  if (CFG.autofill && v.length === 12) {
+    autofillTimer = setTimeout(() => {
+      setValue($('sevakName'), 'Autofilled ' + v.slice(-4));
+      setValue($('mobileNo'), '9' + v.slice(0, 9));
+    }, CFG.autofill_ms);
+  }
+});
+
+function isComplete() {
+  return required.every((id) => ($(id).value || '').trim() !== '') && $('mentally').checked && $('physically').checked;
+}
+
+function save() {
+  if (!isComplete()) { window.__mock.events.push({t: Date.now(), type: 'save_rejected'}); return false; }
+  const rec = {};
+  textIds.concat(ddIds).forEach((id) => { rec[id] = $(id).value; });
+  window.__mock.saved.push(rec);
+  window.__mock.events.push({t: Date.now(), type: 'saved', n: window.__mock.saved.length});
+  $('savedCount').textContent = String(window.__mock.saved.length);
+  textIds.concat(ddIds).forEach((id) => { $(id).value = ''; });
+  ['mentally', 'physically'].forEach((id) => { $(id).checked = false; });
+  document.querySelectorAll("input[name='gender']").forEach((r) => { r.checked = false; });
+  loaded.state = false; loaded.district = false;
+  if (window.__mock.saved.length >= CFG.group_size) $('continueBtn').disabled = false;
+  return true;
+}
+$('saveAdd').addEventListener('click', save);
+$('continueBtn').addEventListener('click', () => { window.__mock.events.push({t: Date.now(), type: 'continue'}); });
+
+// Simulated operator: click "Save and Add Sevak" once the form has been complete and idle
+let saveTimer = null;
+const armSave = () => {
+  if (CFG.autosave_ms < 0) return;
+  clearTimeout(saveTimer);
+  if (isComplete()) saveTimer = setTimeout(() => { if (isComplete()) save(); }, CFG.autosave_ms);
+};
+document.addEventListener('input', armSave, true);
+document.addEventListener('change', armSave, true);
+document.addEventListener('click', () => setTimeout(armSave, 0), true);
+</script>
+</body>
+</html>
+"""
+
+
+def render_page(config):
+    data = {"gazetteer": GAZETTEER, "temples": TEMPLES, "id_types": ID_TYPES}
+    return (PAGE.replace("__CONFIG__", json.dumps(config))
+                .replace("__DATA__", json.dumps(data)))
+
+
+def make_handler(defaults):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            parsed = urlparse(self.path)
+            cfg = dict(defaults)
+            for k, v in parse_qs(parsed.query).items():
+                if k in cfg:
+                    try:
+                        cfg[k] = int(v[-1])
+                    except ValueError:
+                        pass
+            if cfg.get("server_latency"):
+                time.sleep(cfg["server_latency"] / 1000.0)
+            if parsed.path in ("/", "/srivari", "/index.html"):
+                body = render_page(cfg).encode("utf-8")
+                ctype = "text/html; charset=utf-8"
+            elif parsed.path == "/gazetteer.json":
+                body = json.dumps({"gazetteer": GAZETTEER, "temples": TEMPLES}).encode("utf-8")
+                ctype = "application/json"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+    return Handler
+
+
+def start_server(host="127.0.0.1", port=0, **overrides):
+    # Serve in a daemon thread; returns (server, base_url)
+    cfg = dict(DEFAULTS)
+    cfg.update({k: v for k, v in overrides.items() if k in DEFAULTS and v is not None})
+    server = ThreadingHTTPServer((host, port), make_handler(cfg))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/"
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Serve a local mock of the Srivari Seva Team Leader form")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    for k, v in DEFAULTS.items():
+        ap.add_argument(f"--{k.replace('_', '-')}", type=int, default=v)
+    args = ap.parse_args()
+    overrides = {k: getattr(args, k) for k in DEFAULTS}
+    server, url = start_server(args.host, args.port, **overrides)
+    print(f"Mock Srivari form at {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -7,11 +7,38 @@ async function apiFetch(url, options={}) {
   return fetch(url, opts)
 }
 
+// One shared EventSource on /stream for every component; closed when the last listener leaves.
+// The browser reconnects on its own and resumes from the last log seq via Last-Event-ID.
+const streamListeners = new Map()
+let streamSource = null
+const hasEventSource = typeof window !== 'undefined' && 'EventSource' in window
+
+function subscribeStream(type, handler) {
+  if (!hasEventSource) return null
+  if (!streamListeners.has(type)) streamListeners.set(type, new Set())
+  streamListeners.get(type).add(handler)
+  if (!streamSource) {
+    streamSource = new EventSource(`${API_BASE}/stream`, { withCredentials: true })
+  }
+  const listener = ev => {
+    try { handler(JSON.parse(ev.data)) } catch (err) { console.error('stream event failed', err) }
+  }
+  streamSource.addEventListener(type, listener)
+  return () => {
+    streamListeners.get(type)?.delete(handler)
+    if (streamSource) streamSource.removeEventListener(type, listener)
+    const remaining = [...streamListeners.values()].reduce((n, set) => n + set.size, 0)
+    if (!remaining && streamSource) { streamSource.close(); streamSource = null }
+  }
+}
+
 function TimerBox({ started, ended, elapsed }) {
   const [nowElapsed, setNowElapsed] = useState(elapsed)
+  useEffect(() => { setNowElapsed(elapsed) }, [elapsed])
   useEffect(() => {
     let id
-    if (started && !ended) {
+    // With the event stream the parent pushes elapsed once a second; poll only without it
+    if (!hasEventSource && started && !ended) {
       id = setInterval(async () => {
         try {
           const res = await fetch(`${API_BASE}/timer`)
@@ -91,13 +118,24 @@ function Hero() {
   const [url, setUrl] = useState('')
   const [loading, setLoading] = useState(false)
   const [error, setError] = useState('')
+  const etagRef = useRef('')
+  const objUrlRef = useRef('')
 
   async function refresh() {
     setLoading(true); setError('')
     try {
-      const u = `${API_BASE}/screenshot?t=${Date.now()}`
-      // Optimistically set image URL (browser will request it directly)
-      setImgUrl(u)
+      // Conditional fetch: the server answers 304 while the page has not changed
+      const headers = etagRef.current ? { 'If-None-Match': etagRef.current } : {}
+      const res = await apiFetch(`${API_BASE}/screenshot`, { headers, cache: 'no-store' })
+      if (res.status === 200) {
+        etagRef.current = res.headers.get('ETag') || ''
+        const next = URL.createObjectURL(await res.blob())
+        if (objUrlRef.current) URL.revokeObjectURL(objUrlRef.current)
+        objUrlRef.current = next
+        setImgUrl(next)
+      } else if (res.status !== 304) {
+        setError('Preview unavailable')
+      }
       const res2 = await apiFetch(`${API_BASE}/current-url`)
       const data2 = await res2.json()
       setUrl(data2?.url || '')
@@ -140,7 +178,7 @@ function Hero() {
             <div className="aspect-video rounded-md bg-gray-100 overflow-hidden relative">
               {!imgUrl && <div className="absolute inset-0 grid place-content-center text-gray-500">Preview unavailable</div>}
               {!!imgUrl && (
-                // Use <img> with cache-busting timestamp param
+                // Object URL of the last changed frame
                 <img src={imgUrl} alt="Browser preview" className="w-full h-full object-contain" onError={() => setError('Preview unavailable')} />
               )}
               {loading && <div className="absolute bottom-2 right-2 text-xs bg-white/80 rounded px-2 py-0.5">Refreshing...</div>}
@@ -240,7 +278,12 @@ function Dashboard() {
     } finally { setBusy(false) }
   }
 
-  useEffect(() => { fetchStatus() }, [])
+  useEffect(() => {
+    fetchStatus()
+    const offState = subscribeStream('state', st => setStatus(prev => ({ ...prev, ...st })))
+    const offTimer = subscribeStream('timer', t => setStatus(prev => ({ ...prev, timer: t })))
+    return () => { offState && offState(); offTimer && offTimer() }
+  }, [])
 
   return (
     <section id="dashboard" className="mx-auto max-w-7xl px-4 sm:px-6 lg:px-8 py-10">
@@ -441,6 +484,7 @@ function ConfigEditor() {
   const [general, setGeneral] = useState({ group_size: '', download_dir: '', auto_select_date: true, auto_download_ticket: true, respect_existing: true, aadhaar_autofill_wait_seconds: 6 })
   const [members, setMembers] = useState([])
   const [saving, setSaving] = useState(false)
+  const [importErrors, setImportErrors] = useState([])
   const [loading, setLoading] = useState(false)
 
   useEffect(() => { reload() }, [])
@@ -585,7 +629,7 @@ function ConfigEditor() {
           <div className="flex items-center justify-between">
             <h3 className="font-medium">Members (up to 10)</h3>
             <div className="flex items-center gap-2">
-              <input id="import-csv-input" type="file" accept=".csv" style={{display:'none'}} onChange={async (e)=>{
+              <input id="import-csv-input" type="file" accept=".csv,.xlsx,.jsonl,.ndjson" style={{display:'none'}} onChange={async (e)=>{
                 const file = e.target.files?.[0]; if (!file) return
                 try {
                   const form = new FormData(); form.append('file', file)
@@ -594,15 +638,32 @@ function ConfigEditor() {
                   if (Array.isArray(data?.members)) {
                     setMembers(prev => [...prev, ...data.members].slice(0, 10))
                   }
+                  setImportErrors(Array.isArray(data?.errors) ? data.errors : [])
                 } catch(err) { console.error('import failed', err) }
                 finally { e.target.value = '' }
               }} />
-              <button onClick={()=>document.getElementById('import-csv-input')?.click()} className="inline-flex items-center justify-center rounded-md border px-2 py-1 text-sm hover:bg-gray-50">Import CSV</button>
+              <button onClick={()=>document.getElementById('import-csv-input')?.click()} className="inline-flex items-center justify-center rounded-md border px-2 py-1 text-sm hover:bg-gray-50">Import</button>
               <a href={`${API_BASE}/export/csv`} className="inline-flex items-center justify-center rounded-md border px-2 py-1 text-sm hover:bg-gray-50">Export CSV</a>
               <a href={`${API_BASE}/export/json`} className="inline-flex items-center justify-center rounded-md border px-2 py-1 text-sm hover:bg-gray-50">Export JSON</a>
               <button onClick={addMember} disabled={members.length >= 10} className="inline-flex items-center justify-center rounded-md border px-2 py-1 text-sm hover:bg-gray-50 disabled:opacity-50">Add Member</button>
             </div>
           </div>
+          {importErrors.length > 0 && (
+            <div className="mt-3 rounded border border-amber-300 bg-amber-50 p-3 text-sm text-amber-900">
+              <div className="flex items-center justify-between">
+                <span className="font-medium">{importErrors.length} imported row(s) need fixing</span>
+                <div className="flex gap-2">
+                  <button onClick={()=>{ setMembers(prev => [...prev, ...importErrors.map(r => r.member || {})].slice(0, 10)); setImportErrors([]) }} className="rounded border border-amber-300 px-2 py-0.5 hover:bg-amber-100">Add to editor</button>
+                  <button onClick={()=>setImportErrors([])} className="rounded border border-amber-300 px-2 py-0.5 hover:bg-amber-100">Dismiss</button>
+                </div>
+              </div>
+              <ul className="mt-2 list-disc pl-5 space-y-0.5">
+                {importErrors.map(r => (
+                  <li key={r.index}>Row {r.row}{r.name ? ` (${r.name})` : ''}: {r.errors.join('; ')}</li>
+                ))}
+              </ul>
+            </div>
+          )}
           <div className="mt-3 grid grid-cols-1 gap-3">
             {members.length === 0 && <div className="text-sm text-gray-500">No members yet. Click "Add Member" to start.</div>}
             {members.map((m, idx) => (
@@ -631,21 +692,35 @@ function Logs() {
   const latestRef = useRef(0)
 
   useEffect(() => {
+    const append = fresh => setItems(prev => [...prev, ...fresh].slice(-1000))
+    const offLog = subscribeStream('log', it => {
+      latestRef.current = it.seq
+      append([it])
+    })
+    if (offLog) {
+      const offGap = subscribeStream('gap', g => append([{ seq: `gap-${g.oldest}`, ts: '', msg: `(${g.dropped} older log lines skipped)` }]))
+      return () => { offLog(); offGap && offGap() }
+    }
+    // Polling fallback for browsers without EventSource
     let cancelled = false
     async function tick() {
+      let more = false
       try {
         const res = await apiFetch(`${API_BASE}/logs?since=${latestRef.current}`)
         const data = await res.json()
         if (!cancelled) {
-          if (Array.isArray(data.items) && data.items.length) {
-            latestRef.current = data.latest || latestRef.current
-            setItems(prev => [...prev, ...data.items].slice(-1000))
+          const fresh = Array.isArray(data.items) ? data.items : []
+          if (data.dropped > 0) {
+            fresh.unshift({ seq: `gap-${data.oldest}`, ts: '', msg: `(${data.dropped} older log lines skipped)` })
           }
+          if (fresh.length) setItems(prev => [...prev, ...fresh].slice(-1000))
+          if (typeof data.latest === 'number') latestRef.current = data.latest
+          more = !!data.more
         }
       } catch (err) {
         console.error('logs fetch failed', err)
       }
-      if (!cancelled) setTimeout(tick, 1000)
+      if (!cancelled) setTimeout(tick, more ? 0 : 1000)
     }
     tick()
     return () => { cancelled = true }
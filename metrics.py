@@ -0,0 +1,186 @@
+import threading
+import time
+
+# Minimal thread-safe Prometheus metrics registry (text exposition format 0.0.4).
+# Shared by the bot (ttd_bot.py) and the API (api_server.py) through REGISTRY.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + (list(extra.items()) if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _fmt_value(v):
+    if v == float("inf"):
+        return "+Inf"
+    if isinstance(v, float):
+        return repr(round(v, 6))
+    return str(v)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, help, labelnames=(), fn=None):
+        # fn: optional callable evaluated at scrape time (for values owned elsewhere, e.g. a
+        # stats dict); returns a number, or a {label-value(s): number} dict for labelled metrics
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.fn = fn
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: expected labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def samples(self):
+        if self.fn is not None:
+            try:
+                val = self.fn()
+            except Exception:
+                return []
+            if isinstance(val, dict):
+                return [(self.name, tuple(str(x) for x in (k if isinstance(k, tuple) else (k,))), None, v)
+                        for k, v in sorted(val.items(), key=lambda kv: str(kv[0]))]
+            return [(self.name, (), None, val)]
+        with self._lock:
+            if not self._values and not self.labelnames:
+                # An unlabelled metric exists from registration on: expose 0 rather than nothing
+                return [(self.name, (), None, 0)]
+            return [(self.name, key, None, v) for key, v in sorted(self._values.items())]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def get(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        value = float(value)
+        with self._lock:
+            h = self._values.get(key)
+            if h is None:
+                h = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, le in enumerate(self.buckets):
+                if value <= le:
+                    h["counts"][i] += 1
+            h["sum"] += value
+            h["count"] += 1
+
+    def time(self, **labels):
+        # with HIST.time(route="/x"): ...
+        hist = self
+
+        class _Timer:
+            def __enter__(self):
+                self.t0 = time.perf_counter()
+                return self
+
+            def __exit__(self, *exc):
+                hist.observe(time.perf_counter() - self.t0, **labels)
+                return False
+        return _Timer()
+
+    def samples(self):
+        out = []
+        with self._lock:
+            for key, h in sorted(self._values.items()):
+                for le, n in zip(self.buckets, h["counts"]):
+                    out.append((self.name + "_bucket", key, {"le": _fmt_value(le)}, n))
+                out.append((self.name + "_bucket", key, {"le": "+Inf"}, h["count"]))
+                out.append((self.name + "_sum", key, None, h["sum"]))
+                out.append((self.name + "_count", key, None, h["count"]))
+        return out
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, help, labelnames=(), **kw):
+        # Idempotent: re-registering the same name returns the existing metric
+        with self._lock:
+            m = self._metrics.get(name)
+            if m is None:
+                m = self._metrics[name] = cls(name, help, labelnames, **kw)
+            elif not isinstance(m, cls):
+                raise ValueError(f"metric {name} already registered as {m.kind}")
+            return m
+
+    def counter(self, name, help, labelnames=(), fn=None):
+        c = self._get_or_create(Counter, name, help, labelnames)
+        if fn is not None:
+            c.fn = fn
+        return c
+
+    def gauge(self, name, help, labelnames=(), fn=None):
+        g = self._get_or_create(Gauge, name, help, labelnames)
+        if fn is not None:
+            g.fn = fn
+        return g
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, help, labelnames, buckets=buckets)
+
+    def expose(self):
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines = []
+        for m in metrics:
+            lines.append(f"# HELP {m.name} " + str(m.help).replace("\\", "\\\\").replace("\n", "\\n"))
+            lines.append(f"# TYPE {m.name} {m.kind}")
+            for name, key, extra, value in m.samples():
+                lines.append(f"{name}{_fmt_labels(m.labelnames, key, extra)} {_fmt_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
@@ -0,0 +1,113 @@
+import json
+import os
+
+import pytest
+
+ttd_bot = pytest.importorskip("ttd_bot")
+ConfigStore = ttd_bot.ConfigStore
+
+GROUP = {"general": {"group_size": 2}, "members": [{"name": "A"}, {"name": "B"}]}
+
+
+_writes = 0
+
+
+def _write(path, text):
+    global _writes
+    path.write_text(text, encoding="utf-8")
+    # Distinct mtimes even on coarse-grained filesystems, so every write is a stat change
+    _writes += 1
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + _writes * 1_000_000))
+
+
+@pytest.fixture
+def cfg(tmp_path):
+    path = tmp_path / "srivari_group_data.json"
+    _write(path, json.dumps(GROUP))
+    return path, ConfigStore(lambda: str(path), check_interval=0)
+
+
+def test_first_get_loads_the_file(cfg):
+    path, store = cfg
+    snap = store.get()
+    assert snap.version == 1
+    assert snap.source == str(path)
+    assert snap.general["group_size"] == 2
+    assert [m["name"] for m in snap.members] == ["A", "B"]
+
+
+def test_version_bumps_only_when_content_changes(cfg):
+    path, store = cfg
+    assert store.get().version == 1
+    _write(path, json.dumps(GROUP, indent=4))  # same content, different bytes
+    assert store.refresh().version == 1
+    assert store.stats["reloads_skipped"] == 1
+    _write(path, json.dumps({**GROUP, "members": [{"name": "C"}]}))
+    snap = store.refresh()
+    assert snap.version == 2
+    assert [m["name"] for m in snap.members] == ["C"]
+
+
+def test_parse_error_keeps_the_last_good_snapshot(cfg):
+    path, store = cfg
+    good = store.get()
+    _write(path, '{"members": [')
+    snap = store.refresh()
+    assert snap.version == good.version
+    assert snap.data == good.data
+    assert snap.error
+    assert store.stats["errors"] == 1
+    _write(path, json.dumps({"members": [{"name": "Z"}]}))
+    fixed = store.refresh()
+    assert fixed.version == good.version + 1
+    assert fixed.error is None
+
+
+def test_snapshots_are_read_only(cfg):
+    _, store = cfg
+    snap = store.get()
+    with pytest.raises(TypeError):
+        snap.data["general"]["group_size"] = 5
+    # thaw() gives a mutable copy for callers that edit members in place
+    data = ttd_bot.thaw(snap.data)
+    data["general"]["group_size"] = 5
+    assert store.get().general["group_size"] == 2
+
+
+def test_accepted_shapes():
+    assert ConfigStore.validate([{"name": "A"}, "junk"]) == ("list", {"general": {}, "members": [{"name": "A"}]})
+    fmt, data = ConfigStore.validate({"data": [{"name": "A"}], "general": "bad"})
+    assert fmt == "dict" and data["general"] == {} and data["members"] == [{"name": "A"}]
+    with pytest.raises(ValueError):
+        ConfigStore.validate("text")
+
+
+def test_write_swaps_snapshot_and_notifies(cfg):
+    path, store = cfg
+    store.get()
+    seen = []
+    store.add_listener(lambda snap: seen.append(snap.version))
+    store.write({"general": {}, "members": [{"name": "W"}]})
+    assert seen == [2]
+    assert json.loads(path.read_text(encoding="utf-8"))["members"] == [{"name": "W"}]
+    # Re-writing identical content is not a new version
+    store.write({"general": {}, "members": [{"name": "W"}]})
+    assert store.get().version == 2 and seen == [2]
+
+
+def test_etag_is_a_content_hash(cfg):
+    path, store = cfg
+    snap, text, etag = store.tagged()
+    assert json.loads(text) == GROUP
+    # A fresh store (process restart) on the same content yields the same ETag
+    assert ConfigStore(lambda: str(path), check_interval=0).tagged()[2] == etag
+    store.write({"general": {}, "members": []})
+    assert store.tagged()[2] != etag
+
+
+def test_missing_file_is_an_empty_config(tmp_path):
+    store = ConfigStore(lambda: str(tmp_path / "absent.json"), check_interval=0)
+    snap = store.get()
+    assert snap.source is None
+    assert list(snap.members) == []
@@ -0,0 +1,64 @@
+import difflib
+import random
+
+import pytest
+
+ttd_bot = pytest.importorskip("ttd_bot")
+DropdownOptionIndex = ttd_bot.DropdownOptionIndex
+
+STATES = ["Andhra Pradesh", "Arunachal Pradesh", "Karnataka", "Kerala", "Madhya Pradesh",
+          "Tamil Nadu", "Telangana", "Uttar Pradesh", "West Bengal"]
+
+
+def test_exact_match_is_case_and_space_insensitive():
+    idx = DropdownOptionIndex(STATES)
+    assert idx.match("  tamil   NADU ") == (5, "Tamil Nadu", 1.0)
+
+
+def test_substring_match_scores_one():
+    idx = DropdownOptionIndex(["Select", "Chittoor District", "Nellore District"])
+    i, label, score = idx.match("nellore")
+    assert (label, score) == ("Nellore District", 1.0)
+
+
+def test_fuzzy_match_finds_misspelling():
+    idx = DropdownOptionIndex(STATES)
+    _, label, score = idx.match("Telengana")
+    assert label == "Telangana"
+    assert 0.8 <= score < 1.0
+
+
+def test_nothing_comparable():
+    assert DropdownOptionIndex([]).match("Kerala") == (None, None, 0.0)
+    assert DropdownOptionIndex(STATES).match("") == (None, None, 0.0)
+
+
+def test_results_are_cached_per_normalised_value():
+    idx = DropdownOptionIndex(STATES)
+    first = idx.match("Kerla")
+    assert idx.match(" kerla ") == first
+    assert "kerla" in idx._resolved
+
+
+def test_signature_tracks_option_labels():
+    assert DropdownOptionIndex(STATES).signature == DropdownOptionIndex(list(STATES)).signature
+    assert DropdownOptionIndex(STATES).signature != DropdownOptionIndex(STATES[:-1]).signature
+
+
+def test_fuzzy_result_matches_scoring_every_label():
+    # The trigram shortlist must never lose the best label the old full scan would have found
+    rng = random.Random(7)
+    alphabet = "abcdefghij "
+    labels = ["".join(rng.choice(alphabet) for _ in range(rng.randint(5, 14))) for _ in range(300)]
+    idx = DropdownOptionIndex(labels)
+    for _ in range(200):
+        value = "".join(rng.choice(alphabet) for _ in range(rng.randint(4, 12)))
+        v = DropdownOptionIndex._norm(value)
+        if not v or v in idx.exact or any(v in n for n in idx.norms):
+            continue
+        best = max(difflib.SequenceMatcher(None, v, n).ratio() for n in idx.norms)
+        _, _, score = idx.match(value)
+        if best >= DropdownOptionIndex.FULL_SCAN_BELOW:
+            assert score >= DropdownOptionIndex.FULL_SCAN_BELOW
+        else:
+            assert score == pytest.approx(best)
@@ -0,0 +1,127 @@
+import io
+import json
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("fastapi")
+api_server = pytest.importorskip("api_server")
+
+CSV = (
+    "\ufeffName,Gender,Blood Group,Aadhaar,Mobile,Pin Code,Unknown\n"
+    "Ravi,m,b positive,1234 5678 9012,+91 98765 43210,517501,x\n"
+    "Sita,F,AB-ve,1234,12345,51750,y\n"
+    ",Other,,,,,\n"
+)
+
+
+def _rows(reader, data):
+    return list(reader(io.BytesIO(data.encode("utf-8") if isinstance(data, str) else data)))
+
+
+def test_csv_reader_maps_headers_and_skips_unknown_columns():
+    rows = _rows(api_server._import_csv_rows, CSV)
+    line, item, errors = rows[0]
+    assert line == 2 and errors is None
+    assert item == {"name": "Ravi", "gender": "m", "blood_group": "b positive", "id_number": "1234 5678 9012",
+                    "mobile": "+91 98765 43210", "pincode": "517501"}
+    assert [r[0] for r in rows] == [2, 3, 4]
+
+
+def test_csv_reader_handles_chunk_boundaries_and_quoted_newlines():
+    data = 'name,street\n"Ravi","Door 1\nMain Road"\nSita,"Car St"\n'
+    lines = list(api_server._import_lines(io.BytesIO(data.encode("utf-8")), chunk_size=3))
+    assert "".join(lines) == data
+    rows = _rows(api_server._import_csv_rows, data)
+    assert [r[1] for r in rows] == [{"name": "Ravi", "street": "Door 1\nMain Road"}, {"name": "Sita", "street": "Car St"}]
+
+
+def test_jsonl_reader_reports_bad_lines_and_types_values():
+    data = '{"Name": "Ravi", "aadhar_no": 123456789012, "mobile": 9876543210.0}\n\nnot json\n[1, 2]\n'
+    rows = _rows(api_server._import_jsonl_rows, data)
+    assert rows[0] == (1, {"name": "Ravi", "id_number": "123456789012", "mobile": "9876543210"}, None)
+    assert rows[1][0] == 3 and rows[1][2][0].startswith("invalid JSON")
+    assert rows[2][0] == 4 and rows[2][2]
+
+
+def test_xlsx_reader_reads_typed_cells():
+    openpyxl = pytest.importorskip("openpyxl")
+    import datetime
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(["Name", "DOB", "Mobile"])
+    ws.append(["Ravi", datetime.date(1990, 5, 1), 9876543210])
+    buf = io.BytesIO()
+    wb.save(buf)
+    buf.seek(0)
+    rows = list(api_server._import_xlsx_rows(buf))
+    assert rows == [(2, {"name": "Ravi", "dob": "1990-05-01", "mobile": "9876543210"}, None)]
+
+
+@pytest.mark.parametrize("filename, ctype, kind", [
+    ("roster.csv", "text/csv", "csv"),
+    ("roster.XLSX", None, "xlsx"),
+    ("upload", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+    ("roster.ndjson", None, "jsonl"),
+    (None, None, "csv"),
+])
+def test_import_kind(filename, ctype, kind):
+    assert api_server._import_kind(filename, ctype) == kind
+
+
+def test_validate_member_normalises_valid_values():
+    item = {"name": "Ravi", "gender": "m", "blood_group": "b positive", "id_number": "1234 5678 9012",
+            "mobile": "+91 98765-43210", "email": "r@example.com", "pincode": "517501"}
+    assert api_server._validate_member(item) == []
+    assert item["gender"] == "Male"
+    assert item["blood_group"] == "B+"
+    assert item["mobile"] == "9876543210"
+
+
+def test_validate_member_reports_every_problem():
+    item = {"gender": "x", "blood_group": "C+", "id_number": "1234", "mobile": "12345", "email": "nope",
+            "pincode": "51750"}
+    errors = api_server._validate_member(item)
+    assert errors == [
+        "name is required",
+        "gender 'x' not one of Male/Female/Other",
+        "blood_group 'C+' not recognised",
+        "id_number is not a 12-digit Aadhaar number",
+        "mobile is not a 10-digit number",
+        "email is not an address",
+        "pincode is not 6 digits",
+    ]
+
+
+def test_non_aadhaar_id_numbers_are_not_checked():
+    assert api_server._validate_member({"name": "Ravi", "id_proof_type": "Passport", "id_number": "K1234567"}) == []
+
+
+def _upload(data, filename="roster.csv"):
+    return SimpleNamespace(file=io.BytesIO(data.encode("utf-8")), filename=filename, content_type=None)
+
+
+def test_import_returns_valid_members_and_rejected_rows_with_their_data():
+    res = api_server.import_csv(_upload(CSV), offset=0, limit=100, _=True)
+    assert (res["total_rows"], res["valid"], res["invalid"]) == (3, 1, 2)
+    assert [m["name"] for m in res["members"]] == ["Ravi"]
+    assert res["members"][0]["mobile"] == "9876543210"
+    rejected = res["errors"]
+    assert [(e["row"], e["index"], e["name"]) for e in rejected] == [(3, 1, "Sita"), (4, 2, None)]
+    assert rejected[0]["member"]["name"] == "Sita"
+    assert "name is required" in rejected[1]["errors"]
+
+
+def test_import_pages_rows_but_counts_the_whole_file():
+    data = "name\n" + "".join(f"M{i}\n" for i in range(25))
+    res = api_server.import_csv(_upload(data), offset=10, limit=10, _=True)
+    assert [m["name"] for m in res["members"]] == [f"M{i}" for i in range(10, 20)]
+    assert res["next_offset"] == 20 and res["total_rows"] == 25
+    last = api_server.import_csv(_upload(data), offset=20, limit=10, _=True)
+    assert last["next_offset"] is None and len(last["members"]) == 5
+
+
+def test_import_jsonl_upload():
+    data = "\n".join(json.dumps({"name": n}) for n in ("A", "B")) + "\n"
+    res = api_server.import_csv(_upload(data, "roster.jsonl"), _=True)
+    assert res["format"] == "jsonl" and [m["name"] for m in res["members"]] == ["A", "B"]
@@ -0,0 +1,73 @@
+import pytest
+
+ttd_bot = pytest.importorskip("ttd_bot")
+LogRing = ttd_bot.LogRing
+
+
+def _ring(capacity, n):
+    ring = LogRing(capacity=capacity)
+    for i in range(1, n + 1):
+        ring.append(f"m{i}", ts="00:00:00")
+    return ring
+
+
+def test_since_returns_entries_after_seq_in_order():
+    ring = _ring(10, 5)
+    page = ring.since(2)
+    assert [it["seq"] for it in page["items"]] == [3, 4, 5]
+    assert [it["msg"] for it in page["items"]] == ["m3", "m4", "m5"]
+    assert page["latest"] == 5
+    assert page["dropped"] == 0
+    assert page["more"] is False
+
+
+def test_wraparound_keeps_the_newest_capacity_entries():
+    ring = _ring(4, 10)
+    assert len(ring) == 4
+    assert ring.first_seq == 7
+    assert [it["seq"] for it in ring] == [7, 8, 9, 10]
+    assert ring.since(0)["oldest"] == 7
+
+
+def test_fresh_reader_of_a_wrapped_ring_sees_no_gap():
+    ring = _ring(4, 10)
+    assert ring.since(0)["dropped"] == 0
+
+
+def test_reader_that_fell_behind_is_told_how_much_it_missed():
+    ring = _ring(4, 10)
+    page = ring.since(3)
+    # seqs 4..6 were overwritten before the reader came back
+    assert page["dropped"] == 3
+    assert [it["seq"] for it in page["items"]] == [7, 8, 9, 10]
+    # Caught up exactly to the oldest retained entry: nothing was lost
+    assert ring.since(6)["dropped"] == 0
+
+
+def test_paged_since_walks_the_ring_without_gaps():
+    ring = _ring(8, 20)
+    seen, seq = [], 0
+    while True:
+        page = ring.since(seq, limit=3)
+        seen.extend(it["seq"] for it in page["items"])
+        seq = page["latest"]
+        if not page["more"]:
+            break
+    assert seen == list(range(13, 21))
+
+
+def test_client_ahead_of_the_ring_resyncs_to_last_seq():
+    ring = _ring(4, 3)
+    page = ring.since(50)
+    assert page["items"] == []
+    assert page["latest"] == 3
+
+
+def test_subscribers_receive_appended_items():
+    ring = LogRing(capacity=2)
+    got = []
+    ring.subscribe(got.append)
+    ring.append("hello", ts="00:00:00")
+    ring.unsubscribe(got.append)
+    ring.append("ignored", ts="00:00:00")
+    assert [it["msg"] for it in got] == ["hello"]
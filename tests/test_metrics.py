@@ -0,0 +1,82 @@
+import pytest
+
+from metrics import Registry
+
+
+def _lines(reg):
+    return reg.expose().splitlines()
+
+
+def test_counter_exposition_with_help_and_type():
+    reg = Registry()
+    c = reg.counter("jobs_total", "Jobs run")
+    c.inc()
+    c.inc(2)
+    assert _lines(reg) == ["# HELP jobs_total Jobs run", "# TYPE jobs_total counter", "jobs_total 3"]
+
+
+def test_untouched_unlabelled_metric_exposes_zero():
+    reg = Registry()
+    reg.gauge("queue_depth", "Depth")
+    assert "queue_depth 0" in _lines(reg)
+
+
+def test_untouched_labelled_metric_exposes_no_samples():
+    reg = Registry()
+    reg.counter("http_requests_total", "Requests", ("route",))
+    assert _lines(reg) == ["# HELP http_requests_total Requests", "# TYPE http_requests_total counter"]
+
+
+def test_labels_are_escaped_and_sorted_by_value():
+    reg = Registry()
+    c = reg.counter("errors_total", "Errors", ("msg",))
+    c.inc(msg='say "hi"\nnow')
+    c.inc(msg="a\\b")
+    samples = [l for l in _lines(reg) if not l.startswith("#")]
+    assert samples == ['errors_total{msg="a\\\\b"} 1', 'errors_total{msg="say \\"hi\\"\\nnow"} 1']
+
+
+def test_wrong_labels_are_rejected():
+    reg = Registry()
+    c = reg.counter("x_total", "X", ("a",))
+    with pytest.raises(ValueError):
+        c.inc(b="1")
+
+
+def test_histogram_buckets_are_cumulative():
+    reg = Registry()
+    h = reg.histogram("latency_seconds", "Latency", buckets=(0.1, 1))
+    for v in (0.05, 0.5, 5):
+        h.observe(v)
+    samples = [l for l in _lines(reg) if not l.startswith("#")]
+    assert samples == [
+        'latency_seconds_bucket{le="0.1"} 1',
+        'latency_seconds_bucket{le="1.0"} 2',
+        'latency_seconds_bucket{le="+Inf"} 3',
+        "latency_seconds_sum 5.55",
+        "latency_seconds_count 3",
+    ]
+
+
+def test_callback_metrics_are_read_at_scrape_time():
+    reg = Registry()
+    stats = {"n": 1}
+    reg.counter("cb_total", "Callback", fn=lambda: stats["n"])
+    reg.gauge("cb_depth", "Per priority", ("priority",), fn=lambda: {"fill": 2, "normal": 0})
+    stats["n"] = 7
+    lines = _lines(reg)
+    assert "cb_total 7" in lines
+    assert 'cb_depth{priority="fill"} 2' in lines and 'cb_depth{priority="normal"} 0' in lines
+
+
+def test_failing_callback_exposes_nothing():
+    reg = Registry()
+    reg.gauge("broken", "Broken", fn=lambda: 1 / 0)
+    assert _lines(reg) == ["# HELP broken Broken", "# TYPE broken gauge"]
+
+
+def test_registration_is_idempotent_and_type_checked():
+    reg = Registry()
+    assert reg.counter("a_total", "A") is reg.counter("a_total", "A")
+    with pytest.raises(ValueError):
+        reg.gauge("a_total", "A")
@@ -0,0 +1,132 @@
+import json
+
+import pytest
+
+ttd_bot = pytest.importorskip("ttd_bot")
+RunJournal = ttd_bot.RunJournal
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "journal.jsonl")
+
+
+def _lines(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def _run(j, key="k1"):
+    assert j.begin(key, run_id="r1", members=3) is None
+    j.append("member_started", member=1, resumed=False)
+    j.append("field_filled", member=1, field="name", ms=5.0)
+    j.append("field_filled", member=1, field="state", ms=7.0)
+
+
+def test_fresh_journal_has_no_state(path):
+    j = RunJournal(path)
+    assert j.state() is None
+    assert j.resume_point("k1") is None
+
+
+def test_replay_tracks_member_progress(path):
+    j = RunJournal(path)
+    _run(j)
+    j.append("member_filled", member=1, ms=100.0)
+    j.append("member_saved", member=1, confirmed=True)
+    j.append("member_started", member=2, resumed=False)
+    st = RunJournal(path).state()
+    assert st["run_id"] == "r1" and st["key"] == "k1" and not st["finished"]
+    assert st["members"][1] == {"filled": True, "saved": True, "fields": {"name": 5.0, "state": 7.0}, "ms": 100.0}
+    assert st["members"][2]["fields"] == {}
+
+
+def test_resume_point_mid_member_lists_done_fields(path):
+    _run(RunJournal(path))
+    plan = RunJournal(path).resume_point("k1")
+    assert plan == {"member": 1, "fields": ["name", "state"], "wait_for_save": False, "run_id": "r1"}
+
+
+def test_resume_point_after_fill_waits_for_save(path):
+    j = RunJournal(path)
+    _run(j)
+    j.append("member_filled", member=1, ms=1.0)
+    assert j.resume_point("k1")["member"] == 2
+    assert j.resume_point("k1")["wait_for_save"] is True
+
+
+def test_unconfirmed_save_is_not_saved(path):
+    j = RunJournal(path)
+    _run(j)
+    j.append("member_filled", member=1, ms=1.0)
+    j.append("member_saved", member=1, confirmed=False)
+    assert j.resume_point("k1")["wait_for_save"] is True
+    j.append("member_saved", member=1, confirmed=True)
+    plan = j.resume_point("k1")
+    assert plan["member"] == 2 and plan["wait_for_save"] is False
+
+
+def test_resume_ignores_a_different_group_or_a_finished_run(path):
+    j = RunJournal(path)
+    _run(j)
+    assert j.resume_point("other") is None
+    j.append("run_finished", members=1)
+    assert j.resume_point("k1") is None
+
+
+def test_resumed_member_keeps_its_fields(path):
+    j = RunJournal(path)
+    _run(j)
+    plan = j.begin("k1", run_id="r2")
+    assert plan["fields"] == ["name", "state"]
+    j.append("member_started", member=1, resumed=True)
+    assert set(j.state()["members"][1]["fields"]) == {"name", "state"}
+    # A restart of the member without resume clears them
+    j.append("member_started", member=1, resumed=False)
+    assert j.state()["members"][1]["fields"] == {}
+
+
+def test_torn_last_line_is_skipped_and_dropped_by_compaction(path):
+    j = RunJournal(path)
+    _run(j)
+    j.sync()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"seq": 99, "type": "field_fi')  # crash mid-write
+    j2 = RunJournal(path)
+    assert j2.resume_point("k1")["fields"] == ["name", "state"]
+    assert j2.stats["bad_lines"] >= 1
+    j2.begin("k1", run_id="r2")
+    j2.append("field_filled", member=1, field="district", ms=3.0)
+    records = _lines(path)  # every line parses again
+    assert records[-1]["field"] == "district"
+    assert [r["seq"] for r in records] == sorted(r["seq"] for r in records)
+
+
+def test_compaction_keeps_only_the_latest_run(path):
+    j = RunJournal(path)
+    _run(j)
+    j.finish(members=1)
+    assert _lines(path) == []
+    _run(j, key="k2")
+    j.compact()
+    records = _lines(path)
+    assert records[0]["type"] == "run_started" and records[0]["key"] == "k2"
+    assert [r["type"] for r in records].count("run_started") == 1
+
+
+def test_size_triggers_compaction(path):
+    j = RunJournal(path, compact_bytes=2048)
+    j.begin("old", run_id="r0")
+    for i in range(20):
+        j.append("field_filled", member=1, field=f"f{i}", ms=1.0)
+    j.begin("k1", run_id="r1")  # new run: the old one becomes garbage
+    for i in range(40):
+        j.append("field_filled", member=1, field=f"g{i}", ms=1.0)
+    assert j.stats["compactions"] >= 1
+    assert all(r.get("key") != "old" for r in _lines(path))
+
+
+def test_unwritable_path_does_not_raise(tmp_path):
+    j = RunJournal(str(tmp_path / "missing-dir" / "journal.jsonl"))
+    j.append("run_started", key="k1")
+    assert j.stats["errors"] == 1
@@ -0,0 +1,73 @@
+import pytest
+
+ttd_bot = pytest.importorskip("ttd_bot")
+RunPhases = ttd_bot.RunPhases
+
+
+def _events():
+    phases = RunPhases()
+    events = []
+    phases.add_listener(events.append)
+    return phases, events
+
+
+def test_enter_is_ignored_outside_a_run():
+    phases, events = _events()
+    phases.enter("leader_fill")
+    assert events == []
+    assert phases.current() is None
+    assert phases.finish() is None
+
+
+def test_start_enters_wait_for_form():
+    phases, events = _events()
+    phases.start("r1")
+    assert events[0]["type"] == "phase"
+    assert events[0]["phase"] == "wait_for_form"
+    assert events[0]["prev"] is None
+    assert phases.current()["phase"] == "wait_for_form"
+
+
+def test_entering_a_phase_closes_the_previous_one():
+    phases, events = _events()
+    phases.start("r1")
+    phases.enter("leader_fill", member=1)
+    phases.enter("wait_for_save", member=1)
+    prev = events[-1]["prev"]
+    assert prev["phase"] == "leader_fill"
+    assert prev["member"] == 1
+    assert prev["seconds"] >= 0
+    assert phases.current()["member"] == 1
+
+
+def test_finish_records_the_run_with_every_phase():
+    phases, events = _events()
+    phases.start("r1")
+    for p in ("leader_fill", "wait_for_save", "member_fill", "wait_for_final_save", "continue"):
+        phases.enter(p)
+    run = phases.finish("done")
+    assert run["run_id"] == "r1" and run["outcome"] == "done"
+    assert [r["phase"] for r in run["phases"]] == ["wait_for_form", "leader_fill", "wait_for_save", "member_fill",
+                                                   "wait_for_final_save", "continue"]
+    assert events[-1]["type"] == "run_end"
+    assert events[-1]["prev"]["phase"] == "continue"
+    assert list(phases.history) == [run]
+    assert phases.current() is None
+
+
+def test_a_new_run_starts_with_an_empty_phase_list():
+    phases, _ = _events()
+    phases.start("r1")
+    phases.finish("stopped")
+    phases.start("r2")
+    run = phases.finish("failed")
+    assert [r["phase"] for r in run["phases"]] == ["wait_for_form"]
+    assert [r["outcome"] for r in phases.history] == ["stopped", "failed"]
+
+
+def test_listener_errors_do_not_break_transitions():
+    phases, events = _events()
+    phases.add_listener(lambda ev: 1 / 0)
+    phases.start("r1")
+    phases.enter("leader_fill")
+    assert [e["phase"] for e in events] == ["wait_for_form", "leader_fill"]
@@ -0,0 +1,74 @@
+import pytest
+
+ttd_bot = pytest.importorskip("ttd_bot")
+UIDelayController = ttd_bot.UIDelayController
+
+
+def test_unknown_delay_defaults():
+    assert UIDelayController().get("nope") == 0.1
+
+
+def test_set_base_respects_floor():
+    d = UIDelayController(floor=0.05)
+    d.set_base("open", 0.01)
+    assert d.get("open") == 0.05
+    d.set_base("open", 0.2)
+    assert d.get("open") == 0.2
+
+
+def test_value_follows_percentile_with_margin():
+    d = UIDelayController(percentile=0.9, margin=1.5, window=10, floor=0.01)
+    d.set_base("post_select", 0.5)
+    for s in (0.1, 0.1, 0.1, 0.1, 0.1, 0.1, 0.1, 0.1, 0.1, 0.2):
+        d.observe("post_select", s)
+    # p90 of the window is 0.1 (index round(0.9 * 9) = 8), times the margin
+    assert d.get("post_select") == pytest.approx(0.15)
+
+
+def test_window_forgets_old_samples():
+    d = UIDelayController(percentile=1.0, margin=1.0, window=3, floor=0.01)
+    d.set_base("open", 0.5)
+    for s in (0.4, 0.05, 0.05, 0.05):
+        d.observe("open", s)
+    assert d.get("open") == pytest.approx(0.05)
+
+
+def test_value_is_capped_at_ceiling():
+    d = UIDelayController(margin=1.0)
+    d.set_base("open", 0.1)
+    d.observe("open", 30.0)
+    assert d.get("open") == pytest.approx(1.0)  # max(1.0, base * 8)
+
+
+def test_failure_backs_off_and_success_relaxes():
+    d = UIDelayController(floor=0.01)
+    d.set_base("post_select", 0.1)
+    d.failure("post_select")
+    assert d.get("post_select") == pytest.approx(0.15)
+    d.failure("post_select")
+    assert d.get("post_select") == pytest.approx(0.225)
+    for _ in range(50):
+        d.success("post_select")
+    # back-off relaxes to 1.0; with no samples the value itself also shrinks
+    assert d.get("post_select") < 0.1
+
+
+def test_backoff_is_bounded():
+    d = UIDelayController()
+    d.set_base("open", 0.1)
+    for _ in range(20):
+        d.failure("open")
+    assert d.get("open") == pytest.approx(0.4)
+
+
+def test_wait_budget_and_snapshot():
+    d = UIDelayController()
+    d.set_base("open", 0.2)
+    assert d.wait_budget("open") == pytest.approx(0.8)
+    assert d.wait_budget("open", factor=1.0, minimum=0.5) == 0.5
+    d.observe("open", 0.1)
+    d.failure("open", reason="verify")
+    snap = d.snapshot()
+    entry = snap["delays"]["open"]
+    assert entry["samples"] == 1 and entry["observations"] == 1 and entry["failures"] == 1
+    assert snap["history"][-1]["reason"] == "verify"
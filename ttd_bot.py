@@ -8,7 +8,8 @@ from selenium.webdriver.support.ui import Select, WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException, StaleElementReferenceException
+from selenium.common.exceptions import InvalidSessionIdException, NoSuchWindowException
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.keys import Keys
 from webdriver_manager.chrome import ChromeDriverManager
@@ -17,31 +18,1670 @@ import os
 import re
 import difflib
 import random
-from collections import deque
+import uuid
+import contextlib
+import queue
+import concurrent.futures
+import base64
+import hashlib
+import io
+import select
+import struct
+from collections import deque, OrderedDict
 
 try:
     import pyttsx3
 except Exception:
     pyttsx3 = None
 
+try:
+    from PIL import Image
+except Exception:
+    Image = None
+
+try:
+    import ctypes
+    import ctypes.util
+    # Linux only: inotify for the config file watcher (polling elsewhere)
+    _libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    _libc.inotify_init1
+except Exception:
+    _libc = None
+
+from metrics import REGISTRY
+
+GAZETTEER_VERSION = 1
+
+# Bot-side Prometheus metrics (exposed by the API's /metrics)
+WEBDRIVER_SECONDS = REGISTRY.histogram(
+    "webdriver_command_duration_seconds", "WebDriver command latency by command type", ("command",))
+FIELD_SECONDS = REGISTRY.histogram(
+    "fill_field_duration_seconds", "Time to fill one form field (traced runs)", ("field",),
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30))
+DROPDOWN_SECONDS = REGISTRY.histogram(
+    "dropdown_select_duration_seconds", "Dropdown open-to-commit time by resolution method", ("method",),
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10))
+
+
+class DropdownOptionIndex:
+    # Precomputed lookup over one dropdown's option labels. Exact and substring hits
+    # score 1.0; otherwise the best SequenceMatcher ratio among trigram-shortlisted labels,
+    # widened to every label when the shortlist has nothing at FULL_SCAN_BELOW or better.
+    SHORTLIST = 12
+    FULL_SCAN_BELOW = 0.8
+
+    def __init__(self, labels):
+        self.labels = [str(t or "").strip() for t in labels]
+        self.norms = [self._norm(t) for t in self.labels]
+        self.signature = hash(tuple(self.norms))
+        self.exact = {}
+        self.tokens = {}
+        self.trigrams = {}
+        for i, n in enumerate(self.norms):
+            self.exact.setdefault(n, i)
+            for tok in n.split():
+                self.tokens.setdefault(tok, set()).add(i)
+            for g in self._grams(n):
+                self.trigrams.setdefault(g, set()).add(i)
+        self._resolved = {}
+
+    @staticmethod
+    def _norm(text):
+        return " ".join(str(text or "").strip().lower().split())
+
+    @staticmethod
+    def _grams(n):
+        p = f"  {n} "
+        return {p[i:i + 3] for i in range(len(p) - 2)}
+
+    def __len__(self):
+        return len(self.labels)
+
+    def match(self, value):
+        # Returns (index, label, score); index is None when nothing is comparable
+        v = self._norm(value)
+        if not v or not self.labels:
+            return None, None, 0.0
+        hit = self._resolved.get(v)
+        if hit is None:
+            hit = self._match(v)
+            self._resolved[v] = hit
+        i, score = hit
+        return i, (self.labels[i] if i is not None else None), score
+
+    def _match(self, v):
+        if v in self.exact:
+            return self.exact[v], 1.0
+        grams = self._grams(v)
+        # Substring: every trigram inside the value (excluding its padded edges) must occur
+        inner = {g for g in grams if not g.startswith(" ") and not g.endswith(" ")}
+        cand = None if inner else set(range(len(self.norms)))
+        for g in inner:
+            post = self.trigrams.get(g)
+            if not post:
+                cand = set()
+                break
+            cand = set(post) if cand is None else cand & post
+            if not cand:
+                break
+        for i in sorted(cand or ()):
+            if v in self.norms[i]:
+                return i, 1.0
+        # Fuzzy: rank by shared trigrams (plus shared tokens), then score the shortlist
+        counts = {}
+        common = max(self.SHORTLIST, len(self.norms) // 4)
+        for g in grams:
+            post = self.trigrams.get(g, ())
+            if len(post) > common:
+                continue  # too common to discriminate (e.g. "ist" in every "District")
+            for i in post:
+                counts[i] = counts.get(i, 0) + 1
+        for tok in v.split():
+            for i in self.tokens.get(tok, ()):
+                counts[i] = counts.get(i, 0) + 2
+        shortlist = sorted(counts, key=lambda i: (-counts[i], i))[:self.SHORTLIST]
+        best_i, best_ratio = None, 0.0
+        for i in shortlist:
+            ratio = difflib.SequenceMatcher(None, v, self.norms[i]).ratio()
+            if ratio > best_ratio:
+                best_i, best_ratio = i, ratio
+        if best_ratio < self.FULL_SCAN_BELOW:
+            # The shortlist is a heuristic: score the rest too, skipping labels whose cheap
+            # upper bounds cannot beat the current best
+            seen = set(shortlist)
+            sm = difflib.SequenceMatcher(None, v, "")
+            for i, n in enumerate(self.norms):
+                if i in seen:
+                    continue
+                sm.set_seq2(n)
+                if sm.real_quick_ratio() <= best_ratio or sm.quick_ratio() <= best_ratio:
+                    continue
+                ratio = sm.ratio()
+                if ratio > best_ratio:
+                    best_i, best_ratio = i, ratio
+        return best_i, best_ratio
+
+
+class UIDelayController:
+    # Self-tuning UI delays: each value follows a rolling percentile of measured latencies
+    # (with a safety margin) and is multiplied by a back-off factor after verification failures.
+    def __init__(self, percentile=0.9, margin=1.3, window=40, floor=0.02):
+        self.percentile = percentile
+        self.margin = margin
+        self.window = window
+        self.floor = floor
+        self._delays = {}
+        self.history = deque(maxlen=300)
+        self._lock = threading.Lock()
+
+    def _entry(self, name):
+        d = self._delays.get(name)
+        if d is None:
+            d = {"base": 0.1, "value": 0.1, "samples": deque(maxlen=self.window), "backoff": 1.0,
+                 "observations": 0, "failures": 0, "successes": 0}
+            self._delays[name] = d
+        return d
+
+    def set_base(self, name, seconds):
+        with self._lock:
+            d = self._entry(name)
+            d["base"] = d["value"] = max(self.floor, float(seconds))
+            d["samples"].clear()
+            d["backoff"] = 1.0
+
+    def get(self, name):
+        d = self._delays.get(name)
+        if d is None:
+            return 0.1
+        return min(self._ceiling(d), d["value"] * d["backoff"])
+
+    def _ceiling(self, d):
+        return max(1.0, d["base"] * 8)
+
+    def _percentile(self, samples):
+        vals = sorted(samples)
+        if not vals:
+            return None
+        k = min(len(vals) - 1, max(0, int(round(self.percentile * (len(vals) - 1)))))
+        return vals[k]
+
+    def _changed(self, name, d, reason):
+        self.history.append({"ts": time.time(), "name": name, "value": round(self.get(name), 4), "reason": reason})
+
+    def observe(self, name, seconds):
+        # A measured latency (panel appeared, selection committed)
+        with self._lock:
+            d = self._entry(name)
+            d["samples"].append(max(0.0, float(seconds)))
+            d["observations"] += 1
+            p = self._percentile(d["samples"])
+            d["value"] = min(self._ceiling(d), max(self.floor, p * self.margin))
+            d["backoff"] = max(1.0, d["backoff"] * 0.9)
+            if d["observations"] % 10 == 1:
+                self._changed(name, d, "observe")
+
+    def success(self, name):
+        # Verified without a measurement: relax back-off, and shrink slowly when unmeasured
+        with self._lock:
+            d = self._entry(name)
+            d["successes"] += 1
+            d["backoff"] = max(1.0, d["backoff"] * 0.9)
+            if not d["samples"]:
+                d["value"] = max(self.floor, d["value"] * 0.95)
+
+    def failure(self, name, reason="verify"):
+        with self._lock:
+            d = self._entry(name)
+            d["failures"] += 1
+            d["backoff"] = min(4.0, d["backoff"] * 1.5)
+            self._changed(name, d, reason)
+
+    def wait_budget(self, name, factor=4.0, minimum=0.5):
+        # Upper bound for in-page waits that measure this delay
+        return max(minimum, self.get(name) * factor)
+
+    def snapshot(self):
+        with self._lock:
+            out = {}
+            for name, d in self._delays.items():
+                samples = list(d["samples"])
+                out[name] = {
+                    "value": round(self.get(name), 4),
+                    "base": d["base"],
+                    "backoff": round(d["backoff"], 3),
+                    "p50": self._percentile_at(samples, 0.5),
+                    "p90": self._percentile_at(samples, 0.9),
+                    "samples": len(samples),
+                    "observations": d["observations"],
+                    "successes": d["successes"],
+                    "failures": d["failures"],
+                }
+            return {"delays": out, "history": list(self.history)[-50:]}
+
+    @staticmethod
+    def _percentile_at(samples, q):
+        vals = sorted(samples)
+        if not vals:
+            return None
+        return round(vals[min(len(vals) - 1, int(round(q * (len(vals) - 1))))], 4)
+
+
+class RunTracer:
+    # Per-run spans (run / member / field) kept in memory, with WebDriver round trips
+    # counted per thread; exportable as Chrome trace-event JSON.
+    def __init__(self, max_runs=20, max_spans=20000):
+        self.max_runs = max_runs
+        self.max_spans = max_spans
+        self._runs = OrderedDict()
+        self._lock = threading.Lock()
+        self._tls = threading.local()
+        self.current_run_id = None
+        self.commands = {}  # WebDriver command -> {"count", "seconds"}
+
+    def start_run(self, run_id=None, **attrs):
+        run_id = run_id or uuid.uuid4().hex[:12]
+        with self._lock:
+            self._runs[run_id] = {"id": run_id, "started": time.time(), "ended": None, "attrs": attrs, "spans": [], "dropped": 0}
+            while len(self._runs) > self.max_runs:
+                self._runs.popitem(last=False)
+            self.current_run_id = run_id
+        return run_id
+
+    def end_run(self, run_id=None):
+        with self._lock:
+            run = self._runs.get(run_id or self.current_run_id)
+            if run and not run["ended"]:
+                run["ended"] = time.time()
+            if run_id is None or run_id == self.current_run_id:
+                self.current_run_id = None
+
+    def note_round_trip(self):
+        # Counted on the issuing thread, so spans see their own round trips
+        self._tls.rt = getattr(self._tls, "rt", 0) + 1
+
+    def count_command(self, command, seconds):
+        with self._lock:
+            c = self.commands.setdefault(command, {"count": 0, "seconds": 0.0})
+            c["count"] += 1
+            c["seconds"] += seconds
+
+    def round_trips(self):
+        return getattr(self._tls, "rt", 0)
+
+    @contextlib.contextmanager
+    def span(self, name, cat="field", **attrs):
+        run_id = self.current_run_id
+        if run_id is None:
+            yield
+            return
+        stack = getattr(self._tls, "stack", None)
+        if stack is None:
+            stack = self._tls.stack = []
+        # Member (and other) attributes are inherited by nested spans
+        inherited = dict(stack[-1]) if stack else {}
+        inherited.update({k: v for k, v in attrs.items() if k == "member"})
+        stack.append(inherited)
+        t0 = time.time()
+        rt0 = self.round_trips()
+        err = None
+        try:
+            yield
+        except BaseException as e:
+            err = type(e).__name__
+            raise
+        finally:
+            stack.pop()
+            args = dict(inherited)
+            args.update(attrs)
+            args["round_trips"] = self.round_trips() - rt0
+            if err:
+                args["error"] = err
+            rec = {"name": name, "cat": cat, "ts": t0, "dur": time.time() - t0,
+                   "depth": len(stack), "tid": threading.get_ident(), "args": args}
+            if cat == "field":
+                FIELD_SECONDS.observe(rec["dur"], field=name)
+            with self._lock:
+                run = self._runs.get(run_id)
+                if run is not None:
+                    if len(run["spans"]) < self.max_spans:
+                        run["spans"].append(rec)
+                    else:
+                        run["dropped"] += 1
+
+    def list_runs(self):
+        with self._lock:
+            return [{"id": r["id"], "started": r["started"], "ended": r["ended"], "spans": len(r["spans"])} for r in self._runs.values()]
+
+    def get(self, run_id):
+        # Spans plus per-member and per-field totals
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run is None:
+                return None
+            spans = list(run["spans"])
+            out = {k: run[k] for k in ("id", "started", "ended", "attrs", "dropped")}
+        fields, members = {}, {}
+        for sp in spans:
+            if sp["cat"] in ("field", "wait"):
+                f = fields.setdefault(sp["name"], {"count": 0, "seconds": 0.0, "round_trips": 0})
+                f["count"] += 1
+                f["seconds"] += sp["dur"]
+                f["round_trips"] += sp["args"].get("round_trips", 0)
+            if sp["cat"] == "member":
+                members[str(sp["args"].get("member"))] = {"seconds": sp["dur"], "round_trips": sp["args"].get("round_trips", 0)}
+        out["spans"] = spans
+        out["fields"] = fields
+        out["members"] = members
+        return out
+
+    def to_chrome(self, run_id):
+        # Chrome trace-event format ("X" complete events, microseconds) for chrome://tracing / Perfetto
+        run = self.get(run_id)
+        if run is None:
+            return None
+        base = run["started"]
+        events = [{"name": "process_name", "ph": "M", "pid": 1, "args": {"name": f"ttd-bot run {run_id}"}}]
+        for sp in run["spans"]:
+            events.append({
+                "name": sp["name"], "cat": sp["cat"], "ph": "X", "pid": 1, "tid": sp["tid"],
+                "ts": round((sp["ts"] - base) * 1e6, 1), "dur": round(sp["dur"] * 1e6, 1), "args": sp["args"],
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+class LogRing:
+    # Fixed-size log ring with contiguous sequence numbers: the entry with seq s lives
+    # in slot (s - 1) % capacity, so "entries after N" is a direct offset, not a scan.
+    def __init__(self, capacity=1000):
+        self.capacity = max(1, int(capacity))
+        self._slots = [None] * self.capacity
+        self.last_seq = 0
+        self._lock = threading.Lock()
+        self._subscribers = []
+
+    @property
+    def first_seq(self):
+        # Oldest seq still held (last_seq + 1 when empty)
+        return max(1, self.last_seq - self.capacity + 1)
+
+    def __len__(self):
+        return min(self.last_seq, self.capacity)
+
+    def __iter__(self):
+        return iter(self.since(0, limit=self.capacity)["items"])
+
+    def append(self, msg, ts=None, **extra):
+        with self._lock:
+            self.last_seq += 1
+            item = {"seq": self.last_seq, "ts": ts or time.strftime('%H:%M:%S'), "msg": msg}
+            item.update(extra)
+            self._slots[(self.last_seq - 1) % self.capacity] = item
+            subscribers = list(self._subscribers)
+        # Wake streaming readers (API /stream); callbacks must not block the logging thread
+        for fn in subscribers:
+            try:
+                fn(item)
+            except Exception:
+                pass
+        return item
+
+    def subscribe(self, fn):
+        with self._lock:
+            self._subscribers.append(fn)
+
+    def unsubscribe(self, fn):
+        with self._lock:
+            try:
+                self._subscribers.remove(fn)
+            except ValueError:
+                pass
+
+    def since(self, seq=0, limit=None):
+        # Entries with seq > `seq`, oldest first, at most `limit` of them. `dropped` counts
+        # entries the caller missed because they were overwritten before it caught up; a
+        # fresh reader (seq 0) only asked for what is retained, so it never sees a gap.
+        with self._lock:
+            seq = max(0, int(seq or 0))
+            last = self.last_seq
+            first = self.first_seq
+            start = max(seq + 1, first)
+            dropped = first - (seq + 1) if 0 < seq < first - 1 else 0
+            end = last
+            if limit is not None and limit >= 0:
+                end = min(last, start + int(limit) - 1)
+            items = [self._slots[(s - 1) % self.capacity] for s in range(start, end + 1)]
+        if items:
+            latest = end
+        elif seq > last:
+            latest = last  # client is ahead of us (bot restarted): resync
+        else:
+            latest = seq
+        return {
+            "items": items,
+            "latest": latest,
+            "last_seq": last,
+            "oldest": first if last else None,
+            "dropped": dropped,
+            "more": end < last,
+        }
+
+
+class RunPhases:
+    # Run-phase state machine. Entering a phase closes the previous one and notifies
+    # listeners with a typed event; finish() closes the run with an outcome.
+    #   wait_for_form -> leader_fill -> (wait_for_save -> member_fill)* -> wait_for_final_save -> continue -> done
+    PHASES = ("wait_for_form", "leader_fill", "wait_for_save", "member_fill", "wait_for_final_save", "continue")
+    OUTCOMES = ("done", "stopped", "failed")
+
+    def __init__(self, history=50):
+        self.run_id = None
+        self.phase = None
+        self.attrs = {}
+        self._entered = None
+        self._run_started = None
+        self._phases = []
+        self.history = deque(maxlen=history)
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, fn):
+        self._listeners.append(fn)
+
+    def _emit(self, ev):
+        for fn in list(self._listeners):
+            try:
+                fn(ev)
+            except Exception:
+                pass
+
+    def _close(self, now):
+        # Close the current phase; returns its record (or None)
+        if self.phase is None:
+            return None
+        rec = {"phase": self.phase, "seconds": round(now - self._entered, 4), **self.attrs}
+        self._phases.append(rec)
+        return rec
+
+    def start(self, run_id, phase="wait_for_form"):
+        with self._lock:
+            self.run_id = run_id
+            self.phase = None
+            self._phases = []
+            self._run_started = time.time()
+        self.enter(phase)
+
+    def enter(self, phase, **attrs):
+        now = time.time()
+        with self._lock:
+            if self.run_id is None:
+                return
+            prev = self._close(now)
+            self.phase, self.attrs, self._entered = phase, attrs, now
+            ev = {"type": "phase", "run_id": self.run_id, "phase": phase, "attrs": attrs, "ts": now, "prev": prev}
+        self._emit(ev)
+
+    def finish(self, outcome="done"):
+        now = time.time()
+        with self._lock:
+            if self.run_id is None:
+                return None
+            prev = self._close(now)
+            run = {
+                "run_id": self.run_id, "outcome": outcome, "started": self._run_started, "ended": now,
+                "seconds": round(now - self._run_started, 3), "phases": self._phases,
+            }
+            self.history.append(run)
+            self.run_id, self.phase, self.attrs = None, None, {}
+            ev = {"type": "run_end", "run_id": run["run_id"], "phase": outcome, "attrs": {}, "ts": now, "prev": prev, "run": run}
+        self._emit(ev)
+        return run
+
+    def current(self):
+        with self._lock:
+            if self.run_id is None:
+                return None
+            return {"run_id": self.run_id, "phase": self.phase, "since": self._entered, **self.attrs}
+
+
+DRIVER_FILL, DRIVER_NORMAL, DRIVER_BACKGROUND = 0, 1, 2
+DRIVER_PRIORITY_NAMES = {DRIVER_FILL: "fill", DRIVER_NORMAL: "normal", DRIVER_BACKGROUND: "background"}
+
+
+class DriverExecutor:
+    # Single owner thread for every WebDriver command. Commands from any thread are queued by
+    # priority (fill before user actions before screenshots/probes) and run one at a time;
+    # callers wait with a per-priority timeout. Cancelled/timed-out commands that have not
+    # started are skipped.
+    DEFAULT_TIMEOUTS = {DRIVER_FILL: None, DRIVER_NORMAL: 60.0, DRIVER_BACKGROUND: 10.0}
+
+    def __init__(self):
+        self._queue = queue.PriorityQueue()
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._tls = threading.local()
+        self._thread = None
+        self._depth = {p: 0 for p in DRIVER_PRIORITY_NAMES}
+        self.stats = {"commands": 0, "timeouts": 0, "errors": 0, "cancelled": 0,
+                      "wait_seconds": 0.0, "exec_seconds": 0.0, "max_wait_seconds": 0.0}
+
+    def is_owner(self):
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    @contextlib.contextmanager
+    def priority(self, level):
+        # Priority for driver commands issued from this thread inside the block
+        prev = getattr(self._tls, "priority", None)
+        self._tls.priority = level
+        try:
+            yield
+        finally:
+            self._tls.priority = prev
+
+    def set_priority(self, level):
+        # For dedicated threads (bot run loop, probes): all their commands use this priority
+        self._tls.priority = level
+
+    def current_priority(self):
+        p = getattr(self._tls, "priority", None)
+        return DRIVER_NORMAL if p is None else p
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="webdriver", daemon=True)
+                self._thread.start()
+
+    def submit(self, fn, priority=None):
+        priority = self.current_priority() if priority is None else priority
+        fut = concurrent.futures.Future()
+        self._ensure_thread()
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+            self._depth[priority] = self._depth.get(priority, 0) + 1
+        self._queue.put((priority, seq, time.perf_counter(), fn, fut))
+        return fut
+
+    def call(self, fn, priority=None, timeout=-1):
+        # Run fn() on the owner thread and wait for it (directly when already on the owner thread)
+        if self.is_owner():
+            return fn()
+        priority = self.current_priority() if priority is None else priority
+        if timeout == -1:
+            timeout = self.DEFAULT_TIMEOUTS.get(priority)
+        fut = self.submit(fn, priority)
+        try:
+            return fut.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            fut.cancel()
+            self.stats["timeouts"] += 1
+            raise TimeoutException(f"WebDriver command timed out after {timeout}s ({DRIVER_PRIORITY_NAMES.get(priority)} priority)")
+
+    async def run(self, fn, priority=DRIVER_NORMAL, timeout=-1):
+        # Awaitable variant for async API handlers (no worker thread is held while waiting)
+        import asyncio
+        if timeout == -1:
+            timeout = self.DEFAULT_TIMEOUTS.get(priority)
+        fut = self.submit(fn, priority)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(fut), timeout=timeout)
+        except asyncio.TimeoutError:
+            fut.cancel()
+            self.stats["timeouts"] += 1
+            raise TimeoutException(f"WebDriver command timed out after {timeout}s ({DRIVER_PRIORITY_NAMES.get(priority)} priority)")
+
+    def wrap(self, execute):
+        # Route a driver's execute() through the owner thread, keeping the caller's priority
+        def routed(driver_command, params=None):
+            if self.is_owner():
+                return execute(driver_command, params)
+            return self.call(lambda: execute(driver_command, params))
+        return routed
+
+    def _run(self):
+        while True:
+            priority, _, queued_at, fn, fut = self._queue.get()
+            with self._lock:
+                self._depth[priority] -= 1
+            if not fut.set_running_or_notify_cancel():
+                self.stats["cancelled"] += 1
+                continue
+            t0 = time.perf_counter()
+            wait = t0 - queued_at
+            try:
+                fut.set_result(fn())
+            except BaseException as e:
+                self.stats["errors"] += 1
+                fut.set_exception(e)
+            self.stats["commands"] += 1
+            self.stats["wait_seconds"] += wait
+            self.stats["max_wait_seconds"] = max(self.stats["max_wait_seconds"], wait)
+            self.stats["exec_seconds"] += time.perf_counter() - t0
+
+    def snapshot(self):
+        with self._lock:
+            depth = {DRIVER_PRIORITY_NAMES[p]: n for p, n in self._depth.items()}
+        return {"queue_depth": depth, **{k: (round(v, 4) if isinstance(v, float) else v) for k, v in self.stats.items()}}
+
+
+class ScreenshotService:
+    # Rate-limited, downscaled, change-aware browser frames. Chrome encodes JPEG/WebP at the
+    # target width itself (CDP Page.captureScreenshot with a scaled clip); otherwise the PNG
+    # screenshot is downscaled with Pillow when installed. Frames are hashed so an unchanged
+    # page keeps its ETag and is not re-sent.
+    MIME = {"jpeg": "image/jpeg", "webp": "image/webp", "png": "image/png"}
+    # Errors meaning the driver has no CDP at all; anything else (navigation, window switch)
+    # only pauses CDP capture for a back-off that doubles up to CDP_RETRY_MAX seconds
+    _NO_CDP_MARKERS = ("unknown command", "not supported", "unknown method", "not implemented")
+    CDP_RETRY_MIN, CDP_RETRY_MAX = 2.0, 60.0
+
+    def __init__(self, interval=1.0, max_width=960, fmt="jpeg", quality=60):
+        self.interval = interval
+        self.max_width = max_width
+        self.fmt = fmt
+        self.quality = quality
+        self._frame = None
+        self._lock = threading.Lock()
+        self._cdp = True
+        self._cdp_retry_at = 0.0
+        self._cdp_backoff = self.CDP_RETRY_MIN
+        self.stats = {"captures": 0, "unchanged": 0, "served_cached": 0, "bytes": 0, "capture_seconds": 0.0,
+                      "cdp_errors": 0}
+
+    def configure(self, interval=None, max_width=None, fmt=None, quality=None):
+        if interval is not None:
+            self.interval = max(0.1, float(interval))
+        if max_width is not None:
+            self.max_width = max(160, int(max_width))
+        if fmt and str(fmt).lower() in self.MIME:
+            self.fmt = str(fmt).lower()
+        if quality is not None:
+            self.quality = max(10, min(int(quality), 95))
+
+    def fresh(self):
+        # Cached frame if it is younger than the capture interval, else None
+        with self._lock:
+            f = self._frame
+            if f and time.time() - f["ts"] < self.interval:
+                self.stats["served_cached"] += 1
+                return f
+        return None
+
+    def latest(self):
+        return self._frame
+
+    def capture(self, driver):
+        # Runs on the WebDriver owner thread; concurrent requesters queue behind one capture
+        # and get the cached frame
+        f = self.fresh()
+        if f is not None:
+            return f
+        t0 = time.time()
+        data, mime = self._grab(driver)
+        digest = hashlib.blake2b(data, digest_size=12).hexdigest()
+        now = time.time()
+        with self._lock:
+            prev = self._frame
+            self.stats["captures"] += 1
+            self.stats["capture_seconds"] += now - t0
+            if prev and prev["hash"] == digest:
+                self.stats["unchanged"] += 1
+                prev["ts"] = now
+                return prev
+            self.stats["bytes"] += len(data)
+            self._frame = {"data": data, "mime": mime, "hash": digest, "etag": f'"{digest}"', "ts": now, "changed_at": now}
+            return self._frame
+
+    def _grab(self, driver):
+        fmt = self.fmt
+        if self._cdp and hasattr(driver, "execute_cdp_cmd") and time.time() >= self._cdp_retry_at:
+            try:
+                vp = driver.execute_cdp_cmd("Page.getLayoutMetrics", {}).get("cssVisualViewport") or {}
+                w, h = float(vp.get("clientWidth") or 0), float(vp.get("clientHeight") or 0)
+                params = {"format": fmt, "captureBeyondViewport": False}
+                if fmt != "png":
+                    params["quality"] = self.quality
+                if w and h:
+                    params["clip"] = {"x": vp.get("pageX", 0), "y": vp.get("pageY", 0), "width": w, "height": h,
+                                      "scale": min(1.0, self.max_width / w)}
+                res = driver.execute_cdp_cmd("Page.captureScreenshot", params)
+                self._cdp_backoff = self.CDP_RETRY_MIN
+                return base64.b64decode(res["data"]), self.MIME[fmt]
+            except Exception as e:
+                self.stats["cdp_errors"] += 1
+                if isinstance(e, AttributeError) or any(m in str(e).lower() for m in self._NO_CDP_MARKERS):
+                    self._cdp = False  # not Chrome / CDP unavailable: use the WebDriver screenshot from now on
+                else:
+                    self._cdp_retry_at = time.time() + self._cdp_backoff
+                    self._cdp_backoff = min(self._cdp_backoff * 2, self.CDP_RETRY_MAX)
+        png = driver.get_screenshot_as_png()
+        if Image is None:
+            return png, "image/png"
+        try:
+            img = Image.open(io.BytesIO(png))
+            if img.width > self.max_width:
+                img = img.resize((self.max_width, max(1, int(img.height * self.max_width / img.width))))
+            out = io.BytesIO()
+            if fmt == "jpeg":
+                img.convert("RGB").save(out, "JPEG", quality=self.quality)
+            elif fmt == "webp":
+                img.save(out, "WEBP", quality=self.quality)
+            else:
+                img.save(out, "PNG", optimize=True)
+            return out.getvalue(), self.MIME[fmt]
+        except Exception:
+            return png, "image/png"
+
+
+class BrowserStateProbe:
+    # Background driver-health probe. One execute_script per interval reads URL, title and
+    # whether the Srivari form is showing; readers only ever see the cached snapshot, so a
+    # busy or hung driver makes the snapshot stale instead of blocking the caller.
+    _PROBE_JS = """
+        const heads = Array.from(document.querySelectorAll('h1,h2,h3,legend'));
+        const srivari = heads.some(h => /team leader|srivari seva/i.test(h.textContent || ''));
+        return [location.href, document.title, srivari];
+    """
+    # Error text of a driver whose browser process is gone (chromedriver / urllib3 wording)
+    _GONE_MARKERS = ("connection refused", "max retries exceeded", "failed to establish a new connection",
+                     "chrome not reachable", "disconnected: not connected to devtools", "target window already closed")
+
+    def __init__(self, get_driver, interval=1.0, executor=None):
+        self.get_driver = get_driver
+        self.interval = interval
+        self.executor = executor
+        self._snap = {"url": None, "title": None, "is_srivari": False, "alive": False,
+                      "checked_at": None, "last_alive": None, "failures": 0, "error": None, "probe_ms": None}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._wake = threading.Event()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="browser-probe", daemon=True)
+            self._thread.start()
+
+    def poke(self):
+        # Probe now (e.g. right after navigation) instead of at the next interval
+        self._wake.set()
+
+    def _run(self):
+        if self.executor is not None:
+            self.executor.set_priority(DRIVER_BACKGROUND)
+        while True:
+            driver = self.get_driver()
+            if driver is not None:
+                self.probe(driver)
+            elif self._snap["alive"]:
+                with self._lock:
+                    self._snap.update(alive=False, url=None, title=None, is_srivari=False, checked_at=time.time())
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def probe(self, driver):
+        t0 = time.time()
+        try:
+            url, title, srivari = driver.execute_script(self._PROBE_JS)
+            now = time.time()
+            with self._lock:
+                self._snap.update(url=url, title=title, is_srivari=bool(srivari), alive=True, checked_at=now,
+                                  last_alive=now, failures=0, error=None, probe_ms=round((now - t0) * 1000, 1))
+        except Exception as e:
+            now = time.time()
+            with self._lock:
+                if self.session_lost(e):
+                    self._snap.update(alive=False, failures=self._snap["failures"] + 1)
+                # A busy driver (executor timeout), an open alert or a script error says nothing
+                # about the window being closed: record it, keep liveness as it was
+                self._snap.update(checked_at=now, error=str(e)[:200], probe_ms=round((now - t0) * 1000, 1))
+
+    @classmethod
+    def session_lost(cls, exc):
+        # Only these mean the browser/window is gone; run_bot treats repeated ones as "closed by user"
+        if isinstance(exc, (InvalidSessionIdException, NoSuchWindowException, ConnectionError)):
+            return True
+        text = str(exc).lower()
+        return any(m in text for m in cls._GONE_MARKERS)
+
+    def snapshot(self):
+        with self._lock:
+            snap = dict(self._snap)
+        # Freshness: seconds since the last completed probe (None before the first one)
+        snap["age_seconds"] = round(time.time() - snap["checked_at"], 3) if snap["checked_at"] else None
+        return snap
+
+
+LOG_DEBUG, LOG_INFO, LOG_WARNING, LOG_ERROR = 10, 20, 30, 40
+LOG_LEVELS = {"debug": LOG_DEBUG, "info": LOG_INFO, "warning": LOG_WARNING, "error": LOG_ERROR}
+
+# Redaction for everything that leaves the process (API buffer, JSON-lines file):
+# 12+ digit runs (Aadhaar-like) and email-like tokens
+_REDACT_PATTERNS = (
+    re.compile(r"\b(?:\d{4}[ -]?){2,}\d{4,}\b"),
+    re.compile(r"[\w.%-]+@[\w.-]+\.[A-Za-z]{2,}"),
+)
+
+
+def redact(text):
+    for pat in _REDACT_PATTERNS:
+        text = pat.sub("[REDACTED]", text)
+    return text
+
+
+class LogPipeline:
+    # Structured log events: callers only enqueue (time, level, event, fmt, args); a daemon
+    # sink thread formats, redacts, timestamps and fans out to the LogRing, an optional
+    # JSON-lines file and local sinks (GUI, voice). Records below `level` are dropped at
+    # the call site before any formatting happens.
+    def __init__(self, ring, level=LOG_INFO, jsonl_path=None):
+        self.ring = ring
+        self.level = level
+        self.jsonl_path = jsonl_path
+        self._jsonl = None
+        self._sinks = []
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._enqueued = 0
+        self._done = 0
+        self.stats = {"emitted": 0, "filtered": 0, "sink_errors": 0}
+        self._thread = threading.Thread(target=self._run, name="log-sink", daemon=True)
+        self._thread.start()
+
+    def set_level(self, level):
+        if isinstance(level, str):
+            level = LOG_LEVELS.get(level.strip().lower(), LOG_INFO)
+        self.level = int(level)
+
+    def enabled(self, level):
+        return level >= self.level
+
+    def add_sink(self, fn):
+        # fn(item, text): item is the redacted record, text the original message for local display
+        self._sinks.append(fn)
+
+    def emit(self, level, fmt, args=(), event=None):
+        if level < self.level:
+            self.stats["filtered"] += 1
+            return
+        with self._cond:
+            self._queue.append((time.time(), level, event, fmt, args))
+            self._enqueued += 1
+            self._cond.notify()
+
+    def flush(self, timeout=2.0):
+        # Block until everything enqueued so far has reached the sinks
+        deadline = time.time() + timeout
+        with self._cond:
+            target = self._enqueued
+            while self._done < target:
+                left = deadline - time.time()
+                if left <= 0:
+                    return False
+                self._cond.wait(left)
+        return True
+
+    def _format(self, fmt, args):
+        if not args:
+            return str(fmt)
+        try:
+            return str(fmt) % args
+        except Exception:
+            return " ".join([str(fmt)] + [str(a) for a in args])
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                batch = list(self._queue)
+                self._queue.clear()
+            for ts, level, event, fmt, args in batch:
+                try:
+                    text = self._format(fmt, args)
+                    extra = {}
+                    if level != LOG_INFO:
+                        extra["level"] = level
+                    if event:
+                        extra["event"] = event
+                    item = self.ring.append(redact(text), ts=time.strftime('%H:%M:%S', time.localtime(ts)), **extra)
+                    self.stats["emitted"] += 1
+                    self._write_jsonl(ts, level, event, item)
+                    for fn in list(self._sinks):
+                        try:
+                            fn(item, text)
+                        except Exception:
+                            self.stats["sink_errors"] += 1
+                except Exception:
+                    self.stats["sink_errors"] += 1
+            self._flush_jsonl()
+            with self._cond:
+                self._done += len(batch)
+                self._cond.notify_all()
+
+    def _write_jsonl(self, ts, level, event, item):
+        if not self.jsonl_path:
+            return
+        try:
+            if self._jsonl is None or self._jsonl.name != self.jsonl_path:
+                if self._jsonl is not None:
+                    self._jsonl.close()
+                self._jsonl = open(self.jsonl_path, "a", encoding="utf-8")
+            rec = {"t": round(ts, 3), "seq": item["seq"], "level": level, "event": event, "msg": item["msg"]}
+            self._jsonl.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        except Exception:
+            self.stats["sink_errors"] += 1
+
+    def _flush_jsonl(self):
+        try:
+            if self._jsonl is not None:
+                self._jsonl.flush()
+        except Exception:
+            pass
+
+
+class SpeechQueue:
+    # One speech worker owning the pyttsx3 engine. Normal messages are coalesced by kind
+    # (only the latest status of each kind is kept) and the oldest is dropped when the
+    # queue is full or a message has gone stale; the priority lane (operator prompts,
+    # warnings) is spoken first and never dropped.
+    PRIORITY_MARKERS = ("⏸", "Click '", "⚠", "Could not", "Error")
+
+    def __init__(self, maxsize=4, max_age=8.0):
+        self.maxsize = maxsize
+        self.max_age = max_age
+        self._normal = OrderedDict()    # kind -> (enqueued_at, text)
+        self._priority = OrderedDict()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._engine = None
+        self.stats = {"enqueued": 0, "spoken": 0, "coalesced": 0, "dropped": 0, "stale": 0, "errors": 0}
+
+    @staticmethod
+    def kind_of(text, event=None):
+        # "Filling Member 3 details..." and "Filling Member 4 details..." share a kind
+        if event:
+            return event
+        words = re.sub(r"[\d\W_]+", " ", str(text)).lower().split()
+        return " ".join(words[:3])
+
+    def is_priority(self, text, level=LOG_INFO):
+        return level >= LOG_WARNING or any(m in text for m in self.PRIORITY_MARKERS)
+
+    def depth(self):
+        with self._cond:
+            return len(self._normal) + len(self._priority)
+
+    def say(self, text, kind=None, priority=None, level=LOG_INFO):
+        if pyttsx3 is None:
+            return
+        text = str(text)
+        if priority is None:
+            priority = self.is_priority(text, level)
+        kind = kind or self.kind_of(text)
+        with self._cond:
+            lane = self._priority if priority else self._normal
+            if kind in lane:
+                self.stats["coalesced"] += 1
+                del lane[kind]
+            lane[kind] = (time.time(), text)
+            self.stats["enqueued"] += 1
+            while len(self._normal) > self.maxsize:
+                self._normal.popitem(last=False)
+                self.stats["dropped"] += 1
+            self._cond.notify()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="tts", daemon=True)
+                self._thread.start()
+
+    def _next(self):
+        with self._cond:
+            while True:
+                if self._priority:
+                    return self._priority.popitem(last=False)[1][1]
+                while self._normal:
+                    ts, text = self._normal.popitem(last=False)[1]
+                    if time.time() - ts <= self.max_age:
+                        return text
+                    self.stats["stale"] += 1
+                self._cond.wait()
+
+    def _init_engine(self):
+        # pyttsx3 engines are not thread-safe; create and use it only on the worker thread
+        try:
+            self._engine = pyttsx3.init()
+            try:
+                vol = self._engine.getProperty('volume')
+                self._engine.setProperty('volume', min(1.0, max(0.3, vol)))
+            except Exception:
+                pass
+        except Exception:
+            self._engine = None
+
+    def _run(self):
+        self._init_engine()
+        while True:
+            text = self._next()
+            if self._engine is None:
+                continue
+            try:
+                self._engine.say(text)
+                self._engine.runAndWait()
+                self.stats["spoken"] += 1
+            except Exception:
+                self.stats["errors"] += 1
+
+
+class _FrozenDict(dict):
+    # Read-only dict for config snapshots; still a dict, so json.dumps / FastAPI serialize it as-is
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("config snapshot is read-only; write through ConfigStore.write()")
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _readonly
+    __ior__ = _readonly
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+def _freeze(obj):
+    if isinstance(obj, dict):
+        return _FrozenDict((k, _freeze(v)) for k, v in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return tuple(_freeze(v) for v in obj)
+    return obj
+
+
+def thaw(obj):
+    # Mutable copy of a frozen snapshot (for callers that edit members in place)
+    if isinstance(obj, dict):
+        return {k: thaw(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [thaw(v) for v in obj]
+    return obj
+
+
+class ConfigSnapshot:
+    __slots__ = ("version", "data", "path", "source", "format", "loaded_at", "error")
+
+    def __init__(self, version, data, path, source=None, format=None, loaded_at=None, error=None):
+        self.version = version
+        self.data = data          # _FrozenDict with normalized "general" (dict) and "members" (tuple of dicts)
+        self.path = path          # configured path
+        self.source = source      # file actually read (config or legacy srivari_members.json), None if missing
+        self.format = format      # "dict", "list" (top-level member array) or "legacy"
+        self.loaded_at = loaded_at
+        self.error = error        # last parse error; data is then the previous good snapshot
+
+    @property
+    def general(self):
+        return self.data["general"]
+
+    @property
+    def members(self):
+        return self.data["members"]
+
+
+class ConfigStore:
+    # Group config (srivari_group_data.json) parsed once and served as an immutable snapshot.
+    # The file is re-read only when it changes: a write through the store swaps the snapshot
+    # directly, and external edits / TTD_CONFIG_PATH switches are noticed by a stat() of the
+    # path at most every check_interval seconds. version bumps only when the content differs.
+    def __init__(self, get_path, check_interval=0.5, log=None):
+        self.get_path = get_path
+        self.check_interval = check_interval
+        self.log = log
+        self._lock = threading.RLock()
+        self._snap = ConfigSnapshot(0, _freeze({"general": {}, "members": []}), None)
+        self._stat_key = None
+        self._checked_at = 0.0
+        self._dumps = {}
+        self._listeners = []
+        self.stats = {"loads": 0, "reloads_skipped": 0, "writes": 0, "errors": 0, "checks": 0}
+
+    @staticmethod
+    def validate(raw):
+        # Accept {"general": {...}, "members": [...]}, {"data": [...]} and a bare member array
+        if isinstance(raw, list):
+            fmt, data = "list", {"general": {}, "members": raw}
+        elif isinstance(raw, dict):
+            fmt, data = "dict", dict(raw)
+            general = raw.get("general")
+            data["general"] = general if isinstance(general, dict) else {}
+            data["members"] = raw.get("members") or raw.get("data") or []
+        elif raw is None:
+            fmt, data = "dict", {"general": {}, "members": []}
+        else:
+            raise ValueError(f"config must be a JSON object or array, got {type(raw).__name__}")
+        members = data["members"]
+        data["members"] = [m for m in members if isinstance(m, dict)] if isinstance(members, list) else []
+        return fmt, data
+
+    def _source(self, path):
+        if os.path.exists(path):
+            return path
+        # Fallback to legacy file in same dir as config
+        legacy = os.path.join(os.path.dirname(os.path.abspath(path)), "srivari_members.json")
+        return legacy if os.path.exists(legacy) else None
+
+    def _stat(self, path):
+        src = self._source(path)
+        if src is None:
+            return (path, None)
+        st = os.stat(src)
+        return (path, src, st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def add_listener(self, fn):
+        # fn(snapshot) after every version bump (called outside the lock)
+        self._listeners.append(fn)
+
+    def invalidate(self):
+        # Force a stat + re-read on the next get() (e.g. after switching TTD_CONFIG_PATH)
+        with self._lock:
+            self._stat_key = None
+            self._checked_at = 0.0
+
+    def refresh(self):
+        # Re-stat (and re-parse if changed) now; listeners fire only if the new file parsed
+        self.invalidate()
+        return self.get()
+
+    def get(self):
+        now = time.time()
+        snap = self._snap
+        if now - self._checked_at < self.check_interval and self._stat_key is not None:
+            return snap
+        changed = None
+        with self._lock:
+            if now - self._checked_at >= self.check_interval or self._stat_key is None:
+                self._checked_at = now
+                self.stats["checks"] += 1
+                try:
+                    path = self.get_path()
+                    key = self._stat(path)
+                except Exception:
+                    path, key = None, None
+                if key != self._stat_key or key is None:
+                    changed = self._load(path, key)
+            snap = self._snap
+        if changed is not None:
+            self._notify(changed)
+        return snap
+
+    @property
+    def version(self):
+        return self.get().version
+
+    def _load(self, path, key):
+        self._stat_key = key
+        src = key[1] if key else None
+        try:
+            if src is None:
+                fmt, data = "dict", {"general": {}, "members": []}
+            elif src != path:
+                with open(src, "r", encoding="utf-8") as f:
+                    legacy = json.load(f) or {}
+                fmt, data = "legacy", {"general": {}, "members": list(legacy.get("members") or [])}
+                data = self.validate(data)[1]
+            else:
+                with open(src, "r", encoding="utf-8") as f:
+                    fmt, data = self.validate(json.load(f))
+        except Exception as e:
+            # Keep serving the last good snapshot (a half-written file is retried on the next change)
+            self.stats["errors"] += 1
+            old = self._snap
+            self._snap = ConfigSnapshot(old.version, old.data, path, old.source, old.format, old.loaded_at, str(e)[:200])
+            if self.log:
+                self.log(f"Failed to load Srivari data: {e}")
+            return None
+        self.stats["loads"] += 1
+        return self._swap(data, path, src, fmt)
+
+    def _swap(self, data, path, src, fmt):
+        frozen = _freeze(data)
+        old = self._snap
+        if frozen == old.data and path == old.path and src == old.source:
+            self.stats["reloads_skipped"] += 1
+            self._snap = ConfigSnapshot(old.version, old.data, path, src, fmt, old.loaded_at)
+            return None
+        self._snap = ConfigSnapshot(old.version + 1, frozen, path, src, fmt, time.time())
+        self._dumps.clear()
+        return self._snap
+
+    def write(self, payload, path=None):
+        # Atomic replace, then serve the written content without re-reading it
+        with self._lock:
+            path = path or self.get_path()
+            fmt, data = self.validate(payload)
+            tmp = f"{path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(payload, f, indent=2)
+            os.replace(tmp, path)
+            self.stats["writes"] += 1
+            self._checked_at = time.time()
+            self._stat_key = self._stat(path)
+            changed = self._swap(data, path, path, fmt)
+        if changed is not None:
+            self._notify(changed)
+        return path
+
+    def dumps(self, indent=None):
+        # JSON text of the current snapshot, serialized once per version
+        snap = self.get()
+        key = (snap.version, indent)
+        text = self._dumps.get(key)
+        if text is None:
+            text = json.dumps(snap.data, indent=indent)
+            self._dumps[key] = text
+        return text
+
+    def tagged(self):
+        # (snapshot, compact JSON, ETag) from one snapshot. The ETag hashes the content, so it
+        # stays valid across process restarts where the version counter starts over.
+        snap = self.get()
+        key = (snap.version, "etag")
+        hit = self._dumps.get(key)
+        if hit is None or hit[0] is not snap:
+            text = json.dumps(snap.data)
+            hit = (snap, text, '"cfg-' + hashlib.blake2b(text.encode("utf-8"), digest_size=12).hexdigest() + '"')
+            self._dumps[key] = hit
+        return hit
+
+    def _notify(self, snap):
+        for fn in list(self._listeners):
+            try:
+                fn(snap)
+            except Exception:
+                pass
+
+
+# inotify(7) event bits used by FileWatcher
+IN_MODIFY, IN_CLOSE_WRITE, IN_MOVED_FROM, IN_MOVED_TO = 0x2, 0x8, 0x40, 0x80
+IN_CREATE, IN_DELETE, IN_DELETE_SELF, IN_MOVE_SELF = 0x100, 0x200, 0x400, 0x800
+IN_NONBLOCK, IN_CLOEXEC = 0o4000, 0o2000000
+_INOTIFY_EVENT = struct.Struct("iIII")
+
+
+class FileWatcher:
+    # Calls on_change() once a watched file has settled after a change. On Linux the file's
+    # directory is watched with inotify, so in-place writes (debounced until quiet), atomic
+    # rename-style saves and delete/recreate all arrive as events; elsewhere the file is
+    # stat()ed every poll_interval and a change fires once it is stable across one poll.
+    # The path comes from a getter, so switching TTD_CONFIG_PATH moves the watch.
+    MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+
+    def __init__(self, get_path, on_change, debounce=0.2, poll_interval=0.5, path_check_interval=1.0):
+        self.get_path = get_path
+        self.on_change = on_change
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.path_check_interval = path_check_interval
+        self.mode = None
+        self._fd = None
+        self._thread = None
+        self._stop = threading.Event()
+        self.stats = {"events": 0, "fires": 0, "errors": 0}
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return self.mode
+        self._stop.clear()
+        self._fd = None
+        if _libc is not None and not os.environ.get("TTD_WATCH_POLL"):
+            try:
+                fd = _libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+                if fd >= 0:
+                    self._fd = fd
+            except Exception:
+                self._fd = None
+        self.mode = "inotify" if self._fd is not None else "poll"
+        target = self._run_inotify if self._fd is not None else self._run_poll
+        self._thread = threading.Thread(target=target, name="config-watch", daemon=True)
+        self._thread.start()
+        return self.mode
+
+    def stop(self):
+        self._stop.set()
+
+    def _fire(self):
+        self.stats["fires"] += 1
+        try:
+            self.on_change()
+        except Exception:
+            self.stats["errors"] += 1
+
+    def _path(self):
+        return os.path.abspath(self.get_path())
+
+    def _run_inotify(self):
+        fd = self._fd
+        wd = watched = None
+        deadline = None
+        try:
+            while not self._stop.is_set():
+                path = self._path()
+                if path != watched:
+                    if wd is not None:
+                        _libc.inotify_rm_watch(fd, wd)
+                    wd = _libc.inotify_add_watch(fd, os.path.dirname(path).encode(), self.MASK)
+                    if wd < 0:
+                        # Directory missing / not watchable: fall back to polling
+                        break
+                    if watched is not None:
+                        deadline = time.time()
+                    watched = path
+                    name = os.path.basename(path).encode()
+                timeout = max(0.0, deadline - time.time()) if deadline else self.path_check_interval
+                readable, _, _ = select.select([fd], [], [], timeout)
+                if readable:
+                    try:
+                        buf = os.read(fd, 64 * 1024)
+                    except BlockingIOError:
+                        continue
+                    off = 0
+                    while off + _INOTIFY_EVENT.size <= len(buf):
+                        _wd, mask, _cookie, length = _INOTIFY_EVENT.unpack_from(buf, off)
+                        ev_name = buf[off + _INOTIFY_EVENT.size:off + _INOTIFY_EVENT.size + length].rstrip(b"\0")
+                        off += _INOTIFY_EVENT.size + length
+                        if ev_name == name or mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                            self.stats["events"] += 1
+                            # Every event pushes the deadline: bursts settle into one reload
+                            deadline = time.time() + self.debounce
+                elif deadline and time.time() >= deadline:
+                    deadline = None
+                    self._fire()
+        except Exception:
+            self.stats["errors"] += 1
+        finally:
+            try:
+                os.close(fd)
+            except Exception:
+                pass
+            self._fd = None
+        if not self._stop.is_set():
+            self.mode = "poll"
+            self._run_poll()
+
+    def _stat(self, path):
+        try:
+            st = os.stat(path)
+            return (path, st.st_mtime_ns, st.st_size, st.st_ino)
+        except OSError:
+            return (path, None)
+
+    def _run_poll(self):
+        last = self._stat(self._path())
+        pending = False
+        while not self._stop.wait(self.poll_interval):
+            key = self._stat(self._path())
+            if key != last:
+                last, pending = key, True
+                self.stats["events"] += 1
+            elif pending:
+                pending = False
+                self._fire()
+
+
+class RunJournal:
+    # Append-only crash-recovery log (JSON lines) for the Srivari group flow. Records are
+    # run_started / run_resumed / member_started / field_filled / member_filled / member_saved /
+    # run_finished. Every record is written through to the OS at once; fsync is batched:
+    # checkpoint records sync immediately (covering the field records before them), field
+    # records within sync_interval seconds. Resume replays the records after the last
+    # run_started; compaction rewrites the file down to that tail (empty after a finished run).
+    DURABLE = ("run_started", "run_resumed", "member_filled", "member_saved", "run_finished")
+
+    def __init__(self, path, sync_interval=0.5, compact_bytes=256 * 1024):
+        self.path = path
+        self.sync_interval = sync_interval
+        self.compact_bytes = compact_bytes
+        self._compact_at = compact_bytes
+        self._lock = threading.Lock()
+        self._f = None
+        self._torn = False
+        self._seq = 0
+        self._dirty = False
+        self._wake = threading.Event()
+        self._thread = None
+        self.stats = {"records": 0, "fsyncs": 0, "compactions": 0, "bad_lines": 0, "errors": 0}
+
+    def _open(self):
+        if self._f is None:
+            self._f = open(self.path, "a", encoding="utf-8")
+        return self._f
+
+    def append(self, type, **fields):
+        rec = {"seq": 0, "ts": round(time.time(), 3), "type": type}
+        rec.update(fields)
+        with self._lock:
+            self._seq += 1
+            rec["seq"] = self._seq
+            try:
+                f = self._open()
+                f.write(json.dumps(rec, separators=(",", ":"), ensure_ascii=False) + "\n")
+                f.flush()
+                self._dirty = True
+                self.stats["records"] += 1
+                if type in self.DURABLE:
+                    self._sync()
+                if f.tell() > self._compact_at:
+                    self._compact()
+            except Exception:
+                # Best effort: a full disk or unwritable path must not stop the fill
+                self.stats["errors"] += 1
+                return rec
+        if type not in self.DURABLE:
+            self._schedule_sync()
+        return rec
+
+    def _sync(self):
+        if self._dirty and self._f is not None:
+            os.fsync(self._f.fileno())
+            self._dirty = False
+            self.stats["fsyncs"] += 1
+
+    def sync(self):
+        with self._lock:
+            self._sync()
+
+    def _schedule_sync(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._sync_loop, name="run-journal", daemon=True)
+            self._thread.start()
+        self._wake.set()
+
+    def _sync_loop(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            time.sleep(self.sync_interval)
+            try:
+                self.sync()
+            except Exception:
+                pass
+
+    def _read(self):
+        records = []
+        self._torn = False
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except Exception:
+                        # Torn last line from a crash mid-write (compaction drops it)
+                        self.stats["bad_lines"] += 1
+                        self._torn = True
+        except FileNotFoundError:
+            pass
+        return records
+
+    def tail(self, records=None):
+        records = self._read() if records is None else records
+        for i in range(len(records) - 1, -1, -1):
+            if records[i].get("type") == "run_started":
+                return records[i:]
+        return []
+
+    def state(self):
+        # Replayed view of the latest run: per-member progress and fill timings
+        tail = self.tail()
+        if not tail:
+            return None
+        st = {"run_id": tail[0].get("run_id"), "key": tail[0].get("key"), "started": tail[0].get("ts"),
+              "finished": False, "members": {}, "records": len(tail)}
+        for rec in tail:
+            t, n = rec.get("type"), rec.get("member")
+            if t == "run_finished":
+                st["finished"] = True
+                continue
+            if n is None:
+                continue
+            m = st["members"].setdefault(n, {"filled": False, "saved": False, "fields": {}, "ms": None})
+            if t == "member_started":
+                m["fields"] = {} if not rec.get("resumed") else m["fields"]
+            elif t == "field_filled":
+                m["fields"][rec.get("field")] = rec.get("ms")
+            elif t == "member_filled":
+                m["filled"], m["ms"] = True, rec.get("ms")
+            elif t == "member_saved":
+                # An unconfirmed save (form reset not detected) may not have happened at all
+                m["saved"] = bool(rec.get("confirmed", True))
+        return st
+
+    def resume_point(self, key):
+        # {"member": n, "fields": [...done...], "wait_for_save": bool} or None for a fresh run
+        st = self.state()
+        if not st or st["finished"] or st["key"] != key or not st["members"]:
+            return None
+        n = max(st["members"])
+        m = st["members"][n]
+        if m["saved"]:
+            return {"member": n + 1, "fields": [], "wait_for_save": False, "run_id": st["run_id"]}
+        if m["filled"]:
+            # Filled but no confirmed save: wait for the save again before the next member
+            return {"member": n + 1, "fields": [], "wait_for_save": True, "run_id": st["run_id"]}
+        return {"member": n, "fields": list(m["fields"]), "wait_for_save": False, "run_id": st["run_id"]}
+
+    def begin(self, key, run_id=None, **info):
+        # Resume the unfinished run for the same group, or start a new one
+        plan = self.resume_point(key)
+        self.compact()
+        if plan:
+            self.append("run_resumed", run_id=run_id, resume_member=plan["member"],
+                        wait_for_save=plan["wait_for_save"], fields=len(plan["fields"]))
+        else:
+            self.append("run_started", run_id=run_id, key=key, **info)
+        return plan
+
+    def finish(self, **info):
+        self.append("run_finished", **info)
+        self.compact()
+
+    def compact(self):
+        with self._lock:
+            self._compact()
+
+    def _compact(self):
+        if self._f is not None:
+            self._sync()
+            self._f.close()
+            self._f = None
+        records = self._read()
+        tail = self.tail(records)
+        if tail and tail[-1].get("type") == "run_finished":
+            tail = []
+        if tail:
+            self._seq = max(self._seq, int(tail[-1].get("seq") or 0))
+        if len(tail) == len(records) and not self._torn:
+            return
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for rec in tail:
+                f.write(json.dumps(rec, separators=(",", ":"), ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self.stats["compactions"] += 1
+        # A single long run must not trigger a rewrite on every append
+        self._compact_at = max(self.compact_bytes, 2 * os.path.getsize(self.path))
+
+
 class TTDBookingBot:
+    # UI delays are served by the adaptive controller; assigning one resets its base value
+    ui_open_delay = property(lambda self: self.delays.get("open"), lambda self, v: self.delays.set_base("open", v))
+    ui_post_select_delay = property(lambda self: self.delays.get("post_select"), lambda self, v: self.delays.set_base("post_select", v))
+    ui_key_delay = property(lambda self: self.delays.get("key"), lambda self, v: self.delays.set_base("key", v))
+
     def __init__(self, root):
         self.root = root
         # Log buffer for API consumption (headless or GUI)
-        self._log_buffer = deque(maxlen=1000)
-        self._seq = 0
+        self._log_buffer = LogRing(1000)
+        self.logs = LogPipeline(self._log_buffer, jsonl_path=os.environ.get("TTD_LOG_JSONL") or None)
+        self.logs.set_level(os.environ.get("TTD_LOG_LEVEL", "info"))
+        self.logs.add_sink(self._log_to_local)
+        # Single coalescing text-to-speech worker (GUI voice toggle)
+        self.speech = SpeechQueue()
+        # GUI log view: lines queued by the log sink, drained by the Tk thread at ~30 Hz
+        self.gui_log_max_lines = 2000
+        self.gui_log_frame = 1 / 30
+        self._gui_log_pending = deque(maxlen=5000)
+        self._gui_log_lock = threading.Lock()
+        self._gui_log_scheduled = False
+        self._gui_log_last_drain = 0.0
         self.driver = None
         self.is_running = False
         self.is_browser_open = False
-        # UI timing tunables for faster dropdown interactions
+        # UI timing tunables for faster dropdown interactions (starting points; self-tuned at runtime)
+        self.delays = UIDelayController()
+        self.tracer = RunTracer()
+        self.phases = RunPhases()
+        # Every WebDriver command runs on one owner thread (see _instrument_driver)
+        self.webdriver = DriverExecutor()
+        # Cached URL/title/liveness, refreshed by a background probe (API /status reads only this)
+        self.browser_state = BrowserStateProbe(lambda: self.driver, executor=self.webdriver)
+        self.screens = ScreenshotService()
+        # Parsed group config, re-read only when the file changes (all config readers go through it)
+        self.config_store = ConfigStore(self.get_config_path, log=self.log_message)
+        # Hot reload of the group config (inotify on Linux, polling fallback); started by GUI/API
+        self.config_watch = FileWatcher(self.get_config_path, self.config_store.refresh)
+        # Crash-recovery journal for the group flow (replaces the booking_data.json resume marker)
+        self.journal = RunJournal(self.get_journal_path())
+        self._register_metrics()
         self.ui_open_delay = 0.15           # delay after opening a dropdown
         self.ui_post_select_delay = 0.12    # delay after selecting an option
         self.ui_key_delay = 0.06            # delay between key actions for dropdowns
+        # Country -> State and State -> District reload: measured until the dependent list is
+        # ready, not folded into post_select (which only covers the option panel closing)
+        self.delays.set_base("dependent_list", 0.3)
         self.booking_data = self.load_booking_data()
         self.current_member_index = 0
         # Behavior flags (can be overridden by API/general config)
         self.respect_existing = True  # when True, do not overwrite non-empty fields
         self.aadhaar_autofill_wait_seconds = 6  # wait for site autofill after ID number
+        self.batch_fill = True  # fill plain text inputs in one execute_script call
+        # WebElement handles per XPath for the current form generation
+        self._el_cache = {}
+        self._el_strategy = {}  # xpath -> (By, value) locator that actually worked
+        self._el_cache_stats = {"hits": 0, "misses": 0, "invalidations": 0, "generation": 0}
+        # In-page (MutationObserver) waits; each WebDriver call blocks at most page_wait_slice seconds
+        self.event_waits = True
+        self.page_wait_slice = 5.0
+        # Per-selection dropdown timings (most recent first is dropdown_timings[-1])
+        self.dropdown_timings = deque(maxlen=200)
+        # Option indexes per dropdown XPath, rebuilt only when the option list changes
+        self._option_indexes = {}
+        # Offline gazetteer of State / District / Nearest TTD Temple option lists
+        self._last_dropdown_options = {}
+        self._last_snapshot_scope = None
+        self._gazetteer = None
+        self._gazetteer_dirty = False
+        # Learned per-page behaviour (srivari_tuning.json), loaded on first use
+        self._tuning = None
+        self._tuning_dirty = False
+        self.gazetteer_confirm_timeout = 6.0
         if self.root is not None:
             # Only initialize Tk UI when a root is provided
             self.root.title("TTD Virtual Seva Booking Bot")
@@ -111,11 +1751,9 @@ class TTDBookingBot:
         ttk.Checkbutton(srivari_frame, text="Auto download ticket", variable=self.srivari_auto_download).grid(row=1, column=1, sticky=tk.W, padx=5)
 
         try:
-            cfg_path = self.get_config_path()
-            if os.path.exists(cfg_path):
-                with open(cfg_path, "r", encoding="utf-8") as f:
-                    _sg = json.load(f) or {}
-                _g = _sg.get("general") or {}
+            snap = self.config_store.get()
+            if snap.source:
+                _g = snap.general
                 if _g.get("group_size") is not None:
                     self.srivari_group_size_var.set(str(_g.get("group_size")))
                 if _g.get("download_dir"):
@@ -124,6 +1762,10 @@ class TTDBookingBot:
                     self.srivari_auto_date.set(bool(_g.get("auto_select_date")))
                 if _g.get("auto_download_ticket") is not None:
                     self.srivari_auto_download.set(bool(_g.get("auto_download_ticket")))
+                if _g.get("gui_log_max_lines"):
+                    self.gui_log_max_lines = max(100, int(_g.get("gui_log_max_lines")))
+                if _g.get("log_level"):
+                    self.logs.set_level(_g.get("log_level"))
         except Exception:
             pass
 
@@ -237,17 +1879,11 @@ class TTDBookingBot:
 
     def _load_srivari_members_to_gui(self):
         try:
-            cfg_path = self.get_config_path()
-            if os.path.exists(cfg_path):
-                with open(cfg_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                # Accept both top-level array and {"members": [...]} formats
-                if isinstance(data, list):
-                    members = data
-                elif isinstance(data, dict):
-                    members = data.get("members") or data.get("data") or []
-                else:
-                    members = []
+            snap = self.config_store.get()
+            self._members_version = snap.version
+            if snap.source:
+                # Store normalizes top-level array / {"members": [...]} / {"data": [...]} formats
+                members = snap.members
 
                 def lc_map(d):
                     try:
@@ -362,18 +1998,13 @@ class TTDBookingBot:
                 })
             # Preserve file format: if file was a list, write a list; if dict with 'members', keep that
             payload = members
-            cfg_path = self.get_config_path()
-            if os.path.exists(cfg_path):
-                try:
-                    with open(cfg_path, "r", encoding="utf-8") as f:
-                        existing = json.load(f)
-                    if isinstance(existing, dict):
-                        existing["members"] = members
-                        payload = existing
-                except Exception:
-                    pass
-            with open(cfg_path, "w", encoding="utf-8") as f:
-                json.dump(payload, f, indent=2)
+            snap = self.config_store.get()
+            if snap.format == "dict":
+                payload = thaw(snap.data)
+                payload["members"] = members
+            self.config_store.write(payload)
+            # Already showing what was just written; don't let the watcher reload it
+            self._members_version = self.config_store.version
             self.log_message("Members saved.")
             if show_message:
                 try:
@@ -388,99 +2019,93 @@ class TTDBookingBot:
                 except Exception:
                     pass
 
-    def log_message(self, message):
-        # Append to buffer for API access, redacting sensitive numbers
-        try:
-            msg = str(message)
-            # redact 12+ digit runs and email-like tokens
-            import re
-            msg = re.sub(r"\b(\d{4}[ -]?){3,}\d+\b", "[REDACTED]", msg)
-            msg = re.sub(r"[\w.%-]+@[\w.-]+\.[A-Za-z]{2,}", "[REDACTED]", msg)
-            self._seq += 1
-            self._log_buffer.append({
-                "seq": self._seq,
-                "ts": time.strftime('%H:%M:%S'),
-                "msg": msg,
-            })
-        except Exception:
-            pass
-        # Thread-safe UI logging via Tk event loop (when GUI available)
-        ts_msg = f"{time.strftime('%H:%M:%S')} - {message}\n"
-        try:
-            if self.root is not None:
-                self.root.after(0, lambda: (self.log_area.insert(tk.END, ts_msg), self.log_area.see(tk.END)))
-        except Exception:
-            # Fallback if root is closing
+    def log_message(self, message, *args, level=LOG_INFO, event=None):
+        # Enqueue only; %-formatting (of args), redaction and fan-out run on the log sink thread
+        self.logs.emit(level, message, args, event)
+
+    def _log_to_local(self, item, message):
+        # Log sink: GUI and voice get the unredacted text, as the operator typed it
+        if self.root is None:
+            return
+        # Queue for the GUI; the Tk thread drains the queue in one batch per frame
+        with self._gui_log_lock:
+            self._gui_log_pending.append(f"{item['ts']} - {message}\n")
+            if self._gui_log_scheduled:
+                schedule = False
+            else:
+                self._gui_log_scheduled = schedule = True
+        if schedule:
+            wait_ms = int(max(0.0, self.gui_log_frame - (time.time() - self._gui_log_last_drain)) * 1000)
             try:
-                self.log_area.insert(tk.END, ts_msg)
-                self.log_area.see(tk.END)
+                self.root.after(wait_ms, self._drain_gui_log)
             except Exception:
-                pass
+                with self._gui_log_lock:
+                    self._gui_log_scheduled = False
         # Avoid speaking very long messages to reduce lag
         try:
-            if getattr(self, 'voice_enabled', None) and self.root is not None and self.voice_enabled.get() and len(str(message)) <= 120:
-                self._speak_async(message)
+            if getattr(self, 'voice_enabled', None) and self.voice_enabled.get() and len(str(message)) <= 120:
+                self.speech.say(message, kind=item.get("event"), level=item.get("level", LOG_INFO))
+        except Exception:
+            pass
+
+    def _drain_gui_log(self):
+        # Runs on the Tk thread: one insert for everything queued since the last frame,
+        # trim scrollback from the top, and follow the tail only if the view was at the bottom
+        with self._gui_log_lock:
+            lines = list(self._gui_log_pending)
+            self._gui_log_pending.clear()
+            self._gui_log_scheduled = False
+        self._gui_log_last_drain = time.time()
+        if not lines:
+            return
+        try:
+            area = self.log_area
+            at_bottom = area.yview()[1] >= 0.999
+            area.insert(tk.END, "".join(lines))
+            excess = int(area.index("end-1c").split(".")[0]) - 1 - self.gui_log_max_lines
+            if excess > 0:
+                area.delete("1.0", f"{excess + 1}.0")
+            if at_bottom:
+                area.see(tk.END)
         except Exception:
             pass
 
+    def start_config_watch(self):
+        # Kernel notifications where available; the store's own stat check is then only a safety net
+        mode = self.config_watch.start()
+        if mode == "inotify":
+            self.config_store.check_interval = 5.0
+        return mode
+
     def _start_members_file_watch(self):
-        # Simple polling watcher to auto-reload members when JSON changes
+        # Reload the members panel whenever the store publishes a new (successfully parsed) version
         try:
-            self._members_file = self.get_config_path()
-            self._members_mtime = os.path.getmtime(self._members_file) if os.path.exists(self._members_file) else 0
+            self._members_version = self.config_store.version
         except Exception:
-            self._members_mtime = 0
-        # Schedule periodic check
+            self._members_version = 0
+        self.config_store.add_listener(self._on_config_change)
+        mode = self.start_config_watch()
+        self.log_message("Watching config for changes (%s)", mode, level=LOG_DEBUG, event="config.watch")
+
+    def _on_config_change(self, snap):
+        # Store listener (watcher thread or API write): hand over to the Tk thread
         try:
-            self.root.after(1500, self._check_members_file_change)
+            self.root.after(0, self._check_members_file_change)
         except Exception:
             pass
 
     def _check_members_file_change(self):
         try:
-            path = getattr(self, "_members_file", self.get_config_path())
-            if os.path.exists(path):
-                mtime = os.path.getmtime(path)
-                if mtime != getattr(self, "_members_mtime", 0):
-                    self._members_mtime = mtime
-                    self.log_message("Detected config change. Auto reloading members...")
-                    self._load_srivari_members_to_gui()
+            version = self.config_store.version
+            if version != getattr(self, "_members_version", 0):
+                self._members_version = version
+                self.log_message("Detected config change. Auto reloading members...")
+                self._load_srivari_members_to_gui()
         except Exception:
             pass
-        finally:
-            try:
-                self.root.after(1500, self._check_members_file_change)
-            except Exception:
-                pass
-
-    def _init_tts(self):
-        if getattr(self, '_tts_engine', None) is None and pyttsx3 is not None:
-            try:
-                self._tts_engine = pyttsx3.init()
-                try:
-                    vol = self._tts_engine.getProperty('volume')
-                    self._tts_engine.setProperty('volume', min(1.0, max(0.3, vol)))
-                except Exception:
-                    pass
-            except Exception:
-                self._tts_engine = None
 
     def _speak_async(self, text):
-        if pyttsx3 is None:
-            return
-        self._init_tts()
-        if getattr(self, '_tts_engine', None) is None:
-            return
-        def _worker(msg):
-            try:
-                self._tts_engine.say(msg)
-                self._tts_engine.runAndWait()
-            except Exception:
-                pass
-        try:
-            threading.Thread(target=_worker, args=(text,), daemon=True).start()
-        except Exception:
-            pass
+        self.speech.say(text)
 
     def toggle_bot(self):
         if not self.is_running:
@@ -522,14 +2147,9 @@ class TTDBookingBot:
 
             prefs = None
             try:
-                cfg_path = self.get_config_path()
-                if os.path.exists(cfg_path):
-                    with open(cfg_path, "r", encoding="utf-8") as f:
-                        _sg = json.load(f)
-                        _g = (_sg or {}).get("general") or {}
-                        _dl = _g.get("download_dir")
-                        if _dl and isinstance(_dl, str) and os.path.isdir(_dl):
-                            prefs = {"download.default_directory": _dl, "download.prompt_for_download": False, "profile.default_content_setting_values.automatic_downloads": 1}
+                _dl = self.config_store.get().general.get("download_dir")
+                if _dl and isinstance(_dl, str) and os.path.isdir(_dl):
+                    prefs = {"download.default_directory": _dl, "download.prompt_for_download": False, "profile.default_content_setting_values.automatic_downloads": 1}
             except Exception:
                 prefs = None
             if prefs:
@@ -555,17 +2175,28 @@ class TTDBookingBot:
                     # Last resort fallback to default constructor
                     self.driver = webdriver.Chrome(options=options)
                     self.log_message("WebDriver initialized with default ChromeDriver (may fail)")
+            self._invalidate_element_cache()
+            self._script_timeout = 0
+            self._instrument_driver()
             try:
                 self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
             except Exception:
                 pass
             self.log_message("Navigating to TTD booking page...")
-            self.driver.get("https://ttdevasthanams.ap.gov.in")
+            try:
+                # Fill priority: no executor cap, a slow portal is not a failed driver start
+                with self.webdriver.priority(DRIVER_FILL):
+                    self.driver.get("https://ttdevasthanams.ap.gov.in")
+            except TimeoutException as e:
+                self.log_message(f"TTD booking page timed out while loading; it keeps loading in the browser ({str(e)[:100]})",
+                                 level=LOG_WARNING, event="browser.navigate_timeout")
             try:
                 self.arrange_windows_side_by_side()
             except Exception:
                 pass
             self.is_browser_open = True
+            self.browser_state.start()
+            self.browser_state.poke()
             # Guard UI updates in headless mode
             try:
                 self.activate_button.config(state=tk.NORMAL)
@@ -718,13 +2349,195 @@ class TTDBookingBot:
                     continue
         return opts
 
-    def set_custom_dropdown_by_xpath(self, trigger_xpath, value):
-        # Robust dropdown selector: handles native <select> and custom widgets
+    _DROPDOWN_SNAPSHOT_JS = """
+        const trig = arguments[0];
+        const waitMs = arguments[1] || 0;
+        const done = arguments[arguments.length - 1];
+        const visible = (e) => {
+            if (!e || !e.getClientRects().length) return false;
+            const cs = window.getComputedStyle(e);
+            return cs.visibility !== 'hidden' && cs.display !== 'none' && cs.opacity !== '0';
+        };
+        const rectOf = (e) => { const r = e.getBoundingClientRect(); return {l: r.left, t: r.top, r: r.right, b: r.bottom}; };
+        const scan = () => {
+        const tr = trig ? rectOf(trig) : null;
+        const panelSel = [
+            "[role='listbox']:not([aria-hidden='true'])",
+            "[role='menu']:not([aria-hidden='true'])",
+            "ul[class*='menu'], ul[class*='list'], ul[class*='options']",
+            "div[class*='menu'], div[class*='listbox'], div[class*='options'], div[class*='dropdown'], div[class*='select']",
+        ];
+        const panels = [];
+        for (const sel of panelSel) {
+            for (const p of document.querySelectorAll(sel)) {
+                if (!visible(p) || panels.includes(p)) continue;
+                // Panel should be visually below or overlapping the trigger vertically
+                if (tr && rectOf(p).t + 1 < tr.t - 2) continue;
+                panels.push(p);
+            }
+        }
+        const optSel = "li, [role='option'], div, span, option";
+        const seen = new Set();
+        const nodes = [];
+        const collect = (root) => {
+            for (const e of root.querySelectorAll(optSel)) {
+                if (seen.has(e) || !visible(e)) continue;
+                const txt = (e.innerText || e.textContent || '').trim();
+                // Skip empty nodes and multi-line containers wrapping several options
+                if (!txt || txt.indexOf('\\n') !== -1) continue;
+                seen.add(e);
+                nodes.push(e);
+            }
+        };
+        panels.forEach(collect);
+        return {panels: panels, nodes: nodes};
+        };
+        // Wait in the page until an options panel is visible, so no fixed sleep is needed
+        const start = performance.now();
+        const tick = () => {
+            const r = scan();
+            const waited = performance.now() - start;
+            // An open panel can still be empty while a dependent list loads
+            if ((!r.panels.length || !r.nodes.length) && waited < waitMs) { setTimeout(tick, 16); return; }
+            const scope = r.panels.length ? 'panel' : 'page';
+            let nodes = r.nodes;
+            if (!r.panels.length) {
+                nodes = [];
+                for (const e of document.querySelectorAll("li, [role='option'], div, span, option")) {
+                    if (!visible(e)) continue;
+                    const txt = (e.innerText || e.textContent || '').trim();
+                    if (txt && txt.indexOf('\\n') === -1) nodes.push(e);
+                }
+            }
+            window.__ttdDropdownOpts = nodes;
+            done({scope: scope, waited_ms: waited, options: nodes.map((e, i) => ({index: i, text: (e.innerText || e.textContent || '').trim(), rect: rectOf(e)}))});
+        };
+        tick();
+    """
+
+    _DROPDOWN_CLICK_JS = """
+        const opts = window.__ttdDropdownOpts || [];
+        const e = opts[arguments[0]];
+        const trig = arguments[1];
+        const waitMs = arguments[2] || 0;
+        const done = arguments[arguments.length - 1];
+        if (!e || !e.isConnected) { done(null); return; }
+        const label = (e.innerText || e.textContent || '').trim();
+        e.scrollIntoView({block: 'nearest'});
+        for (const type of ['mousedown', 'mouseup']) {
+            e.dispatchEvent(new MouseEvent(type, {bubbles: true, cancelable: true, view: window}));
+        }
+        e.click();
+        // Committed once the option panel closes or the trigger shows the label
+        const norm = (t) => (t || '').trim().toLowerCase();
+        const start = performance.now();
+        const tick = () => {
+            const shown = trig ? norm(trig.value) + ' ' + norm(trig.innerText) : '';
+            const closed = !e.isConnected || !e.getClientRects().length;
+            const waited = performance.now() - start;
+            if (closed || (label && shown.includes(norm(label)))) { done({text: label, committed: true, committed_ms: waited}); return; }
+            if (waited >= waitMs) { done({text: label, committed: false, committed_ms: waited}); return; }
+            setTimeout(tick, 16);
+        };
+        tick();
+    """
+
+    def _ensure_script_timeout(self, seconds):
+        # Only issue the command when the session's async-script timeout must grow
+        if seconds > getattr(self, "_script_timeout", 0):
+            self.driver.set_script_timeout(seconds)
+            self._script_timeout = seconds
+
+    def _snapshot_dropdown_options(self, trigger_el, measure=False):
+        # All visible options of the open dropdown in one call: [{index, text, rect}, ...].
+        # Waits in the page for the panel; with measure=True the wait feeds the open delay.
+        budget = self.delays.wait_budget("open")
+        self._last_snapshot_scope = None
+        try:
+            self._ensure_script_timeout(budget + 10)
+            res = self.driver.execute_async_script(self._DROPDOWN_SNAPSHOT_JS, trigger_el, int(budget * 1000)) or {}
+        except Exception as e:
+            self.log_message(f"Dropdown snapshot failed, scanning panels: {str(e)[:80]}")
+            return None
+        # "panel": options came from the open dropdown; "page": unscoped visible page text
+        self._last_snapshot_scope = res.get("scope")
+        if measure:
+            if res.get("scope") == "panel" and res.get("options"):
+                self.delays.observe("open", (res.get("waited_ms") or 0) / 1000.0)
+            else:
+                self.delays.failure("open", "panel not visible")
+        return res.get("options") or []
+
+    def _click_dropdown_option(self, index, trigger_el=None):
+        budget = self.delays.wait_budget("post_select")
+        try:
+            self._ensure_script_timeout(budget + 10)
+            res = self.driver.execute_async_script(self._DROPDOWN_CLICK_JS, index, trigger_el, int(budget * 1000))
+        except Exception:
+            return False
+        if res is None:
+            return False
+        if res.get("committed"):
+            self.delays.observe("post_select", (res.get("committed_ms") or 0) / 1000.0)
+        else:
+            # Not visibly committed: give the page the (backed-off) settle delay
+            self.delays.failure("post_select", "selection not committed")
+            time.sleep(self.ui_post_select_delay)
+        return True
+
+    def get_option_index(self, key, labels):
+        # Reuse the index for this dropdown while its option labels are unchanged
+        idx = self._option_indexes.get(key)
+        labels = list(labels)
+        if idx is None or idx.signature != hash(tuple(DropdownOptionIndex._norm(t) for t in labels)):
+            idx = DropdownOptionIndex(labels)
+            self._option_indexes[key] = idx
+        return idx
+
+    def _match_option_text(self, value, options, key=None):
+        # options: [(index, text)]; returns (index, text, score) with exact/substring scoring 1.0
+        if not options:
+            return None, None, 0.0
+        index = self.get_option_index(key, [t for (_, t) in options]) if key else DropdownOptionIndex([t for (_, t) in options])
+        pos, txt, score = index.match(value)
+        if pos is None:
+            return None, None, 0.0
+        return options[pos][0], txt, score
+
+    def _record_dropdown_timing(self, xpath, value, picked, method, t0, t_open, t_snap, t_end, n_options=0):
+        rec = {
+            "xpath": xpath,
+            "value": value,
+            "picked": picked,
+            "method": method,
+            "options": n_options,
+            "open_ms": round((t_open - t0) * 1000, 1),
+            "snapshot_ms": round((t_snap - t_open) * 1000, 1),
+            "select_ms": round((t_end - t_snap) * 1000, 1),
+            "total_ms": round((t_end - t0) * 1000, 1),
+        }
+        self.dropdown_timings.append(rec)
+        DROPDOWN_SECONDS.observe(t_end - t0, method=method)
+        return rec
+
+    def set_custom_dropdown_by_xpath(self, trigger_xpath, value, confirm_label=None):
+        # Robust dropdown selector: handles native <select> and custom widgets.
+        # confirm_label: exact option text already known from the gazetteer.
         if value in (None, "") or not trigger_xpath:
             return False
+        # Options for the gazetteer are recorded only by a scoped snapshot of this call that set the value
+        self._last_dropdown_options.pop(trigger_xpath, None)
         try:
-            el = WebDriverWait(self.driver, 10).until(EC.presence_of_element_located((By.XPATH, trigger_xpath)))
-            self._scroll_into_view(el)
+            el = self._resolve_element(trigger_xpath, timeout=10, fallbacks=False)
+            if el is None:
+                raise NoSuchElementException(f"Dropdown not found: {trigger_xpath}")
+            try:
+                self._scroll_into_view(el)
+                _ = el.tag_name
+            except StaleElementReferenceException:
+                self._invalidate_element(trigger_xpath)
+                el = self._resolve_element(trigger_xpath, timeout=10, fallbacks=False)
+                self._scroll_into_view(el)
 
             # If a selection already exists, leave it untouched
             try:
@@ -740,7 +2553,7 @@ class TTDBookingBot:
                 else:
                     current_txt = (el.get_attribute("value") or "").strip()
                 if current_txt and current_txt.strip().lower() not in placeholders:
-                    self.log_message(f"Skip dropdown {trigger_xpath}: already selected '{current_txt}'")
+                    self.log_message("Skip dropdown %s: already selected '%s'", trigger_xpath, current_txt, level=LOG_DEBUG, event="dropdown.skip")
                     return False
             except Exception:
                 pass
@@ -757,35 +2570,29 @@ class TTDBookingBot:
                     # Try exact visible text first
                     try:
                         sel.select_by_visible_text(str(value))
-                        self.log_message(f"Selected from <select>: {value}")
+                        self.log_message("Selected from <select>: %s", value, level=LOG_DEBUG, event="dropdown.select")
                         return True
                     except Exception:
                         pass
-                    # Fallback: partial/ci match
-                    target = self._normalize(str(value))
-                    best = None
-                    best_ratio = 0.0
-                    for opt in sel.options:
-                        txt = (opt.text or "").strip()
-                        norm = self._normalize(txt)
-                        if target in norm:
-                            sel.select_by_visible_text(txt)
-                            self.log_message(f"Selected from <select> (partial): {txt}")
-                            return True
-                        # fuzzy score for misspellings
-                        ratio = difflib.SequenceMatcher(None, target, norm).ratio()
-                        if ratio > best_ratio:
-                            best_ratio = ratio
-                            best = txt
+                    # Fallback: partial/ci match, then fuzzy score for misspellings
+                    texts = [(o.text or "").strip() for o in sel.options]
+                    _, best, best_ratio = self.get_option_index(trigger_xpath, texts).match(value)
+                    if best and best_ratio >= 1.0:
+                        sel.select_by_visible_text(best)
+                        self._last_dropdown_options[trigger_xpath] = [t for t in texts if t]
+                        self.log_message("Selected from <select> (partial): %s", best, level=LOG_DEBUG, event="dropdown.select")
+                        return True
                     if best and best_ratio >= 0.7:
                         sel.select_by_visible_text(best)
-                        self.log_message(f"Selected from <select> (fuzzy {best_ratio:.2f}): {best}")
+                        self._last_dropdown_options[trigger_xpath] = [t for t in texts if t]
+                        self.log_message("Selected from <select> (fuzzy %.2f): %s", best_ratio, best, level=LOG_DEBUG, event="dropdown.select")
                         return True
                 except Exception as e:
                     self.log_message(f"<select> selection failed: {e}")
                 # If select path failed, continue to custom flow below
 
             # Custom dropdowns
+            t0 = time.time()
             try:
                 ActionChains(self.driver).move_to_element(el).pause(0).perform()
             except Exception:
@@ -797,8 +2604,51 @@ class TTDBookingBot:
                     self.driver.execute_script("arguments[0].click();", el)
                 except Exception:
                     pass
-            time.sleep(self.ui_open_delay)
+            t_open = time.time()
+
+            # One call waits for the panel and returns every visible option; match in
+            # Python, then click by index
+            snapshot = self._snapshot_dropdown_options(el, measure=True)
+            scoped = self._last_snapshot_scope == "panel"
+            t_snap = time.time()
+            if snapshot is not None:
+                options = [(o.get("index"), o.get("text") or "") for o in snapshot]
+                options = [(i, t) for (i, t) in options if self._is_plausible_option_text(t)]
+                # Known gazetteer label: only confirm it is present, re-reading while the list loads
+                if confirm_label:
+                    deadline = time.time() + self.gazetteer_confirm_timeout
+                    while confirm_label not in [t for (_, t) in options] and time.time() < deadline:
+                        time.sleep(self.ui_open_delay)
+                        snap = self._snapshot_dropdown_options(el)
+                        if snap is None:
+                            break
+                        options = [(o.get("index"), o.get("text") or "") for o in snap]
+                        options = [(i, t) for (i, t) in options if self._is_plausible_option_text(t)]
+                        scoped = self._last_snapshot_scope == "panel"
+                    t_snap = time.time()
+                idx, txt, score = self._match_option_text(confirm_label or value, options, key=trigger_xpath)
+                if idx is not None and score >= 0.8 and self._click_dropdown_option(idx, el):
+                    if scoped:
+                        self._last_dropdown_options[trigger_xpath] = [t for (_, t) in options]
+                    rec = self._record_dropdown_timing(trigger_xpath, value, txt, "snapshot", t0, t_open, t_snap, time.time(), len(options))
+                    kind = "" if score >= 1.0 else f" (fuzzy {score:.2f})"
+                    self.log_message("Dropdown selected%s %s [%d options, %.0f ms]", kind, txt, len(options), rec["total_ms"], level=LOG_DEBUG, event="dropdown.select")
+                    return True
+                try:
+                    # No verified match: back off before the blind keyboard pick
+                    self.delays.failure("key", "keyboard fallback")
+                    el.send_keys(Keys.ARROW_DOWN)
+                    time.sleep(self.ui_key_delay)
+                    el.send_keys(Keys.ENTER)
+                    time.sleep(self.ui_post_select_delay)
+                    self._record_dropdown_timing(trigger_xpath, value, None, "keyboard", t0, t_open, t_snap, time.time(), len(options))
+                    return True
+                except Exception:
+                    pass
+                self.log_message(f"Dropdown select failed: {value}")
+                return False
 
+            time.sleep(self.ui_open_delay)
             normalized_val = self._normalize(value)
             # Prefer visible dropdown panels near the trigger to avoid scanning the whole DOM
             candidates = []
@@ -822,7 +2672,7 @@ class TTDBookingBot:
                     txt = (opt.text or "").strip()
                     norm = self._normalize(txt)
                     if normalized_val and (normalized_val == norm or normalized_val in norm):
-                        opt.click(); time.sleep(self.ui_post_select_delay); self.log_message(f"Dropdown selected {txt}"); return True
+                        opt.click(); time.sleep(self.ui_post_select_delay); self.log_message("Dropdown selected %s", txt, level=LOG_DEBUG, event="dropdown.select"); return True
                 except Exception:
                     continue
 
@@ -839,7 +2689,7 @@ class TTDBookingBot:
                     continue
             if best_el and best_ratio >= 0.8:
                 try:
-                    best_el.click(); time.sleep(self.ui_post_select_delay); self.log_message(f"Dropdown selected (fuzzy {best_ratio:.2f}): {best_txt}"); return True
+                    best_el.click(); time.sleep(self.ui_post_select_delay); self.log_message("Dropdown selected (fuzzy %.2f): %s", best_ratio, best_txt, level=LOG_DEBUG, event="dropdown.select"); return True
                 except Exception:
                     pass
 
@@ -941,16 +2791,107 @@ class TTDBookingBot:
             self.log_message(f"Failed to click: {xp} - {e}")
             return False
 
-    def wait_for_blank_member_form(self, x, timeout=12):
+    _PAGE_WAIT_JS = """
+        const spec = arguments[0];
+        const done = arguments[arguments.length - 1];
+        const find = (xp) => {
+            try { return document.evaluate(xp, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue; }
+            catch (e) { return null; }
+        };
+        const norm = (t) => (t || '').trim().toLowerCase();
+        const read = () => {
+            const vals = {};
+            for (const k of Object.keys(spec.fields || {})) {
+                const el = find(spec.fields[k]);
+                vals[k] = el ? (el.value || '').trim() : null;
+            }
+            return vals;
+        };
+        const check = () => {
+            const vals = read();
+            const present = Object.values(vals).filter(v => v !== null);
+            let ok = false;
+            if (spec.mode === 'blank') {
+                ok = present.length > 0 && present.every(v => v === '');
+            } else if (spec.mode === 'any_filled') {
+                ok = present.some(v => v !== '');
+            } else if (spec.mode === 'options') {
+                const el = find(spec.dropdown);
+                const opts = el && el.options ? Array.from(el.options).map(o => o.text || '') : [];
+                vals.options = opts.length;
+                if (spec.expected) {
+                    const tgt = norm(spec.expected);
+                    ok = opts.some(o => norm(o).includes(tgt));
+                } else {
+                    ok = opts.length >= (spec.min_options || 1);
+                }
+            }
+            return ok ? vals : null;
+        };
+        let finished = false, obs = null, timer = null, iv = null;
+        const onEvt = () => { const v = check(); if (v) finish(true, v); };
+        const finish = (ok, vals) => {
+            if (finished) return;
+            finished = true;
+            if (obs) obs.disconnect();
+            document.removeEventListener('input', onEvt, true);
+            document.removeEventListener('change', onEvt, true);
+            clearTimeout(timer); clearInterval(iv);
+            done({ok: ok, values: vals || read()});
+        };
+        const first = check();
+        if (first) { finish(true, first); return; }
+        obs = new MutationObserver(onEvt);
+        obs.observe(document.documentElement || document, {subtree: true, childList: true, attributes: true, characterData: true});
+        document.addEventListener('input', onEvt, true);
+        document.addEventListener('change', onEvt, true);
+        // Frameworks may set .value without any DOM mutation; cheap in-page re-check as a safety net
+        iv = setInterval(onEvt, 100);
+        timer = setTimeout(() => finish(false, null), spec.timeout_ms);
+    """
+
+    def wait_in_page(self, mode, fields=None, timeout=10, dropdown=None, expected=None, min_options=2):
+        # Block in execute_async_script until the condition holds. Returns (ok, values),
+        # or None when in-page waiting is unavailable so callers can fall back to polling.
+        if not self.event_waits or not self.driver:
+            return None
+        spec = {
+            "mode": mode,
+            "fields": {k: v for k, v in (fields or {}).items() if v},
+            "dropdown": dropdown,
+            "expected": str(expected) if expected not in (None, "") else None,
+            "min_options": min_options,
+        }
         end = time.time() + timeout
+        values = {}
+        while True:
+            chunk = max(0.05, min(self.page_wait_slice, end - time.time()))
+            spec["timeout_ms"] = int(chunk * 1000)
+            try:
+                self._ensure_script_timeout(chunk + 5)
+                res = self.driver.execute_async_script(self._PAGE_WAIT_JS, spec) or {}
+            except Exception as e:
+                self.log_message(f"In-page wait unavailable ({mode}), polling instead: {str(e)[:80]}")
+                return None
+            values = res.get("values") or {}
+            if res.get("ok"):
+                return True, values
+            if time.time() >= end:
+                return False, values
+
+    def wait_for_blank_member_form(self, x, timeout=12):
         name_x = x.get("name_input")
         id_x = x.get("id_proof_number_input")
+        # One deadline for both paths: polling only gets what the in-page wait left over
+        end = time.time() + timeout
+        res = self.wait_in_page("blank", {"name_input": name_x, "id_proof_number_input": id_x}, timeout=timeout)
+        if res is not None:
+            return res[0]
+        read = lambda el: (el.get_attribute("value") or "").strip()
         while time.time() < end:
             try:
-                name_el = self.driver.find_element(By.XPATH, name_x)
-                id_el = self.driver.find_element(By.XPATH, id_x) if id_x else None
-                name_val = (name_el.get_attribute("value") or "").strip()
-                id_val = (id_el.get_attribute("value") or "").strip() if id_el else ""
+                name_val = self._with_element(name_x, read, timeout=0, fallbacks=False)
+                id_val = self._with_element(id_x, read, timeout=0, fallbacks=False) if id_x else ""
                 if not name_val and not id_val:
                     return True
             except Exception: 
@@ -992,17 +2933,175 @@ class TTDBookingBot:
     def clear_input_by_xpath(self, xpath):
         if not xpath:
             return False
-        try:
-            el = self.driver.find_element(By.XPATH, xpath)
+        def _clear(el):
             self._scroll_into_view(el)
             try: 
                 el.clear()
+            except StaleElementReferenceException:
+                raise
             except Exception:
                 self.driver.execute_script("arguments[0].value=''; arguments[0].dispatchEvent(new Event('input', {bubbles:true})); arguments[0].dispatchEvent(new Event('change', {bubbles:true}));", el)
             return True
+        try:
+            return self._with_element(xpath, _clear, timeout=0, fallbacks=False)
         except Exception:
             return False
 
+    def _locator_candidates(self, xpath):
+        # XPath first, then ID/NAME/CSS derived from it; the memoized winner goes first
+        cands = [(By.XPATH, xpath)]
+        m = re.search(r"@id=\"([^\"]+)\"", xpath)
+        if m:
+            cands.append((By.ID, m.group(1)))
+        m = re.search(r"@name=\"([^\"]+)\"", xpath)
+        if m:
+            cands.append((By.NAME, m.group(1)))
+        m = re.search(r"@id=\"([^\"]+)\"", xpath)
+        if m:
+            cands.append((By.CSS_SELECTOR, f"#{m.group(1)}"))
+        known = self._el_strategy.get(xpath)
+        if known:
+            cands = [known] + [c for c in cands if c != known]
+        return cands
+
+    def _resolve_element(self, xpath, timeout=8, fallback_timeout=6, fallbacks=True):
+        # Return a cached handle for xpath, or locate it (timeout<=0 means a single find)
+        if not xpath or not self.driver:
+            return None
+        el = self._el_cache.get(xpath)
+        if el is not None:
+            self._el_cache_stats["hits"] += 1
+            return el
+        self._el_cache_stats["misses"] += 1
+        cands = self._locator_candidates(xpath)
+        if not fallbacks:
+            cands = cands[:1]
+        for i, loc in enumerate(cands):
+            wait = timeout if i == 0 else fallback_timeout
+            try:
+                if wait and wait > 0:
+                    el = WebDriverWait(self.driver, wait).until(EC.presence_of_element_located(loc))
+                else:
+                    el = self.driver.find_element(*loc)
+            except Exception:
+                el = None
+            if el is not None:
+                self._el_cache[xpath] = el
+                self._el_strategy[xpath] = loc
+                return el
+        return None
+
+    def _invalidate_element(self, xpath):
+        if self._el_cache.pop(xpath, None) is not None:
+            self._el_cache_stats["invalidations"] += 1
+
+    def _invalidate_element_cache(self, reason=""):
+        # Drop all handles (form reset, navigation, new browser); keep learned strategies
+        if self._el_cache:
+            self._el_cache_stats["invalidations"] += len(self._el_cache)
+        self._el_cache.clear()
+        self._el_cache_stats["generation"] += 1
+        if reason:
+            self.log_message("Element cache reset (%s)", reason, level=LOG_DEBUG, event="element_cache.reset")
+
+    def _with_element(self, xpath, fn, timeout=8, fallbacks=True):
+        # Run fn(el) against the cached handle, re-resolving once if it went stale
+        el = self._resolve_element(xpath, timeout=timeout, fallbacks=fallbacks)
+        if el is None:
+            raise NoSuchElementException(f"Element not found: {xpath}")
+        try:
+            return fn(el)
+        except StaleElementReferenceException:
+            self._invalidate_element(xpath)
+            el = self._resolve_element(xpath, timeout=timeout, fallbacks=fallbacks)
+            if el is None:
+                raise
+            return fn(el)
+
+    def element_cache_stats(self):
+        st = dict(self._el_cache_stats)
+        st["size"] = len(self._el_cache)
+        st["strategies"] = {xp: by for xp, (by, _) in self._el_strategy.items()}
+        return st
+
+    def trace_span(self, name, cat="field", **attrs):
+        return self.tracer.span(name, cat, **attrs)
+
+    def _register_metrics(self):
+        # Scrape-time views over the bot's own stats dicts (no extra bookkeeping on the hot path)
+        reg = REGISTRY
+        reg.gauge("log_buffer_depth", "Entries held in the API log ring", fn=lambda: len(self._log_buffer))
+        reg.gauge("log_buffer_last_seq", "Last log sequence number", fn=lambda: self._log_buffer.last_seq)
+        reg.gauge("log_pipeline_queue_depth", "Log records waiting for the sink thread", fn=lambda: len(self.logs._queue))
+        reg.counter("log_events_emitted_total", "Log records delivered to sinks", fn=lambda: self.logs.stats["emitted"])
+        reg.counter("log_events_filtered_total", "Log records dropped by level filter", fn=lambda: self.logs.stats["filtered"])
+        reg.counter("log_sink_errors_total", "Errors raised by log sinks", fn=lambda: self.logs.stats["sink_errors"])
+        reg.counter("element_cache_hits_total", "Element cache hits", fn=lambda: self._el_cache_stats["hits"])
+        reg.counter("element_cache_misses_total", "Element cache misses", fn=lambda: self._el_cache_stats["misses"])
+        reg.counter("element_cache_invalidations_total", "Element cache invalidations", fn=lambda: self._el_cache_stats["invalidations"])
+        reg.gauge("element_cache_size", "Cached element handles", fn=lambda: len(self._el_cache))
+        wd = self.webdriver
+        reg.gauge("webdriver_queue_depth", "WebDriver commands waiting per priority", ("priority",),
+                  fn=lambda: wd.snapshot()["queue_depth"])
+        reg.counter("webdriver_commands_total", "WebDriver commands executed", fn=lambda: wd.stats["commands"])
+        reg.counter("webdriver_command_errors_total", "WebDriver commands that raised", fn=lambda: wd.stats["errors"])
+        reg.counter("webdriver_command_timeouts_total", "WebDriver commands whose caller timed out", fn=lambda: wd.stats["timeouts"])
+        reg.counter("webdriver_commands_cancelled_total", "Timed-out WebDriver commands skipped before running", fn=lambda: wd.stats["cancelled"])
+        reg.counter("webdriver_queue_wait_seconds_total", "Time WebDriver commands spent queued", fn=lambda: wd.stats["wait_seconds"])
+        reg.gauge("webdriver_queue_wait_seconds_max", "Longest WebDriver queue wait", fn=lambda: wd.stats["max_wait_seconds"])
+        # Pre-registry series names, kept so existing dashboards keep working
+        reg.counter("webdriver_queue_wait_seconds_sum", "Time WebDriver commands spent queued (deprecated: use webdriver_queue_wait_seconds_total)",
+                    fn=lambda: wd.stats["wait_seconds"])
+        reg.counter("webdriver_exec_seconds_sum", "Time spent executing WebDriver commands", fn=lambda: wd.stats["exec_seconds"])
+        sp = self.speech
+        reg.gauge("tts_queue_depth", "Speech messages waiting", fn=sp.depth)
+        reg.counter("tts_enqueued_total", "Speech messages enqueued", fn=lambda: sp.stats["enqueued"])
+        reg.counter("tts_spoken_total", "Speech messages spoken", fn=lambda: sp.stats["spoken"])
+        reg.counter("tts_coalesced_total", "Speech messages replaced by a newer one of the same kind", fn=lambda: sp.stats["coalesced"])
+        reg.counter("tts_dropped_total", "Speech messages dropped (queue full or stale)", fn=lambda: sp.stats["dropped"] + sp.stats["stale"])
+        sc = self.screens
+        reg.counter("screenshot_captures_total", "Browser frames captured", fn=lambda: sc.stats["captures"])
+        reg.counter("screenshot_unchanged_total", "Captures identical to the previous frame", fn=lambda: sc.stats["unchanged"])
+        reg.counter("screenshot_served_cached_total", "Screenshot requests served from the cached frame", fn=lambda: sc.stats["served_cached"])
+        reg.counter("screenshot_bytes_total", "Encoded bytes of changed frames", fn=lambda: sc.stats["bytes"])
+        cs = self.config_store
+        reg.gauge("config_version", "Version of the cached group config snapshot", fn=lambda: cs._snap.version)
+        reg.counter("config_watch_events_total", "Config file change events seen by the watcher", fn=lambda: self.config_watch.stats["events"])
+        reg.counter("config_loads_total", "Config file parses", fn=lambda: cs.stats["loads"])
+        reg.counter("config_load_errors_total", "Config file parses that failed", fn=lambda: cs.stats["errors"])
+        jr = self.journal
+        reg.counter("journal_records_total", "Run journal records appended", fn=lambda: jr.stats["records"])
+        reg.counter("journal_fsyncs_total", "Run journal fsync calls", fn=lambda: jr.stats["fsyncs"])
+        reg.counter("journal_compactions_total", "Run journal compactions", fn=lambda: jr.stats["compactions"])
+        reg.gauge("browser_alive", "1 when the last browser probe succeeded", fn=lambda: int(bool(self.browser_state.snapshot()["alive"])))
+        reg.gauge("bot_running", "1 while auto-fill is active", fn=lambda: int(bool(self.is_running)))
+
+    def _instrument_driver(self):
+        # Count every WebDriver command (element commands go through the parent driver too)
+        # and run it on the single WebDriver owner thread, whichever thread issued it
+        drv = self.driver
+        if drv is None or getattr(drv, "_ttd_instrumented", False):
+            return
+        orig = drv.execute
+        tracer = self.tracer
+        executor = self.webdriver
+
+        def execute(driver_command, params=None):
+            t0 = time.perf_counter()
+            try:
+                return orig(driver_command, params)
+            finally:
+                dt = time.perf_counter() - t0
+                tracer.count_command(driver_command, dt)
+                WEBDRIVER_SECONDS.observe(dt, command=driver_command)
+        routed = executor.wrap(execute)
+
+        def counted(driver_command, params=None):
+            tracer.note_round_trip()
+            return routed(driver_command, params)
+        drv.execute = counted
+        drv._ttd_instrumented = True
+
     def _scroll_into_view(self, el):
         try:
             self.driver.execute_script("arguments[0].scrollIntoView({block:'center'});", el)
@@ -1013,8 +3112,7 @@ class TTDBookingBot:
         if not xpath:
             return ""
         try:
-            el = self.driver.find_element(By.XPATH, xpath)
-            return (el.get_attribute("value") or "").strip()
+            return self._with_element(xpath, lambda el: (el.get_attribute("value") or "").strip(), timeout=0, fallbacks=False)
         except Exception:
             return ""
 
@@ -1058,7 +3156,7 @@ class TTDBookingBot:
             current = self.get_input_value_by_xpath(xpath)
             if current and self.respect_existing:
                 # Already filled (likely by Aadhaar autofill) – do not overwrite
-                self.log_message(f"Skip set at {xpath}: already filled with '{current}'")
+                self.log_message("Skip set at %s: already filled with '%s'", xpath, current, level=LOG_DEBUG, event="field.skip")
                 return False
         except Exception:
             pass
@@ -1067,63 +3165,188 @@ class TTDBookingBot:
             return self._set_dob_masked_by_xpath(xpath, value)
         return self.set_text_by_xpath(xpath, value)
 
-    def _set_dob_masked_by_xpath(self, xpath, dob_ddmmyyyy):
-        # Type DOB using digits-only so input masks auto-insert slashes, then verify
-        try:
-            el = WebDriverWait(self.driver, 10).until(EC.presence_of_element_located((By.XPATH, xpath)))
-            self._scroll_into_view(el)
-            try:
-                el.click()
-            except Exception:
-                self.driver.execute_script("arguments[0].click();", el)
-            time.sleep(self.ui_key_delay)
-            # Hard clear: select all + delete + JS fallback
-            try:
-                el.send_keys(Keys.CONTROL, 'a'); time.sleep(self.ui_key_delay); el.send_keys(Keys.BACKSPACE)
-            except Exception:
-                pass
+    # DOB input strategies, fastest reliable one first until the page teaches otherwise
+    DOB_STRATEGIES = ("bulk_keys", "native_setter", "per_char")
+
+    _DOB_CLEAR_JS = """
+        const el = arguments[0];
+        el.scrollIntoView({block: 'center'});
+        if (el.focus) el.focus();
+        const desc = Object.getOwnPropertyDescriptor(HTMLInputElement.prototype, 'value');
+        if (desc && desc.set) desc.set.call(el, ''); else el.value = '';
+        el.dispatchEvent(new Event('input', {bubbles: true}));
+    """
+
+    _DOB_NATIVE_SET_JS = """
+        const el = arguments[0], val = arguments[1], settleMs = arguments[2];
+        const done = arguments[arguments.length - 1];
+        el.scrollIntoView({block: 'center'});
+        if (el.focus) el.focus();
+        const desc = Object.getOwnPropertyDescriptor(HTMLInputElement.prototype, 'value');
+        if (desc && desc.set) desc.set.call(el, val); else el.value = val;
+        el.dispatchEvent(new Event('input', {bubbles: true}));
+        el.dispatchEvent(new Event('change', {bubbles: true}));
+        el.dispatchEvent(new Event('blur', {bubbles: true}));
+        if (el.blur) el.blur();
+        // Read back only after the page had a chance to re-render: a controlled input or
+        // mask that reverts the value a tick later must not count as success
+        setTimeout(() => done((el.value || '').trim()), settleMs);
+    """
+
+    def get_tuning_path(self):
+        p = os.environ.get("TTD_TUNING_PATH")
+        return p if p else os.path.join(self.get_config_dir(), "srivari_tuning.json")
+
+    def _load_tuning(self):
+        # Learned per-page behaviour that should survive across members and runs
+        if self._tuning is None:
+            self._tuning = {}
             try:
-                self.driver.execute_script("arguments[0].value='';", el)
+                path = self.get_tuning_path()
+                if os.path.exists(path):
+                    with open(path, "r", encoding="utf-8") as f:
+                        self._tuning = json.load(f) or {}
             except Exception:
-                pass
+                self._tuning = {}
+        return self._tuning
+
+    def _save_tuning(self):
+        try:
+            path = self.get_tuning_path()
+            tmp = f"{path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._load_tuning(), f, indent=2)
+            os.replace(tmp, path)
+            self._tuning_dirty = False
+        except Exception as e:
+            self.log_message(f"Failed to save tuning: {e}")
+
+    def save_tuning(self):
+        # Per-strategy counters batched per member (next to save_gazetteer), so fail streaks
+        # add up across runs and restarts
+        if self._tuning_dirty:
+            self._save_tuning()
+
+    def _dob_strategy_order(self, xpath):
+        learned = (self._load_tuning().get("dob_strategy") or {}).get(xpath) or {}
+        order = list(self.DOB_STRATEGIES)
+        stats = learned.get("stats") or {}
+        # Demote strategies that keep failing on this page, then put the known-good one first
+        order.sort(key=lambda k: (stats.get(k, {}).get("fail_streak", 0) >= 2, self.DOB_STRATEGIES.index(k)))
+        pref = learned.get("preferred")
+        if pref in order:
+            order.remove(pref)
+            order.insert(0, pref)
+        return order
+
+    def _record_dob_strategy(self, xpath, strategy, ok):
+        tuning = self._load_tuning()
+        learned = tuning.setdefault("dob_strategy", {}).setdefault(xpath, {"preferred": None, "stats": {}})
+        st = learned["stats"].setdefault(strategy, {"ok": 0, "fail": 0, "fail_streak": 0})
+        changed = False
+        if ok:
+            st["ok"] += 1
+            st["fail_streak"] = 0
+            if learned.get("preferred") != strategy:
+                learned["preferred"] = strategy
+                changed = True
+        else:
+            st["fail"] += 1
+            st["fail_streak"] += 1
+            if learned.get("preferred") == strategy and st["fail_streak"] >= 2:
+                learned["preferred"] = None
+                changed = True
+        self._tuning_dirty = True
+        # A flipped preference is written at once; counters wait for save_tuning()
+        if changed:
+            self._save_tuning()
+
+    def _dob_bulk_keys(self, el, digits, expected):
+        # JS clear + all digits and TAB in a single send_keys command
+        self.driver.execute_script(self._DOB_CLEAR_JS, el)
+        el.send_keys(digits + Keys.TAB)
+        time.sleep(self.ui_post_select_delay)
+        return (el.get_attribute('value') or '').strip()
+
+    def _dob_native_setter(self, el, digits, expected):
+        # Native value setter + input/change/blur events; value read back after a settle delay
+        settle = self.ui_post_select_delay
+        self._ensure_script_timeout(settle + 5)
+        return (self.driver.execute_async_script(self._DOB_NATIVE_SET_JS, el, expected, int(settle * 1000)) or "").strip()
+
+    def _dob_per_char(self, el, digits, expected):
+        # Original path: click, hard clear, one key per digit so input masks insert slashes
+        try:
+            el.click()
+        except Exception:
+            self.driver.execute_script("arguments[0].click();", el)
+        time.sleep(self.ui_key_delay)
+        try:
+            el.send_keys(Keys.CONTROL, 'a'); time.sleep(self.ui_key_delay); el.send_keys(Keys.BACKSPACE)
+        except Exception:
+            pass
+        try:
+            self.driver.execute_script("arguments[0].value='';", el)
+        except Exception:
+            pass
+        for ch in digits:
+            el.send_keys(ch); time.sleep(self.ui_key_delay)
+        el.send_keys(Keys.TAB); time.sleep(self.ui_post_select_delay)
+        return (el.get_attribute('value') or '').strip()
+
+    def _set_dob_masked_by_xpath(self, xpath, dob_ddmmyyyy):
+        # Try the strategy that last worked on this page first, then the others; verify each
+        try:
+            el = self._resolve_element(xpath, timeout=10, fallbacks=False)
+            if el is None:
+                raise NoSuchElementException(f"DOB input not found: {xpath}")
+            expected = self._format_dob_for_site(dob_ddmmyyyy)
             # Send digits only
             digits = ''.join(ch for ch in str(dob_ddmmyyyy) if ch.isdigit())
             if len(digits) != 8:
                 # As a fallback, derive digits from formatted string
-                f = self._format_dob_for_site(dob_ddmmyyyy)
-                digits = ''.join(ch for ch in f if ch.isdigit())
-            for ch in digits:
-                el.send_keys(ch); time.sleep(self.ui_key_delay)
-            # Blur to trigger validations
-            el.send_keys(Keys.TAB); time.sleep(self.ui_post_select_delay)
-            # Verify value
-            final = (el.get_attribute('value') or '').strip()
-            expected = self._format_dob_for_site(dob_ddmmyyyy)
-            if final != expected:
-                # Try setting via JS and dispatching events
+                digits = ''.join(ch for ch in expected if ch.isdigit())
+            final = ""
+            for strategy in self._dob_strategy_order(xpath):
+                t0 = time.time()
                 try:
-                    self.driver.execute_script(
-                        "arguments[0].value = arguments[1]; arguments[0].dispatchEvent(new Event('input', {bubbles:true})); arguments[0].dispatchEvent(new Event('change', {bubbles:true}));",
-                        el, expected
-                    )
-                    time.sleep(self.ui_post_select_delay)
-                    final = (el.get_attribute('value') or '').strip()
+                    final = getattr(self, f"_dob_{strategy}")(el, digits, expected)
+                except StaleElementReferenceException:
+                    self._invalidate_element(xpath)
+                    el = self._resolve_element(xpath, timeout=10, fallbacks=False)
+                    final = ""
                 except Exception:
-                    pass
-            ok = final == expected
-            self.log_message(f"DOB set to {final} (expected {expected}) -> {'OK' if ok else 'MISMATCH'}")
-            return ok
+                    final = ""
+                ok = final == expected
+                self._record_dob_strategy(xpath, strategy, ok)
+                if strategy == "per_char":
+                    if ok:
+                        self.delays.success("key")
+                    else:
+                        self.delays.failure("key", "dob mismatch")
+                if ok:
+                    self.log_message(f"DOB set to {final} via {strategy} in {(time.time() - t0) * 1000:.0f} ms -> OK")
+                    return True
+            self.log_message(f"DOB set to {final} (expected {expected}) -> MISMATCH")
+            return False
         except Exception as e:
             self.log_message(f"DOB input failed {xpath}: {e}")
             return False
 
     def wait_for_aadhaar_autofill(self, x, timeout=12):
         # After entering Aadhaar, wait briefly to see if site auto-fills fields
-        end = time.time() + timeout
         keys_to_check = [
             "name_input", "dob_input", "age_input", "mobile_input", "email_input",
             "city_input", "street_input", "doorno_input", "pincode_input"
         ]
+        end = time.time() + timeout
+        res = self.wait_in_page("any_filled", {k: x.get(k) for k in keys_to_check}, timeout=timeout)
+        if res is not None:
+            ok, values = res
+            if ok:
+                filled = [k for k, v in values.items() if v]
+                self.log_message(f"Aadhaar autofill populated: {', '.join(filled)}")
+            return ok
         while time.time() < end:
             try:
                 any_filled = False
@@ -1142,6 +3365,7 @@ class TTDBookingBot:
         # Open dropdown and click a random option among visible candidates
         if not trigger_xpath:
             return False
+        self._last_dropdown_options.pop(trigger_xpath, None)
         try:
             el = WebDriverWait(self.driver, 8).until(EC.presence_of_element_located((By.XPATH, trigger_xpath)))
             self._scroll_into_view(el)
@@ -1152,15 +3376,7 @@ class TTDBookingBot:
                     self.driver.execute_script("arguments[0].click();", el)
                 except Exception:
                     pass
-            time.sleep(self.ui_open_delay)
 
-            # Collect visible options commonly used by custom dropdowns
-            candidates = []
-            for xp in ["//li[normalize-space(.)]", "//span[normalize-space(.)]", "//div[normalize-space(.)]", "//option[normalize-space(.)]"]:
-                try:
-                    candidates.extend([c for c in self.driver.find_elements(By.XPATH, xp) if c.is_displayed()])
-                except Exception:
-                    pass
             # Filter out empty/placeholder-like and unrelated texts
             def plausible(t: str) -> bool:
                 if not t:
@@ -1174,6 +3390,31 @@ class TTDBookingBot:
                 if s.isdigit() or "yrs" in sl or "year" in sl or "xxxx" in sl:
                     return False
                 return True
+
+            # Snapshot all visible options in one call and click the pick by index
+            snapshot = self._snapshot_dropdown_options(el, measure=True)
+            if snapshot is not None:
+                options = [(o.get("index"), o.get("text") or "") for o in snapshot]
+                options = [(i, t) for (i, t) in options if plausible(t)]
+                scoped = self._last_snapshot_scope == "panel"
+                if not options:
+                    return False
+                idx, label = random.choice(options)
+                if self._click_dropdown_option(idx, el):
+                    if scoped:
+                        self._last_dropdown_options[trigger_xpath] = [t for (_, t) in options if self._is_plausible_option_text(t)]
+                    self.log_message(f"Randomly selected Nearest TTD Temple: {label}")
+                    return True
+                return False
+
+            # Collect visible options commonly used by custom dropdowns
+            time.sleep(self.ui_open_delay)
+            candidates = []
+            for xp in ["//li[normalize-space(.)]", "//span[normalize-space(.)]", "//div[normalize-space(.)]", "//option[normalize-space(.)]"]:
+                try:
+                    candidates.extend([c for c in self.driver.find_elements(By.XPATH, xp) if c.is_displayed()])
+                except Exception:
+                    pass
             texts = [(c, (c.text or "").strip()) for c in candidates]
             texts = [(c, t) for (c, t) in texts if plausible(t)]
             if not texts:
@@ -1238,52 +3479,92 @@ class TTDBookingBot:
     def set_text_by_xpath(self, xpath, value):
         if not xpath or value in (None, ""):
             return False
-        # Primary attempt: XPath
-        try:
-            el = WebDriverWait(self.driver, 8).until(
-                EC.presence_of_element_located((By.XPATH, xpath))
-            )
-        except Exception:
-            el = None
-        # Fallbacks: try ID/NAME/CSS when XPath fails or element is stale
-        if el is None:
-            try:
-                m = re.search(r"@id=\"([^\"]+)\"", xpath)
-                if m:
-                    el = WebDriverWait(self.driver, 6).until(EC.presence_of_element_located((By.ID, m.group(1))))
-            except Exception:
-                el = None
-            if el is None:
-                try:
-                    m = re.search(r"@name=\"([^\"]+)\"", xpath)
-                    if m:
-                        el = WebDriverWait(self.driver, 6).until(EC.presence_of_element_located((By.NAME, m.group(1))))
-                except Exception:
-                    el = None
-        if el is None:
-            # Try CSS by id as last resort
-            try:
-                m = re.search(r"@id=\"([^\"]+)\"", xpath)
-                if m:
-                    el = WebDriverWait(self.driver, 6).until(EC.presence_of_element_located((By.CSS_SELECTOR, f"#{m.group(1)}")))
-            except Exception:
-                el = None
-        if el is None:
-            self.log_message(f"set_text_by_xpath could not locate element: {xpath}")
-            return False
-        try:
+        # Cached handle or XPath, with ID/NAME/CSS fallbacks (the locator that works is memoized)
+        def _apply(el):
             self._scroll_into_view(el)
             try:
                 el.clear()
+            except StaleElementReferenceException:
+                raise
             except Exception:
                 self.driver.execute_script("arguments[0].value='';", el)
             el.send_keys(str(value))
-            self.log_message(f"Set text at {xpath} = {value}")
+        try:
+            self._with_element(xpath, _apply)
+            self.log_message("Set text at %s = %s", xpath, value, level=LOG_DEBUG, event="field.set")
             return True
+        except NoSuchElementException:
+            self.log_message(f"set_text_by_xpath could not locate element: {xpath}")
+            return False
         except Exception as e:
             self.log_message(f"set_text_by_xpath failed {xpath}: {e}")
             return False
 
+    # Plain text inputs that can be filled together in one in-page script call
+    BATCH_TEXT_KEYS = (
+        "name_input", "mobile_input", "email_input",
+        "city_input", "street_input", "doorno_input", "pincode_input",
+    )
+
+    _BATCH_FILL_JS = """
+        const plan = arguments[0] || [];
+        const respect = !!arguments[1];
+        const out = {};
+        for (const item of plan) {
+            let el = null;
+            try {
+                el = document.evaluate(item.xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+            } catch (e) { el = null; }
+            if (!el) { out[item.key] = {status: 'missing', value: ''}; continue; }
+            const cur = (el.value || '').trim();
+            if (cur && respect) { out[item.key] = {status: 'skipped', value: cur}; continue; }
+            try {
+                // Use the native setter so React-controlled inputs pick up the change
+                const proto = (el instanceof HTMLTextAreaElement) ? HTMLTextAreaElement.prototype : HTMLInputElement.prototype;
+                const desc = Object.getOwnPropertyDescriptor(proto, 'value');
+                if (el.focus) el.focus();
+                if (desc && desc.set) desc.set.call(el, item.value); else el.value = item.value;
+                el.dispatchEvent(new Event('input', {bubbles: true}));
+                el.dispatchEvent(new Event('change', {bubbles: true}));
+                if (el.blur) el.blur();
+                out[item.key] = {status: 'set', value: (el.value || '').trim()};
+            } catch (e) {
+                out[item.key] = {status: 'error', value: String(e)};
+            }
+        }
+        return out;
+    """
+
+    def batch_fill_text_inputs(self, x, values):
+        # Apply all plain text inputs in one round trip; returns keys that are verified
+        # (set or intentionally skipped). Anything else is left to the per-field path.
+        plan = []
+        for key, value in (values or {}).items():
+            xp = x.get(key)
+            if key not in self.BATCH_TEXT_KEYS or not xp or value in (None, ""):
+                continue
+            plan.append({"key": key, "xpath": xp, "value": str(value)})
+        if not plan or not self.driver:
+            return set()
+        try:
+            results = self.driver.execute_script(self._BATCH_FILL_JS, plan, bool(self.respect_existing)) or {}
+        except Exception as e:
+            self.log_message(f"Batch fill failed, using per-field fill: {e}")
+            return set()
+        done = set()
+        for item in plan:
+            key = item["key"]
+            res = results.get(key) or {}
+            st = res.get("status")
+            if st == "skipped":
+                self.log_message("Skip set at %s: already filled with '%s'", item["xpath"], res.get("value", ""), level=LOG_DEBUG, event="field.skip")
+                done.add(key)
+            elif st == "set" and (res.get("value") or "") == item["value"].strip():
+                done.add(key)
+        failed = [p["key"] for p in plan if p["key"] not in done]
+        self.log_message(f"Batch filled {len(done)}/{len(plan)} text fields" + (f"; per-field fallback for {', '.join(failed)}" if failed else ""))
+        return done
+
     def set_radio_by_xpath(self, xpath, desired=True):
         try:
             el = WebDriverWait(self.driver, 8).until(
@@ -1347,7 +3628,7 @@ class TTDBookingBot:
         except Exception:
             pass
 
-    def wait_for_dropdown_ready(self, dropdown_xpath, expected_value=None, min_options=2, timeout=12):
+    def wait_for_dropdown_ready(self, dropdown_xpath, expected_value=None, min_options=2, timeout=12, known_label=False):
         # Wait until a dependent dropdown is populated or contains an expected option
         if not dropdown_xpath:
             return False
@@ -1360,6 +3641,10 @@ class TTDBookingBot:
             except Exception:
                 tag = ""
             if tag == "select":
+                res = self.wait_in_page("options", dropdown=dropdown_xpath, expected=expected_value,
+                                        min_options=min_options, timeout=max(0.1, end - time.time()))
+                if res is not None:
+                    return res[0]
                 poll = 0.18
                 while time.time() < end:
                     try:
@@ -1376,142 +3661,440 @@ class TTDBookingBot:
                     time.sleep(poll)
                 return False
             else:
-                # For custom dropdowns, a brief wait is usually enough
-                time.sleep(self.ui_open_delay)
+                # For custom dropdowns, a brief wait is usually enough (none when the
+                # gazetteer label is known: selection confirms the option itself)
+                if not known_label:
+                    time.sleep(self.ui_open_delay)
                 return True
         except Exception:
             return False
 
-    def fill_srivari_team_leader(self, details, x, include_address=True):
+    def fill_srivari_team_leader(self, details, x, include_address=True, member=None, skip=()):
         def gv(*keys, default=None):
             for k in keys:
                 v = details.get(k)
                 if v not in (None, ""):
                     return v
             return default
-            
+        # mark(result) inside a field span journals the step only when it succeeded
+        span = self._journal_span(member)
+        # Steps already journaled (and still shown on the page) for this member before a crash/restart
+        done = set(skip or ())
+
         photo = gv("photo")
-        if x.get("photo_trigger") and photo:
-            self.upload_file_via_trigger(x.get("photo_trigger"), photo, x.get("photo_file_input"))
+        if x.get("photo_trigger") and photo and "photo" not in done:
+            with span("photo") as mark:
+                mark(self.upload_file_via_trigger(x.get("photo_trigger"), photo, x.get("photo_file_input")))
             
         # 1) Aadhaar first
         id_type = gv("id_proof_type", "id_proof", default="Aadhaar")
         id_no = gv("id_number", "aadhaar", "aadhar_no")
-        self.set_custom_dropdown_by_xpath(x.get("id_proof_type_dropdown",""), id_type)
-        self.set_text_by_xpath(x.get("id_proof_number_input",""), id_no)
-        # Wait briefly for Aadhaar-driven autofill (if any)
-        self.wait_for_aadhaar_autofill(x, timeout=self.aadhaar_autofill_wait_seconds)
+        if "id_proof_type" not in done:
+            with span("id_proof_type") as mark:
+                mark(self.set_custom_dropdown_by_xpath(x.get("id_proof_type_dropdown",""), id_type))
+        if "id_number" not in done:
+            with span("id_number") as mark:
+                mark(self.set_text_by_xpath(x.get("id_proof_number_input",""), id_no))
+            # Wait briefly for Aadhaar-driven autofill (if any)
+            with span("aadhaar_autofill_wait", cat="wait"):
+                self.wait_for_aadhaar_autofill(x, timeout=self.aadhaar_autofill_wait_seconds)
 
-        # 2) Fill only if empty (respect autofill/manual input)
-        self.set_text_if_empty_by_xpath(x.get("name_input",""), gv("name"))
+        # 2) Batch-fill plain text inputs in one round trip; unverified ones fall back below.
+        # Address text waits for the country/state/district selects (a dependent change can reset it)
+        batched = set()
+        if self.batch_fill and "batch_text" not in done:
+            text_values = {
+                "name_input": gv("name"),
+                "mobile_input": gv("mobile"),
+                "email_input": gv("email", "mail_id"),
+            }
+            with span("batch_text") as mark:
+                batched = mark(self.batch_fill_text_inputs(x, text_values))
+
+        # Fill only if empty (respect autofill/manual input)
+        if "name_input" not in batched:
+            with span("name") as mark:
+                mark(self.set_text_if_empty_by_xpath(x.get("name_input",""), gv("name")))
 
         if x.get("dob_input") and gv("dob"):
-            self.set_text_if_empty_by_xpath(x.get("dob_input",""), gv("dob"), is_dob=True)
+            with span("dob") as mark:
+                mark(self.set_text_if_empty_by_xpath(x.get("dob_input",""), gv("dob"), is_dob=True))
         if x.get("age_input") and gv("age"):
-            self.set_text_if_empty_by_xpath(x.get("age_input",""), gv("age"))
+            with span("age") as mark:
+                mark(self.set_text_if_empty_by_xpath(x.get("age_input",""), gv("age")))
             
-        self.set_text_if_empty_by_xpath(x.get("mobile_input",""), gv("mobile"))
-        self.set_text_if_empty_by_xpath(x.get("email_input",""), gv("email", "mail_id"))
+        if "mobile_input" not in batched:
+            with span("mobile") as mark:
+                mark(self.set_text_if_empty_by_xpath(x.get("mobile_input",""), gv("mobile")))
+        if "email_input" not in batched:
+            with span("email") as mark:
+                mark(self.set_text_if_empty_by_xpath(x.get("email_input",""), gv("email", "mail_id")))
         
-        if gv("blood_group") and x.get("blood_group_dropdown"):
-            self.set_custom_dropdown_by_xpath(x.get("blood_group_dropdown",""), gv("blood_group"))
-            
-        g = (gv("gender", default="") or "").strip().lower()
-        picked = False
-        if g.startswith("m") and x.get("gender_male_radio"):
-            picked = self.set_radio_by_xpath(x.get("gender_male_radio"), True)
-        elif g.startswith("f") and x.get("gender_female_radio"):
-            picked = self.set_radio_by_xpath(x.get("gender_female_radio"), True)
+        if gv("blood_group") and x.get("blood_group_dropdown") and "blood_group" not in done:
+            with span("blood_group") as mark:
+                mark(self.set_custom_dropdown_by_xpath(x.get("blood_group_dropdown",""), gv("blood_group")))
             
-        if not picked and x.get("gender_container"):
-            try:
-                cont = self.driver.find_element(By.XPATH, x.get("gender_container"))
-                self._scroll_into_view(cont)
-                cont.click()
-            except Exception:
-                pass
+        if "gender" not in done:
+            with span("gender") as mark:
+                g = (gv("gender", default="") or "").strip().lower()
+                picked = False
+                if g.startswith("m") and x.get("gender_male_radio"):
+                    picked = self.set_radio_by_xpath(x.get("gender_male_radio"), True)
+                elif g.startswith("f") and x.get("gender_female_radio"):
+                    picked = self.set_radio_by_xpath(x.get("gender_female_radio"), True)
+                
+                if not picked and x.get("gender_container"):
+                    try:
+                        cont = self.driver.find_element(By.XPATH, x.get("gender_container"))
+                        self._scroll_into_view(cont)
+                        cont.click()
+                        picked = True
+                    except Exception:
+                        pass
+                mark(picked)
                 
         # Ensure both fitness checkboxes are checked (mentally & physically)
-        self.ensure_fitness_checkboxes(x)
+        if "fitness" not in done:
+            with span("fitness") as mark:
+                self.ensure_fitness_checkboxes(x)
+                mark()
         
         if include_address:
             # Country
-            if self.set_custom_dropdown_by_xpath(x.get("country_dropdown",""), gv("country", default="India")):
-                time.sleep(self.ui_post_select_delay)
-            
-            # State (wait for options if dependent on country)
+            country = gv("country", default="India")
             st_val = gv("state")
-            if st_val:
-                self.wait_for_dropdown_ready(x.get("state_dropdown"), expected_value=st_val, min_options=2, timeout=15)
-                self.set_custom_dropdown_by_xpath(x.get("state_dropdown",""), st_val)
+            # Set when a parent select changed; the dependent list's readiness is timed from here
+            parent_set_at = None
+            if "country" not in done:
+                with span("country") as mark:
+                    if mark(self.set_custom_dropdown_by_xpath(x.get("country_dropdown",""), country)):
+                        parent_set_at = time.time()
+                        if not st_val or "state" in done:
+                            # Nothing below waits for the State list: give it the learned reload time
+                            time.sleep(self.delays.get("dependent_list"))
+            
+            # State (wait for options if dependent on country; confirm only if cached)
+            if st_val and "state" not in done:
+                known = self.gazetteer_lookup("state", st_val, country=country)
+                with span("state_options_wait", cat="wait"):
+                    ready = self.wait_for_dropdown_ready(x.get("state_dropdown"), expected_value=known or st_val, min_options=2, timeout=15, known_label=bool(known))
+                if ready and parent_set_at:
+                    self.delays.observe("dependent_list", time.time() - parent_set_at)
+                parent_set_at = None
+                with span("state", cached=bool(known)) as mark:
+                    if mark(self.set_custom_dropdown_by_xpath(x.get("state_dropdown",""), st_val, confirm_label=known)):
+                        parent_set_at = time.time()
+                self.gazetteer_record_dropdown(x.get("state_dropdown"), "state", country=country)
                 
             # District (wait for it to populate after state)
             dt_val = gv("district")
-            if dt_val:
-                self.wait_for_dropdown_ready(x.get("district_dropdown"), expected_value=dt_val, min_options=2, timeout=15)
-                self.set_custom_dropdown_by_xpath(x.get("district_dropdown",""), dt_val)
+            if dt_val and "district" not in done:
+                known = self.gazetteer_lookup("district", dt_val, country=country, state=st_val)
+                with span("district_options_wait", cat="wait"):
+                    ready = self.wait_for_dropdown_ready(x.get("district_dropdown"), expected_value=known or dt_val, min_options=2, timeout=15, known_label=bool(known))
+                if ready and parent_set_at:
+                    self.delays.observe("dependent_list", time.time() - parent_set_at)
+                with span("district", cached=bool(known)) as mark:
+                    mark(self.set_custom_dropdown_by_xpath(x.get("district_dropdown",""), dt_val, confirm_label=known))
+                if st_val:
+                    self.gazetteer_record_dropdown(x.get("district_dropdown"), "district", country=country, state=st_val)
+
+            # Address text in one round trip, now that the selects above have settled
+            if self.batch_fill and "batch_address" not in done:
+                address_values = {
+                    "street_input": gv("street"),
+                    "doorno_input": gv("doorno", "door_no"),
+                    "pincode_input": gv("pincode", "pin_code"),
+                }
+                if not x.get("city_dropdown"):
+                    address_values["city_input"] = gv("city")
+                with span("batch_address") as mark:
+                    batched |= mark(self.batch_fill_text_inputs(x, address_values))
                 
             city_val = gv("city")
-            if city_val:
+            if city_val and "city" not in done:
                 # If there is an explicit dropdown, try it; otherwise treat city as a text input
                 if x.get("city_dropdown"):
-                    self.set_custom_dropdown_by_xpath(x.get("city_dropdown",""), city_val)
-                    # Verify and fallback to direct input if value not set/mismatched
-                    try:
-                        city_el = self.driver.find_element(By.XPATH, x.get("city_input",""))
-                        current = (city_el.get_attribute("value") or "").strip()
-                    except Exception:
-                        current = ""
-                    if not current or self._normalize(current) != self._normalize(city_val):
-                        self.set_text_if_empty_by_xpath(x.get("city_input",""), city_val)
-                else:
-                    self.set_text_if_empty_by_xpath(x.get("city_input",""), city_val)
+                    with span("city") as mark:
+                        mark(self.set_custom_dropdown_by_xpath(x.get("city_dropdown",""), city_val))
+                        # Verify and fallback to direct input if value not set/mismatched
+                        try:
+                            city_el = self.driver.find_element(By.XPATH, x.get("city_input",""))
+                            current = (city_el.get_attribute("value") or "").strip()
+                        except Exception:
+                            current = ""
+                        if not current or self._normalize(current) != self._normalize(city_val):
+                            mark(self.set_text_if_empty_by_xpath(x.get("city_input",""), city_val))
+                elif "city_input" not in batched:
+                    with span("city") as mark:
+                        mark(self.set_text_if_empty_by_xpath(x.get("city_input",""), city_val))
                     
             # Address fields (only fill if empty)
-            self.set_text_if_empty_by_xpath(x.get("street_input",""), gv("street"))
-            self.set_text_if_empty_by_xpath(x.get("doorno_input",""), gv("doorno", "door_no"))
-            self.set_text_if_empty_by_xpath(x.get("pincode_input",""), gv("pincode", "pin_code"))
+            if "street_input" not in batched:
+                with span("street") as mark:
+                    mark(self.set_text_if_empty_by_xpath(x.get("street_input",""), gv("street")))
+            if "doorno_input" not in batched:
+                with span("doorno") as mark:
+                    mark(self.set_text_if_empty_by_xpath(x.get("doorno_input",""), gv("doorno", "door_no")))
+            if "pincode_input" not in batched:
+                with span("pincode") as mark:
+                    mark(self.set_text_if_empty_by_xpath(x.get("pincode_input",""), gv("pincode", "pin_code")))
             
             # Nearest TTD temple (robust selection) – leave as is if already chosen
             ntt = gv("nearest_ttd_temple") or gv("nearest ttd temple")
-            if x.get("nearest_ttd_temple_dropdown"):
-                # Try a direct value first
-                if ntt and self.set_custom_dropdown_by_xpath(x.get("nearest_ttd_temple_dropdown",""), ntt):
-                    pass
-                else:
-                    try:
-                        el = WebDriverWait(self.driver, 8).until(EC.presence_of_element_located((By.XPATH, x.get("nearest_ttd_temple_dropdown",""))))
-                        current = (el.get_attribute("value") or "").strip()
-                        if not current:
-                            self._scroll_into_view(el)
-                            el.click(); time.sleep(self.ui_open_delay)
-                            if not self.pick_random_from_dropdown(x.get("nearest_ttd_temple_dropdown","")):
-                                for _ in range(4):
-                                    el.send_keys(Keys.ARROW_DOWN); time.sleep(self.ui_key_delay)
-                                el.send_keys(Keys.ENTER); time.sleep(self.ui_post_select_delay)
-                    except Exception:
-                        self.log_message("Could not set Nearest TTD Temple.")
+            if x.get("nearest_ttd_temple_dropdown") and "nearest_ttd_temple" not in done:
+                known = self.gazetteer_lookup("temple", ntt) if ntt else None
+                with span("nearest_ttd_temple", cached=bool(known)) as mark:
+                    # Try a direct value first
+                    if ntt and mark(self.set_custom_dropdown_by_xpath(x.get("nearest_ttd_temple_dropdown",""), ntt, confirm_label=known)):
+                        self.gazetteer_record_dropdown(x.get("nearest_ttd_temple_dropdown"), "temple")
+                    else:
+                        try:
+                            el = WebDriverWait(self.driver, 8).until(EC.presence_of_element_located((By.XPATH, x.get("nearest_ttd_temple_dropdown",""))))
+                            current = (el.get_attribute("value") or "").strip()
+                            mark(current)
+                            if not current:
+                                self._scroll_into_view(el)
+                                el.click(); time.sleep(self.ui_open_delay)
+                                picked_random = mark(self.pick_random_from_dropdown(x.get("nearest_ttd_temple_dropdown","")))
+                                self.gazetteer_record_dropdown(x.get("nearest_ttd_temple_dropdown"), "temple")
+                                if not picked_random:
+                                    for _ in range(4):
+                                        el.send_keys(Keys.ARROW_DOWN); time.sleep(self.ui_key_delay)
+                                    el.send_keys(Keys.ENTER); time.sleep(self.ui_post_select_delay)
+                        except Exception:
+                            self.log_message("Could not set Nearest TTD Temple.")
+
+    def load_srivari_source(self, canonicalize=False):
+        # Mutable copy of the cached snapshot (the run flow edits members in place)
+        config = thaw(self.config_store.get().data)
+        if canonicalize:
+            try:
+                config["members"] = self.canonicalize_members(config.get("members") or [])
+            except Exception as e:
+                self.log_message(f"Gazetteer pre-resolve skipped: {e}")
+        return config
+
+    def get_gazetteer_path(self):
+        p = os.environ.get("TTD_GAZETTEER_PATH")
+        return p if p else os.path.join(self.get_config_dir(), "srivari_gazetteer.json")
+
+    def get_journal_path(self):
+        p = os.environ.get("TTD_JOURNAL_PATH")
+        return p if p else os.path.join(self.get_config_dir(), "srivari_run_journal.jsonl")
+
+    def _journal_key(self, members):
+        # Identifies the group, so a journal left by a different member list is not resumed
+        ids = [(m.get("name"), m.get("id_number") or m.get("aadhaar")) for m in members if isinstance(m, dict)]
+        return hashlib.blake2b(json.dumps(ids).encode("utf-8"), digest_size=8).hexdigest()
+
+    def _journal_span(self, member):
+        # trace_span yielding mark(result): a field is journaled with its fill time only when
+        # the step reported success, so a resume never skips a step that did not stick
+        @contextlib.contextmanager
+        def span(name, cat="field", **attrs):
+            t0 = time.time()
+            res = {"ok": False}
+
+            def mark(result=True):
+                res["ok"] = bool(result)
+                return result
+            with self.trace_span(name, cat, **attrs):
+                yield mark
+            if member is not None and cat == "field" and res["ok"]:
+                self.journal.append("field_filled", member=member, field=name, ms=round((time.time() - t0) * 1000, 1))
+        return span
 
-    def load_srivari_source(self):
-        config = {"general": {}, "members": []}
+    # Inputs whose current value shows that a journaled step is still applied on the page
+    _RESUME_CHECKS = {
+        "id_proof_type": ("id_proof_type_dropdown",),
+        "id_number": ("id_proof_number_input",),
+        "batch_text": ("name_input", "mobile_input", "email_input"),
+        "blood_group": ("blood_group_dropdown",),
+        "country": ("country_dropdown",),
+        "state": ("state_dropdown",),
+        "district": ("district_dropdown",),
+        "batch_address": ("street_input", "doorno_input", "pincode_input"),
+        "city": ("city_input",),
+        "nearest_ttd_temple": ("nearest_ttd_temple_dropdown",),
+    }
+    _RESUME_VALUES_JS = """
+        return arguments[0].map(xp => {
+            let el = null;
+            try { el = document.evaluate(xp, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue; } catch (e) {}
+            if (!el) return '';
+            return ('value' in el) ? String(el.value || '').trim() : null;
+        });
+    """
+
+    def _verify_resumed_steps(self, x, skip):
+        # The journal says these steps were done, but after a browser restart (or a form reset)
+        # the page no longer shows them: keep only steps whose inputs still hold a value. Steps
+        # with nothing to read back (photo, gender, fitness) are kept only if no checked step
+        # came back blank.
+        checks = {step: [x.get(k) for k in self._RESUME_CHECKS.get(step, ()) if x.get(k)] for step in skip}
+        xpaths = sorted({xp for xps in checks.values() for xp in xps})
         try:
-            cfg_path = self.get_config_path()
-            if os.path.exists(cfg_path):
-                with open(cfg_path, "r", encoding="utf-8") as f:
-                    config = json.load(f) or config
+            values = dict(zip(xpaths, self.driver.execute_script(self._RESUME_VALUES_JS, xpaths) or [])) if xpaths else {}
+        except Exception as e:
+            self.log_message(f"Could not verify resumed steps, re-running them: {e}", level=LOG_WARNING, event="journal.verify")
+            return []
+        kept, unknown, lost = [], [], []
+        for step, xps in checks.items():
+            readable = [values.get(xp) for xp in xps if values.get(xp) is not None]
+            if not readable:
+                unknown.append(step)
+            elif any(readable):
+                kept.append(step)
             else:
-                # Fallback to legacy file in same dir as config
-                legacy = os.path.join(self.get_config_dir(), "srivari_members.json")
-                if os.path.exists(legacy):
-                    with open(legacy, "r", encoding="utf-8") as f:
-                        data = json.load(f) or {}
-                        config["members"] = data.get("members", [])
+                lost.append(step)
+        if lost:
+            self.log_message(f"Re-filling {len(lost) + len(unknown)} journaled steps the page no longer shows",
+                             event="journal.verify")
+            return kept
+        return kept + unknown
+
+    def _form_shows_member(self, x, details):
+        # True if the form still holds this member's name and Aadhaar (filled, not yet saved)
+        keys = [k for k in ("name_input", "id_proof_number_input") if x.get(k)]
+        try:
+            values = self.driver.execute_script(self._RESUME_VALUES_JS, [x.get(k) for k in keys]) or []
+        except Exception:
+            return False
+        got = dict(zip(keys, values))
+        name = details.get("name")
+        id_no = details.get("id_number") or details.get("aadhaar") or details.get("aadhar_no")
+        digits = lambda v: "".join(ch for ch in str(v or "") if ch.isdigit())
+        if name and self._normalize(got.get("name_input")) != self._normalize(name):
+            return False
+        if id_no and digits(got.get("id_proof_number_input")) != digits(id_no):
+            return False
+        return bool(name or id_no)
+
+    def _fill_member_journaled(self, idx, details, x, skip=()):
+        if skip:
+            skip = self._verify_resumed_steps(x, skip)
+        self.journal.append("member_started", member=idx, resumed=bool(skip))
+        t0 = time.time()
+        with self.trace_span("member", cat="member", member=idx):
+            self.fill_srivari_team_leader(details, x, include_address=True, member=idx, skip=skip)
+        self.journal.append("member_filled", member=idx, ms=round((time.time() - t0) * 1000, 1))
+        self.save_gazetteer()
+        self.save_tuning()
+
+    def _load_gazetteer(self):
+        # Versioned cache: {"version", "updated_at", "countries": {c: {"states": {s: {"districts": [...]}}}}, "temples": [...]}
+        if self._gazetteer is not None:
+            return self._gazetteer
+        data = {"version": GAZETTEER_VERSION, "updated_at": None, "countries": {}, "temples": []}
+        try:
+            path = self.get_gazetteer_path()
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    loaded = json.load(f) or {}
+                if loaded.get("version") == GAZETTEER_VERSION:
+                    data.update(loaded)
+                else:
+                    self.log_message(f"Ignoring gazetteer with version {loaded.get('version')} (expected {GAZETTEER_VERSION})")
         except Exception as e:
-            self.log_message(f"Failed to load Srivari data: {e}")
-        return config
+            self.log_message(f"Failed to load gazetteer: {e}")
+        self._gazetteer = data
+        return data
+
+    def save_gazetteer(self):
+        if not self._gazetteer_dirty or self._gazetteer is None:
+            return False
+        try:
+            path = self.get_gazetteer_path()
+            self._gazetteer["updated_at"] = time.time()
+            tmp = f"{path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._gazetteer, f, indent=2, ensure_ascii=False)
+            os.replace(tmp, path)
+            self._gazetteer_dirty = False
+            return True
+        except Exception as e:
+            self.log_message(f"Failed to save gazetteer: {e}")
+            return False
+
+    def _gazetteer_labels(self, kind, country=None, state=None):
+        g = self._load_gazetteer()
+        if kind == "temple":
+            return list(g.get("temples") or [])
+        states = ((g.get("countries") or {}).get(country or "India") or {}).get("states") or {}
+        if kind == "state":
+            return list(states.keys())
+        if kind == "district":
+            st = self.gazetteer_lookup("state", state, country=country) if state else None
+            return list((states.get(st) or {}).get("districts") or []) if st else []
+        return []
+
+    def gazetteer_lookup(self, kind, value, country=None, state=None):
+        # Canonical cached label for value, or None if unknown / not confidently matched
+        if value in (None, ""):
+            return None
+        labels = self._gazetteer_labels(kind, country=country, state=state)
+        if not labels:
+            return None
+        key = f"gazetteer:{kind}:{country or 'India'}:{state or ''}"
+        _, label, score = self.get_option_index(key, labels).match(value)
+        return label if label and score >= 0.8 else None
+
+    def gazetteer_record(self, kind, labels, country=None, state=None):
+        # Merge an observed option list into the cache; persisted on save_gazetteer()
+        labels = [str(t).strip() for t in (labels or []) if str(t or "").strip()]
+        if not labels:
+            return
+        g = self._load_gazetteer()
+        if kind == "temple":
+            if labels != g.get("temples"):
+                g["temples"] = labels
+                self._gazetteer_dirty = True
+            return
+        c = g.setdefault("countries", {}).setdefault(country or "India", {"states": {}})
+        states = c.setdefault("states", {})
+        if kind == "state":
+            for lb in labels:
+                if lb not in states:
+                    states[lb] = {"districts": []}
+                    self._gazetteer_dirty = True
+        elif kind == "district" and state:
+            st = self.gazetteer_lookup("state", state, country=country) or state
+            entry = states.setdefault(st, {"districts": []})
+            if entry.get("districts") != labels:
+                entry["districts"] = labels
+                self._gazetteer_dirty = True
+
+    def gazetteer_record_dropdown(self, trigger_xpath, kind, country=None, state=None):
+        # Consumes the options left by the last successful scoped selection on this dropdown
+        labels = self._last_dropdown_options.pop(trigger_xpath, None) if trigger_xpath else None
+        if labels:
+            self.gazetteer_record(kind, labels, country=country, state=state)
+
+    def canonicalize_members(self, members):
+        # Replace State / District / Nearest TTD Temple with the exact cached option labels
+        out = []
+        for m in members:
+            if not isinstance(m, dict):
+                out.append(m)
+                continue
+            m = dict(m)
+            country = m.get("country") or "India"
+            for field, kind in (("state", "state"), ("district", "district"), ("nearest_ttd_temple", "temple")):
+                val = m.get(field)
+                if val in (None, ""):
+                    continue
+                label = self.gazetteer_lookup(kind, val, country=country, state=m.get("state"))
+                if label and label != val:
+                    self.log_message("Gazetteer: %s '%s' -> '%s'", field, val, label, level=LOG_DEBUG, event="gazetteer.resolve")
+                    m[field] = label
+                elif not label and self._gazetteer_labels(kind, country=country, state=m.get("state")):
+                    self.log_message("Gazetteer: %s '%s' not in cached options; will match live", field, val, level=LOG_DEBUG, event="gazetteer.miss")
+            out.append(m)
+        return out
 
     def run_srivari_group_flow(self):
-        cfg = self.load_srivari_source()
+        cfg = self.load_srivari_source(canonicalize=True)
         general = cfg.get("general", {})
         members = cfg.get("members", [])
 
@@ -1527,9 +4110,6 @@ class TTDBookingBot:
         leader = members[0]
         leader.setdefault("country", "India")
 
-        self.log_message("Filling Team Leader details...")
-        self.fill_srivari_team_leader(leader, x, include_address=True)
-
         limit = None
         try:
             gs = int(general.get("group_size")) if general.get("group_size") else None
@@ -1538,32 +4118,59 @@ class TTDBookingBot:
         except Exception:
             pass
 
-        # Crash-recovery: resume from last saved member index
-        resume_from = 2
+        # Crash-recovery: replay the journal of an unfinished run for this same group
+        plan = None
         try:
-            meta_path = "booking_data.json"
-            if os.path.exists(meta_path):
-                with open(meta_path, "r", encoding="utf-8") as f:
-                    meta = json.load(f) or {}
-                resume_from = int(meta.get("current_member_index", 2))
-        except Exception:
-            resume_from = 2
+            plan = self.journal.begin(self._journal_key(members), run_id=self.tracer.current_run_id,
+                                      members=len(members), group_size=limit)
+        except Exception as e:
+            self.log_message(f"Run journal unavailable: {e}", level=LOG_WARNING, event="journal.error")
+        start = plan["member"] if plan else 1
+        skip = plan["fields"] if plan else []
+        if plan:
+            self.log_message(f"Resuming unfinished run at member {start}" + (f" ({len(skip)} steps already done)" if skip else ""),
+                             event="journal.resume")
 
+        if start <= 1:
+            self.phases.enter("leader_fill", member=1)
+            self.log_message("Filling Team Leader details...")
+            self._fill_member_journaled(1, leader, x, skip=skip)
+
+        if plan and plan["wait_for_save"] and 1 < start <= len(members) + 1:
+            # Journaled as filled but not saved. After a browser restart the form is blank, and
+            # waiting for a "save" would pass at once and lose this member: fill it again instead.
+            prev = start - 1
+            if not self._form_shows_member(x, members[prev - 1]):
+                self.log_message(f"Member {prev} is no longer on the form; filling it again", event="journal.resume")
+                self._invalidate_element_cache()
+                self.phases.enter("leader_fill" if prev == 1 else "member_fill", member=prev)
+                self._fill_member_journaled(prev, members[prev - 1], x)
+
+        last = max(1, start - 1)
         for idx, m in enumerate(members[1:], start=2):
             if limit and idx > limit:
                 break
-            if idx < resume_from:
+            if idx < start:
+                continue
+
+            if idx == start and plan and not plan["wait_for_save"]:
+                # Form already shows this member (blank after a journaled save, or partly filled)
+                self._invalidate_element_cache()
+                self.phases.enter("member_fill", member=idx)
+                self.log_message(f"Filling Member {idx} details...")
+                self._fill_member_journaled(idx, m, x, skip=skip)
+                last = idx
                 continue
 
             # Wait for your manual click, but detect progress by form reset (not staleness)
+            self.phases.enter("wait_for_save", member=idx - 1)
             self.log_message("⏸ Click 'Save and Add Sevak' when ready...")
-            start = time.time()
-            detected = False
-            while time.time() - start < 90:  # up to 90s to detect form reset
-                if self.wait_for_blank_member_form(x, timeout=3):
-                    detected = True
-                    break
-                time.sleep(0.4)
+            # Up to 90s to detect form reset (in-page wait, polling fallback)
+            with self.trace_span("wait_for_save", cat="wait", member=idx - 1):
+                detected = self.wait_for_blank_member_form(x, timeout=90)
+            # New form generation: cached handles may belong to the previous member's DOM
+            self._invalidate_element_cache()
+            self.journal.append("member_saved", member=idx - 1, confirmed=bool(detected))
             if detected:
                 self.log_message("✅ Detected form reset. Continuing with next Sevak...")
             else:
@@ -1575,61 +4182,47 @@ class TTDBookingBot:
                     self.clear_input_by_xpath(x.get("name_input"))
                     self.clear_input_by_xpath(x.get("id_proof_number_input"))
 
-            if not self.wait_for_blank_member_form(x):
+            with self.trace_span("confirm_blank", cat="wait", member=idx):
+                blank = self.wait_for_blank_member_form(x)
+            if not blank:
                 self.log_message("Form did not reset after Save and Add. Clearing manually...")
                 self.clear_input_by_xpath(x.get("name_input"))
                 self.clear_input_by_xpath(x.get("id_proof_number_input"))
 
+            self.phases.enter("member_fill", member=idx)
             self.log_message(f"Filling Member {idx} details...")
             # Aadhaar-first, and only fill empty fields for members
-            self.fill_srivari_team_leader(m, x, include_address=True)
-
-            # Save progress index for crash recovery
-            try:
-                with open("booking_data.json", "r", encoding="utf-8") as f:
-                    meta = json.load(f) if f.readable() else {}
-            except Exception:
-                meta = {}
-            try:
-                meta["current_member_index"] = idx + 1
-                with open("booking_data.json", "w", encoding="utf-8") as f:
-                    json.dump(meta, f, indent=2)
-            except Exception:
-                pass
+            self._fill_member_journaled(idx, m, x)
+            last = idx
 
         # For the final member, detect save by input reset rather than staleness
+        self.phases.enter("wait_for_final_save")
         self.log_message("⏸ Click 'Save and Add Sevak' for the final member...")
-        start = time.time()
-        while time.time() - start < 60:
-            if self.wait_for_blank_member_form(x, timeout=3):
-                self.log_message("✅ Detected final form reset. Saved.")
-                break
-            time.sleep(0.4)
+        with self.trace_span("wait_for_final_save", cat="wait"):
+            final_saved = self.wait_for_blank_member_form(x, timeout=60)
+        self.journal.append("member_saved", member=last, confirmed=bool(final_saved))
+        self.phases.enter("continue", final_saved=bool(final_saved))
+        if final_saved:
+            self.log_message("✅ Detected final form reset. Saved.")
         else:
             self.log_message("⚠️ Could not confirm final save by reset. Proceeding.")
 
         if general.get("auto_select_date"):
             self.log_message("Attempting to continue to booking...")
             if x.get("continue_button"):
-                if self.wait_for_continue_clickable(x.get("continue_button"), timeout=90):
-                    if not self.click_xpath(x.get("continue_button")):
-                        self.log_message("Could not click 'Continue'. Please verify XPath.")
-                else:
-                    self.log_message("Continue button not clickable.")
+                with self.trace_span("continue", cat="step"):
+                    if self.wait_for_continue_clickable(x.get("continue_button"), timeout=90):
+                        if not self.click_xpath(x.get("continue_button")):
+                            self.log_message("Could not click 'Continue'. Please verify XPath.")
+                    else:
+                        self.log_message("Continue button not clickable.")
         
         if general.get("auto_download_ticket"):
             self.log_message("Auto-download enabled. Tickets should go to configured folder.")
 
-        # Clear resume marker after successful flow
+        # Close the run; compaction then empties the journal
         try:
-            meta_path = "booking_data.json"
-            if os.path.exists(meta_path):
-                with open(meta_path, "r", encoding="utf-8") as f:
-                    meta = json.load(f) or {}
-                if "current_member_index" in meta:
-                    del meta["current_member_index"]
-                    with open(meta_path, "w", encoding="utf-8") as f:
-                        json.dump(meta, f, indent=2)
+            self.journal.finish(members=last)
         except Exception:
             pass
 
@@ -1665,24 +4258,37 @@ class TTDBookingBot:
         }
 
     def run_bot(self):
+        # Fill commands go ahead of screenshots and probes on the WebDriver owner thread
+        self.webdriver.set_priority(DRIVER_FILL)
         try:
             if not self.driver:
                 self.log_message("Browser not available.")
                 self.stop_bot()
                 return
-            self.wait_for_srivari_page()
-            self.log_message("Srivari Seva form detected. Starting group fill...")
-            self.run_srivari_group_flow()
+            run_id = self.tracer.start_run()
+            self.phases.start(run_id)
+            self.log_message(f"Run {run_id} started.")
+            outcome = "failed"
+            try:
+                with self.trace_span("wait_for_page", cat="wait"):
+                    self.wait_for_srivari_page()
+                self.log_message("Srivari Seva form detected. Starting group fill...")
+                with self.trace_span("group_flow", cat="run"):
+                    self.run_srivari_group_flow()
+                outcome = "done" if self.is_running else "stopped"
+            finally:
+                self.tracer.end_run(run_id)
+                self.phases.finish(outcome)
+            # Liveness comes from the background probe; two failed probes in a row mean the window is gone
+            self.browser_state.start()
             while self.is_running and self.is_browser_open:
-                try:
-                    _ = self.driver.current_url
-                    time.sleep(2)
-                except Exception:
+                time.sleep(1)
+                if self.browser_state.snapshot()["failures"] >= 2:
                     self.is_browser_open = False
                     self.log_message("Browser closed by user.")
                     break
         except Exception as e:
-            self.log_message(f"Error in bot execution: {str(e)}")
+            self.log_message("Error in bot execution: %s", e, level=LOG_ERROR, event="run.error")
         finally:
             if not self.is_running:
                 try: